@@ -3,6 +3,8 @@ import numpy as np
 import plotly.graph_objects as go
 import yfinance as yf # Nur für den Test-Daten-Download nötig
 
+from logic import MetricsBundle, drawdown_from_peak
+
 class MarketForensics:
     """
     Die reine Logik-Einheit für statistische Auswertungen.
@@ -43,10 +45,13 @@ class MarketForensics:
         return stats.round(1).set_index('Regime')
 
     @staticmethod
-    def get_crash_metrics(df: pd.DataFrame) -> dict:
+    def get_crash_metrics(df: pd.DataFrame, metrics: MetricsBundle = None) -> dict:
         """
         Forensische Analyse: Findet 'Echte Crashs' (Ground Truth) und prüft,
         ob das Signal gewarnt hat.
+
+        metrics: Optional MetricsBundle des Symbols - der 90-Tage-Drawdown
+        wird dort gecacht.
         """
         work_df = df.copy()
         
@@ -90,8 +95,10 @@ class MarketForensics:
         # --- SCHRITT 1: DEFINITION "ECHTER CRASH" (GROUND TRUTH) ---
         
         # Drawdown vom 90-Tage Hoch (mittelfristiger Trend)
-        rolling_peak = work_df[price_col].rolling(window=90, min_periods=1).max()
-        work_df['drawdown'] = (work_df[price_col] - rolling_peak) / rolling_peak
+        if metrics is not None and len(metrics) == len(work_df):
+            work_df['drawdown'] = metrics.drawdown_from_peak(90)
+        else:
+            work_df['drawdown'] = drawdown_from_peak(work_df[price_col], 90)
 
         # Harte Definition: Crash ist nur, wenn Drawdown < -20%
         # (Für Tech/Krypto evtl auf -25% anpassen, für SAP reichen -20%)
@@ -34,7 +34,7 @@ import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
 
-from logic import DataFetcher, SOCAnalyzer, run_dca_simulation, calculate_audit_metrics, get_current_market_state, compute_market_state, MarketState
+from logic import DataFetcher, SOCAnalyzer, run_dca_simulation, calculate_audit_metrics, get_current_market_state, compute_market_state, MarketState, MetricsBundle, compute_panel_states, panel_market_phases
 from ui_simulation import render_dca_simulation
 from ui_detail import render_detail_panel, render_regime_persistence_chart, render_current_regime_outlook
 from ui_auth import render_disclaimer, render_login_dialog, render_signup_dialog, render_education_landing
@@ -605,10 +605,11 @@ import textwrap
 # =============================================================================
 # STATISTICAL REPORT & SIGNAL AUDIT (Clean Rebuild)
 # =============================================================================
-def render_advanced_analytics(df: pd.DataFrame, is_dark: bool = False) -> None:
+def render_advanced_analytics(df: pd.DataFrame, is_dark: bool = False, metrics: MetricsBundle = None) -> None:
     """
     Clean rebuild using MarketForensics engine.
     Simply calls engine and displays results.
+    Pass the symbol's MetricsBundle to reuse its cached 90-day drawdown.
     """
     if df is None or df.empty:
         st.info("No data available.")
@@ -649,7 +650,7 @@ def render_advanced_analytics(df: pd.DataFrame, is_dark: bool = False) -> None:
     
     # Call engine
     regime_stats = MarketForensics.get_regime_stats(df_work)
-    crash_metrics = MarketForensics.get_crash_metrics(df_work)
+    crash_metrics = MarketForensics.get_crash_metrics(df_work, metrics)
     
     # Build display table (directly from engine output)
     regime_table = regime_stats.copy()
@@ -1027,8 +1028,9 @@ def run_analysis(tickers: List[str]) -> List[Dict[str, Any]]:
     """
     Run SOC analysis on multiple tickers with progress indicator.
     
-    For each ticker: fetches data, calculates metrics, determines market
-    phase (5-tier classification), and returns analysis results.
+    Fetches data for every ticker, then determines the market phase
+    (5-tier classification) for the whole universe in one vectorized
+    panel pass (compute_panel_states) and returns analysis results.
     
     Includes robust API error handling with user-friendly messages.
     
@@ -1040,39 +1042,49 @@ def run_analysis(tickers: List[str]) -> List[Dict[str, Any]]:
     results = []
     failed_tickers = []
     api_error_count = 0
+    frames = {}
+    infos = {}
     
     progress = st.progress(0)
     status = st.empty()
     
-    for i, symbol in enumerate(tickers):
-        status.caption(f"⚡ Calibrating seismic analysis for {symbol}...")
-        try:
-            df = fetcher.fetch_data(symbol)
-            info = fetcher.fetch_info(symbol)
-            if not df.empty and len(df) > MIN_DATA_POINTS:
-                analyzer = SOCAnalyzer(df, symbol, info, DEFAULT_SMA_WINDOW, DEFAULT_VOL_WINDOW, DEFAULT_HYSTERESIS)
-                phase = analyzer.get_market_phase()
-                phase['info'] = info
-                phase['name'] = clean_name(info.get('name', symbol))
-                results.append(phase)
+    def show_progress(result, done, total):
+        status.caption(f"⚡ Calibrating seismic analysis for {result.symbol}...")
+        progress.progress(done / total)
+    
+    # Concurrent fetch (cache hits resolve immediately)
+    for result in fetcher.fetch_many(tickers, with_info=True, on_result=show_progress):
+        symbol, e = result.symbol, result.error
+        if e is None:
+            if len(result.data) > MIN_DATA_POINTS:
+                frames[symbol] = result.data
+                infos[symbol] = result.info
             else:
                 failed_tickers.append(symbol)
                 api_error_count += 1
-        except ConnectionError:
-            failed_tickers.append(symbol)
-            api_error_count += 1
-        except TimeoutError:
+        elif isinstance(e, (ConnectionError, TimeoutError)):
             failed_tickers.append(symbol)
             api_error_count += 1
-        except Exception as e:
+        else:
             error_msg = str(e).lower()
             if 'rate limit' in error_msg or 'too many requests' in error_msg:
                 api_error_count += 1
             elif 'connection' in error_msg or 'timeout' in error_msg or 'network' in error_msg:
                 api_error_count += 1
             failed_tickers.append(symbol)
-        
-        progress.progress((i + 1) / len(tickers))
+    
+    # One panel pass for all fetched tickers
+    phases = panel_market_phases(compute_panel_states(
+        frames, DEFAULT_SMA_WINDOW, DEFAULT_VOL_WINDOW, hysteresis=DEFAULT_HYSTERESIS
+    ))
+    for symbol, df in frames.items():
+        phase = phases.get(symbol)
+        if phase is None:
+            # Not enough data for a state - keep the analyzer's NO_DATA/ERROR result
+            phase = SOCAnalyzer(df, symbol, infos[symbol], DEFAULT_SMA_WINDOW, DEFAULT_VOL_WINDOW, DEFAULT_HYSTERESIS).get_market_phase()
+        phase['info'] = infos[symbol]
+        phase['name'] = clean_name(infos[symbol].get('name', symbol))
+        results.append(phase)
     
     status.empty()
     progress.empty()
@@ -1403,8 +1415,11 @@ def render_asset_analysis_view(ticker_symbol: str) -> None:
                 st.error(f"No data available for {ticker_symbol}")
                 return
             
+            # Rolling primitives shared by the hero state and the charts
+            metrics = MetricsBundle(df, ticker_symbol)
+            
             # Get current market state
-            current_state = get_current_market_state(df, strategy_mode="defensive")
+            current_state = get_current_market_state(df, strategy_mode="defensive", symbol=ticker_symbol, metrics=metrics)
             
             # Get basic info
             price = df['close'].iloc[-1] if 'close' in df.columns else 0.0
@@ -1437,12 +1452,12 @@ def render_asset_analysis_view(ticker_symbol: str) -> None:
             if tier == "premium":
                 st.markdown("### Historical Analysis")
                 
-                analyzer = SOCAnalyzer(df, ticker_symbol, {})
+                analyzer = SOCAnalyzer(df, ticker_symbol, {}, metrics=metrics)
                 figs = analyzer.get_plotly_figures(dark_mode=is_dark)
                 st.plotly_chart(figs['chart3'], use_container_width=True)
                 
                 # Advanced analytics
-                render_advanced_analytics(df, is_dark=is_dark)
+                render_advanced_analytics(df, is_dark=is_dark, metrics=metrics)
                 
             else:
                 # Free/Public: Upgrade prompt
@@ -1911,19 +1926,17 @@ def main():
                     
                     # Fetch full analysis for all portfolio assets (includes crash_warning)
                     with st.spinner("🌊 Acquiring seismic market data stream... Analyzing structural stress patterns..."):
-                        import time
                         portfolio_analysis = []
                         fetcher = DataFetcher(cache_enabled=True)
                         failed_tickers = []
                         
-                        for i, ticker in enumerate(portfolio):
+                        # Concurrent fetch, bounded per provider (no fixed delay between tickers)
+                        for fetched in fetcher.fetch_many(portfolio, with_info=True):
+                            ticker = fetched.symbol
                             try:
-                                # Add small delay between requests to avoid rate limiting
-                                if i > 0:
-                                    time.sleep(0.5)  # 500ms delay between tickers
-                                
-                                df = fetcher.fetch_data(ticker)
-                                info = fetcher.fetch_info(ticker)
+                                if fetched.error is not None:
+                                    raise fetched.error
+                                df, info = fetched.data, fetched.info
                                 if not df.empty and len(df) > MIN_DATA_POINTS:
                                     analyzer = SOCAnalyzer(df, ticker, info, DEFAULT_SMA_WINDOW, DEFAULT_VOL_WINDOW, DEFAULT_HYSTERESIS)
                                     phase = analyzer.get_market_phase()
@@ -2171,9 +2184,12 @@ def main():
                     st.session_state['data'] = full_history
                     st.session_state['data_symbol'] = symbol
 
+                # Rolling primitives shared by the hero state and the charts
+                metrics = MetricsBundle(full_history, symbol)
+
                 # === GET CURRENT MARKET STATE (matches backtest tail) ===
                 # This ensures Hero Card visually matches the end of the performance chart
-                current_state = get_current_market_state(full_history, strategy_mode="defensive")
+                current_state = get_current_market_state(full_history, strategy_mode="defensive", symbol=symbol, metrics=metrics)
                 
                 # Map state to visual theme
                 is_invested = current_state.get('is_invested', True)
@@ -2219,12 +2235,12 @@ def main():
                 if tier == "premium":
                     # Premium: Full access to charts and analytics
                     if not full_history.empty:
-                        analyzer = SOCAnalyzer(full_history, symbol, selected.get('info'))
+                        analyzer = SOCAnalyzer(full_history, symbol, selected.get('info'), metrics=metrics)
                         figs = analyzer.get_plotly_figures(dark_mode=is_dark)
                         st.plotly_chart(figs['chart3'], width="stretch")
                         
                         # Advanced analytics (event-based)
-                        render_advanced_analytics(full_history, is_dark=is_dark)
+                        render_advanced_analytics(full_history, is_dark=is_dark, metrics=metrics)
                         
                         # === MONTE CARLO FORECAST ===
                         st.markdown("---")
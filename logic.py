@@ -21,19 +21,36 @@ Author: Market Analysis Team
 Version: 6.0 (Cleaned & Documented)
 """
 
+import hashlib
+import itertools
 import json
+import math
+import os
+import random
+import re
+import shutil
+import threading
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pyarrow as pa
+import pyarrow.feather as feather
 import requests
+from curl_cffi.requests import exceptions as curl_exceptions
 import yfinance as yf
+from yfinance.exceptions import YFRateLimitError
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Literal
 
 # =============================================================================
@@ -71,11 +88,336 @@ class MarketState:
     extension_component: Optional[int] = None
 
 
+# =============================================================================
+# ROLLING PERCENTILE RANK KERNEL
+# =============================================================================
+
+RANK_OPS = ("<", "<=", ">", ">=")
+
+
+def _count_in_sorted(sorted_values: List[float], threshold: float, op: str) -> int:
+    """Count values x in an ascending list with `x <op> threshold` via bisect."""
+    if op == "<":
+        return bisect_left(sorted_values, threshold)
+    if op == "<=":
+        return bisect_right(sorted_values, threshold)
+    if op == ">":
+        return len(sorted_values) - bisect_right(sorted_values, threshold)
+    return len(sorted_values) - bisect_left(sorted_values, threshold)
+
+
+def rolling_rank_counts(values, window: int, op: str = "<=",
+                        include_current: bool = True,
+                        thresholds: Optional[Any] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count trailing-window values x satisfying `x <op> threshold` at every position.
+    
+    The window covers positions [i-window+1, i] and is kept as a sorted list with
+    bisect insert/delete, so a full pass costs O(n log W) instead of building a
+    Series per window. NaN values never enter the window.
+    
+    Args:
+        values: 1-D array or Series of observations
+        window: Window length including the current position
+        op: Comparison of reference value x against the threshold:
+            "<", "<=", ">" or ">="
+        include_current: If True, the current value is part of the reference set
+        thresholds: Comparison value per position (scalar or array,
+            default: the current value)
+    
+    Returns:
+        Tuple (counts, n_ref) of int64 arrays: matching values and size of the
+        reference set at each position. counts is 0 where the threshold is NaN.
+    """
+    if op not in RANK_OPS:
+        raise ValueError(f"op must be one of {RANK_OPS}, got {op!r}")
+    if window < 1:
+        raise ValueError(f"window must be >= 1, got {window}")
+    
+    vals = np.asarray(values, dtype=np.float64).tolist()
+    n = len(vals)
+    if thresholds is None:
+        thr = vals
+    else:
+        thr = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), (n,)).tolist()
+    
+    counts = [0] * n
+    n_ref = [0] * n
+    window_sorted: List[float] = []
+    
+    for i in range(n):
+        # Drop the value leaving the window
+        j = i - window
+        if j >= 0:
+            old = vals[j]
+            if old == old:
+                del window_sorted[bisect_left(window_sorted, old)]
+        
+        v = vals[i]
+        if include_current and v == v:
+            window_sorted.insert(bisect_right(window_sorted, v), v)
+        
+        t = thr[i]
+        if t == t:
+            counts[i] = _count_in_sorted(window_sorted, t, op)
+        n_ref[i] = len(window_sorted)
+        
+        if not include_current and v == v:
+            window_sorted.insert(bisect_right(window_sorted, v), v)
+    
+    return np.array(counts, dtype=np.int64), np.array(n_ref, dtype=np.int64)
+
+
+def rolling_percentile_rank(values, window: int, op: str = "<=",
+                            include_current: bool = True,
+                            min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    Trailing percentile rank (0-100) of each value within its rolling window.
+    
+    rank[i] = 100 * #{x in reference window : x <op> values[i]} / #reference
+    
+    Replaces rolling(...).apply(lambda x: ...) percentile patterns with a single
+    O(n log W) pass (see rolling_rank_counts).
+    
+    Args:
+        values: 1-D array or Series of observations
+        window: Window length including the current position
+        op: "<", "<=", ">" or ">=" (reference value vs. current value)
+        include_current: If True, the current value is part of the reference set
+        min_periods: Minimum non-NaN observations in the window, including the
+            current one (default: window, like pandas rolling)
+    
+    Returns:
+        float64 array; NaN where the current value is NaN, the window holds fewer
+        than min_periods observations, or the reference set is empty.
+    
+    Example:
+        >>> # % of the previous 503 volatilities strictly below today's
+        >>> rolling_percentile_rank(vol, 504, op="<", include_current=False)
+    """
+    if min_periods is None:
+        min_periods = window
+    
+    vals = np.asarray(values, dtype=np.float64)
+    counts, n_ref = rolling_rank_counts(vals, window, op, include_current)
+    
+    current_valid = ~np.isnan(vals)
+    n_obs = n_ref if include_current else n_ref + current_valid
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranks = counts / n_ref * 100
+    ranks[~current_valid | (n_obs < min_periods) | (n_ref == 0)] = np.nan
+    return ranks
+
+
+def percentile_rank(reference, value: float, op: str = "<=") -> float:
+    """
+    Percentile rank (0-100) of a single value against a reference sample.
+    
+    Single-window form of rolling_percentile_rank, using the same sorted/bisect
+    counting. NaN reference values are ignored.
+    
+    Args:
+        reference: Reference observations (array or Series)
+        value: Value to rank
+        op: "<", "<=", ">" or ">=" (reference value vs. ranked value)
+    
+    Returns:
+        100 * #{x in reference : x <op> value} / #reference, or NaN if the
+        reference sample is empty.
+    """
+    if op not in RANK_OPS:
+        raise ValueError(f"op must be one of {RANK_OPS}, got {op!r}")
+    ref = np.asarray(reference, dtype=np.float64)
+    ref = np.sort(ref[~np.isnan(ref)]).tolist()
+    if not ref:
+        return float('nan')
+    return float(_count_in_sorted(ref, value, op) / len(ref) * 100)
+
+
+# =============================================================================
+# SHARED METRICS BUNDLE (Rolling primitives computed once per frame)
+# =============================================================================
+
+# Default return horizons (bars) of the horizon-return matrix
+RETURN_HORIZONS = (1, 3, 5, 10, 20, 30, 60, 90, 120, 180, 252)
+
+class MetricsBundle:
+    """
+    Rolling primitives of one OHLCV frame, each computed at most once.
+    
+    compute_market_state(), compute_market_states(), SOCMetricsCalculator,
+    DynamicExposureSimulator and get_current_market_state() all need returns,
+    SMA and rolling volatility of the same close series. Build one bundle per
+    symbol and data version and pass it to each of them; every window is then
+    rolled exactly once. The primitives are causal, so the full-history values
+    sliced at idx equal values recomputed on the prefix up to idx.
+    
+    Args:
+        df: DataFrame with OHLCV data (must have 'close' column). Not copied -
+            build a new bundle when the frame's data changes.
+        symbol: Asset symbol (informational)
+    
+    Example:
+        >>> metrics = MetricsBundle(df, "SPY")
+        >>> state = compute_market_state(df, len(df) - 1, metrics=metrics)
+        >>> analyzer = SOCAnalyzer(df, "SPY", metrics=metrics)
+    """
+    
+    def __init__(self, df: pd.DataFrame, symbol: str = ""):
+        if df is None or 'close' not in df.columns:
+            raise ValueError("DataFrame must contain 'close' column")
+        self.df = df
+        self.symbol = symbol
+        self.close: pd.Series = df['close']
+        self._fingerprint = self._frame_fingerprint(df)
+        self._returns: Optional[pd.Series] = None
+        self._sma: Dict[int, pd.Series] = {}
+        self._volatility: Dict[int, pd.Series] = {}
+        self._deviation: Dict[int, pd.Series] = {}
+        self._drawdown: Dict[int, np.ndarray] = {}
+        self._horizon_returns: Dict[Tuple[int, ...], HorizonReturns] = {}
+    
+    def __len__(self) -> int:
+        return len(self.df)
+    
+    @property
+    def returns(self) -> pd.Series:
+        """Daily percentage change of close."""
+        if self._returns is None:
+            self._returns = self.close.pct_change()
+        return self._returns
+    
+    def sma(self, window: int) -> pd.Series:
+        """Simple moving average of close (full window required)."""
+        if window not in self._sma:
+            self._sma[window] = self.close.rolling(window=window).mean()
+        return self._sma[window]
+    
+    def volatility(self, window: int) -> pd.Series:
+        """Rolling standard deviation of returns (full window required)."""
+        if window not in self._volatility:
+            self._volatility[window] = self.returns.rolling(window=window).std()
+        return self._volatility[window]
+    
+    def deviation(self, window: int) -> pd.Series:
+        """Price deviation from the SMA in percent: (close - sma) / sma * 100."""
+        if window not in self._deviation:
+            sma = self.sma(window)
+            self._deviation[window] = (self.close - sma) / sma * 100
+        return self._deviation[window]
+    
+    def drawdown_from_peak(self, window: int) -> np.ndarray:
+        """Drawdown of close from its rolling `window`-bar peak (see drawdown_from_peak())."""
+        if window not in self._drawdown:
+            self._drawdown[window] = drawdown_from_peak(self.close, window)
+        return self._drawdown[window]
+    
+    def horizon_returns(self, horizons: Tuple[int, ...] = RETURN_HORIZONS) -> "HorizonReturns":
+        """Trailing/forward return matrix of close for the given horizons."""
+        key = tuple(sorted(set(horizons)))
+        if key not in self._horizon_returns:
+            self._horizon_returns[key] = HorizonReturns(self.close, key)
+        return self._horizon_returns[key]
+    
+    @staticmethod
+    def _frame_fingerprint(df: pd.DataFrame) -> tuple:
+        """Length, first/last timestamp and first/middle/last close of df."""
+        n = len(df)
+        if n == 0:
+            return (0,)
+        closes = df['close'].to_numpy(dtype=np.float64)[[0, n // 2, n - 1]]
+        return (n, df.index[0], df.index[-1], closes.tobytes())
+    
+    def check_frame(self, df: pd.DataFrame) -> None:
+        """
+        Raise ValueError if the bundle was not built from (a frame like) df.
+        
+        Besides the calendar, the closes at the first, middle and last bar
+        must match, so another symbol's frame on the same calendar or a
+        restated (split/dividend adjusted) history is refused in O(1).
+        """
+        if self.df is df:
+            return
+        if self._fingerprint != self._frame_fingerprint(df):
+            raise ValueError("MetricsBundle was built from a different DataFrame")
+
+
+class HorizonReturns:
+    """
+    Multi-horizon simple returns of one close series as a (time x horizon) matrix.
+    
+    Built in one broadcast pass from log-price differences
+    (return_k[t] = exp(log c[t] - log c[t-k]) - 1) and stored as float32, so
+    adding horizons costs one matrix column each rather than a DataFrame
+    column per shift. Row t holds the TRAILING return ending at t; the
+    forward return starting at t is the same column read k rows later.
+    
+    Args:
+        close: Close prices (Series keeps its index for trailing()/forward())
+        horizons: Positive bar counts, e.g. RETURN_HORIZONS
+    
+    Example:
+        >>> returns = HorizonReturns(df['close'])
+        >>> prior_5d = returns.trailing(5)
+        >>> next_90d = returns.forward(90)
+    """
+    
+    def __init__(self, close, horizons: Tuple[int, ...] = RETURN_HORIZONS):
+        horizons = tuple(sorted(set(int(h) for h in horizons)))
+        if not horizons or horizons[0] < 1:
+            raise ValueError("horizons must be positive integers")
+        self.horizons = horizons
+        self.index = close.index if isinstance(close, pd.Series) else None
+        self.close = np.asarray(close, dtype=float)
+        self._column = {h: j for j, h in enumerate(horizons)}
+        
+        n = len(self.close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_close = np.log(self.close)
+        start = np.arange(n)[:, None] - np.asarray(horizons)[None, :]
+        diff = log_close[:, None] - log_close[np.maximum(start, 0)]
+        diff[start < 0] = np.nan
+        self.matrix: np.ndarray = np.expm1(diff).astype(np.float32)
+    
+    def __len__(self) -> int:
+        return len(self.close)
+    
+    def _col(self, horizon: int) -> int:
+        if horizon not in self._column:
+            raise ValueError(f"Horizon {horizon} not in {self.horizons}")
+        return self._column[horizon]
+    
+    def trailing(self, horizon: int) -> np.ndarray:
+        """Return over the `horizon` bars ending at each bar (NaN for the first bars)."""
+        return self.matrix[:, self._col(horizon)]
+    
+    def forward(self, horizon: int) -> np.ndarray:
+        """Return over the `horizon` bars starting at each bar (NaN for the last bars)."""
+        out = np.full(len(self), np.nan, dtype=np.float32)
+        if horizon < len(self):
+            out[:len(self) - horizon] = self.matrix[horizon:, self._col(horizon)]
+        return out
+    
+    def to_frame(self, forward: bool = False) -> pd.DataFrame:
+        """All horizons as DataFrame columns named '<k>d'."""
+        columns = {f"{h}d": self.forward(h) if forward else self.trailing(h) for h in self.horizons}
+        return pd.DataFrame(columns, index=self.index)
+
+
+def drawdown_from_peak(close, window: int) -> np.ndarray:
+    """(close - rolling max) / rolling max over `window` bars (partial windows allowed)."""
+    close = np.asarray(close, dtype=float)
+    peak = pd.Series(close).rolling(window=window, min_periods=1).max().to_numpy()
+    return (close - peak) / peak
+
+
 def compute_market_state(df: pd.DataFrame, idx: int, 
                          sma_window: int = 200,
                          vol_window: int = 30,
                          percentile_lookback: int = 504,
-                         hysteresis: float = 0.02) -> MarketState:
+                         hysteresis: float = 0.02,
+                         metrics: Optional[MetricsBundle] = None) -> MarketState:
     """
     Compute market state for a single point in time using only trailing data.
     
@@ -89,6 +431,8 @@ def compute_market_state(df: pd.DataFrame, idx: int,
         vol_window: Window for volatility calculation (default: 30)
         percentile_lookback: Window for volatility percentile rank (default: 504 ~2yr)
         hysteresis: Dead zone around SMA for trend determination (default: 2%)
+        metrics: Shared MetricsBundle of df (optional, avoids recomputing
+            the rolling primitives)
     
     Returns:
         MarketState object with all computed metrics
@@ -125,24 +469,27 @@ def compute_market_state(df: pd.DataFrame, idx: int,
         raise ValueError("DataFrame must contain 'close' column")
     
     # Use only data up to idx (NO LOOK-AHEAD)
-    historical_df = df.iloc[:idx+1].copy()
+    historical_df = df.iloc[:idx+1]
     
     # Calculate SMA (requires full window)
     if len(historical_df) < sma_window:
         raise ValueError(f"Insufficient data: need {sma_window} rows, got {len(historical_df)}")
     
-    historical_df['sma'] = historical_df['close'].rolling(window=sma_window).mean()
-    
-    # Calculate returns and volatility
-    historical_df['returns'] = historical_df['close'].pct_change()
-    historical_df['volatility'] = historical_df['returns'].rolling(window=vol_window).std()
+    # SMA, returns and volatility - rolling primitives are causal, so values
+    # from a shared full-history bundle sliced at idx equal the prefix values
+    if metrics is None:
+        metrics = MetricsBundle(historical_df)
+    else:
+        metrics.check_frame(df)
+    sma_series = metrics.sma(sma_window).iloc[:idx+1]
+    vol_full = metrics.volatility(vol_window).iloc[:idx+1]
     
     # Get current values (at idx)
-    current = historical_df.iloc[-1]
-    current_price = current['close']
-    current_sma = current['sma']
-    current_vol = current['volatility']
-    current_date = current.name if isinstance(current.name, pd.Timestamp) else pd.Timestamp(current.name)
+    current_price = historical_df['close'].iloc[-1]
+    current_sma = sma_series.iloc[-1]
+    current_vol = vol_full.iloc[-1]
+    current_name = historical_df.index[-1]
+    current_date = current_name if isinstance(current_name, pd.Timestamp) else pd.Timestamp(current_name)
     
     # Check for NaN (insufficient data for calculations)
     if pd.isna(current_sma) or pd.isna(current_vol):
@@ -151,8 +498,7 @@ def compute_market_state(df: pd.DataFrame, idx: int,
     # === VOLATILITY PERCENTILE (Trailing Window Only) ===
     # FIX 1: Exclude current observation from reference distribution
     lookback_window = min(percentile_lookback, len(historical_df))
-    trailing_window = historical_df.iloc[-lookback_window:]
-    vol_series = trailing_window['volatility'].dropna()
+    vol_series = vol_full.iloc[-lookback_window:].dropna()
     
     if len(vol_series) < 30:
         # Not enough data for reliable percentile
@@ -163,19 +509,8 @@ def compute_market_state(df: pd.DataFrame, idx: int,
         if len(historical_vols) == 0:
             vol_percentile = 50.0
         else:
-            # Percentile: what % of *past* values are <= current?
-            vol_percentile = float((current_vol <= historical_vols).sum() / len(historical_vols) * 100)
-    
-    # === TREND STATE (with hysteresis) ===
-    upper_bound = current_sma * (1.0 + hysteresis)
-    lower_bound = current_sma * (1.0 - hysteresis)
-    
-    if current_price > upper_bound:
-        trend_state = "UP"
-    elif current_price < lower_bound:
-        trend_state = "DOWN"
-    else:
-        trend_state = "NEUTRAL"
+            # Percentile: what % of *past* values are >= current?
+            vol_percentile = percentile_rank(historical_vols, current_vol, op=">=")
     
     # === PRICE DEVIATION METRICS (for continuous modifiers) ===
     # Calculate price deviation from SMA as percentage
@@ -183,20 +518,77 @@ def compute_market_state(df: pd.DataFrame, idx: int,
     
     # FIX 3: Asset-agnostic extension risk via percentile
     # Get historical deviations for percentile calculation
-    historical_df['price_deviation'] = ((historical_df['close'] - historical_df['sma']) / historical_df['sma'] * 100)
-    dev_series = historical_df['price_deviation'].iloc[-lookback_window:].dropna()
+    dev_series = metrics.deviation(sma_window).iloc[:idx+1].iloc[-lookback_window:].dropna()
     
     if len(dev_series) > 30:
         # Exclude current from historical distribution
         historical_devs = dev_series.iloc[:-1] if len(dev_series) > 1 else dev_series
         if len(historical_devs) > 0:
             # Extension percentile: how extreme is current deviation?
-            extension_percentile = float((abs(price_deviation_pct) <= abs(historical_devs)).sum() / len(historical_devs) * 100)
+            extension_percentile = percentile_rank(historical_devs.abs(), abs(price_deviation_pct), op=">=")
         else:
             extension_percentile = 50.0
     else:
         extension_percentile = 50.0
     
+    # FIX 4: Historical severity of the current below-SMA deviation
+    trend_risk_percentile = None
+    if price_deviation_pct < 0 and len(dev_series) > 30:
+        below_sma_devs = dev_series[dev_series < 0]
+        if len(below_sma_devs) > 0:
+            trend_risk_percentile = percentile_rank(below_sma_devs, price_deviation_pct, op=">=")
+    
+    return _market_state_from_metrics(
+        date=current_date,
+        price=current_price,
+        sma=current_sma,
+        volatility=current_vol,
+        vol_percentile=vol_percentile,
+        extension_percentile=extension_percentile,
+        trend_risk_percentile=trend_risk_percentile,
+        hysteresis=hysteresis
+    )
+
+
+def _market_state_from_metrics(date: pd.Timestamp, price: float, sma: float, volatility: float,
+                               vol_percentile: float, extension_percentile: float,
+                               trend_risk_percentile: Optional[float],
+                               hysteresis: float) -> MarketState:
+    """
+    Build a MarketState from already computed point-in-time metrics.
+    
+    Holds the trend, criticality, component and reason-code rules so that
+    compute_market_state() and MarketStateStream apply exactly the same logic.
+    
+    Args:
+        date: Timestamp of the observation
+        price: Close price at the observation
+        sma: SMA value at the observation
+        volatility: Rolling volatility at the observation
+        vol_percentile: Trailing volatility percentile (0-100)
+        extension_percentile: Trailing |deviation| percentile (0-100)
+        trend_risk_percentile: Severity of a below-SMA deviation vs. history
+            (0-100), or None if there is not enough history to modulate
+        hysteresis: Dead zone around SMA for trend determination
+    
+    Returns:
+        MarketState object
+    """
+    # === TREND STATE (with hysteresis) ===
+    upper_bound = sma * (1.0 + hysteresis)
+    lower_bound = sma * (1.0 - hysteresis)
+    
+    if price > upper_bound:
+        trend_state = "UP"
+    elif price < lower_bound:
+        trend_state = "DOWN"
+    else:
+        trend_state = "NEUTRAL"
+    
+    # === PRICE DEVIATION METRICS (for continuous modifiers) ===
+    # Calculate price deviation from SMA as percentage
+    price_deviation_pct = ((price - sma) / sma * 100) if sma > 0 else 0
+    
     # === CRITICALITY SCORE (Weighted Combination) ===
     # FIX 2, 4, 5: Continuous modifiers with weighted combination
     
@@ -210,11 +602,8 @@ def compute_market_state(df: pd.DataFrame, idx: int,
         # Use magnitude of deviation and its percentile for smooth scaling
         trend_risk = min(100, abs(price_deviation_pct) * 2.0)  # Scale: -10% → 20 risk
         # Boost by percentile to make it relative to history
-        if len(dev_series) > 30:
-            below_sma_devs = dev_series[dev_series < 0]
-            if len(below_sma_devs) > 0:
-                trend_risk_percentile = float((price_deviation_pct <= below_sma_devs).sum() / len(below_sma_devs) * 100)
-                trend_risk = trend_risk * (trend_risk_percentile / 100.0)  # Modulate by historical severity
+        if trend_risk_percentile is not None:
+            trend_risk = trend_risk * (trend_risk_percentile / 100.0)  # Modulate by historical severity
         trend_risk = min(100, trend_risk)
     else:
         # Above or at SMA: minimal trend risk
@@ -316,8 +705,8 @@ def compute_market_state(df: pd.DataFrame, idx: int,
     reason_codes = reason_codes[:4]
     
     return MarketState(
-        date=current_date,
-        volatility=float(current_vol),
+        date=date,
+        volatility=float(volatility),
         volatility_percentile=float(vol_percentile),
         trend_state=trend_state,
         criticality=criticality_int,
@@ -329,186 +718,1266 @@ def compute_market_state(df: pd.DataFrame, idx: int,
     )
 
 
-def get_regime_color(regime: Literal["GREEN", "YELLOW", "RED"]) -> str:
+def _market_state_arrays(close: np.ndarray, sma: np.ndarray, price_deviation_pct: np.ndarray,
+                         vol_percentile: np.ndarray, extension_percentile: np.ndarray,
+                         trend_risk_percentile: np.ndarray, hysteresis: float,
+                         explain: bool = True) -> Dict[str, Any]:
     """
-    Get hex color code for regime display.
+    Vectorized form of _market_state_from_metrics over 1-D metric arrays.
+    
+    The arrays may run along time (compute_market_states) or across assets
+    (compute_panel_states); every element is classified independently with the
+    same rules and floating-point operations as the scalar version.
     
     Args:
-        regime: GREEN, YELLOW, or RED
+        close: Close prices
+        sma: SMA values
+        price_deviation_pct: Deviation from SMA in % (0 where SMA <= 0)
+        vol_percentile: Trailing volatility percentile (0-100)
+        extension_percentile: Trailing |deviation| percentile (0-100)
+        trend_risk_percentile: Severity of a below-SMA deviation (0-100),
+            NaN where there is not enough history to modulate
+        hysteresis: Dead zone around SMA for trend determination
+        explain: If False, skip components and reason codes (parameter sweeps)
     
     Returns:
-        Hex color code
+        Dictionary of arrays: trend_state, criticality, regime and, if explain,
+        reason_codes (list of lists), volatility_component, trend_component,
+        extension_component
     """
-    if regime == "GREEN":
-        return "#27AE60"  # Green
-    elif regime == "YELLOW":
-        return "#F39C12"  # Orange/Yellow
-    elif regime == "RED":
-        return "#C0392B"  # Red
-    else:
-        return "#95A5A6"  # Grey (fallback)
+    with np.errstate(invalid='ignore'):
+        trend_risk = np.minimum(100, np.abs(price_deviation_pct) * 2.0)
+        trend_risk = np.where(np.isnan(trend_risk_percentile), trend_risk,
+                              trend_risk * (trend_risk_percentile / 100.0))
+        trend_risk = np.where(price_deviation_pct < 0, np.minimum(100, trend_risk), 0.0)
 
+    extension_risk = np.where(
+        price_deviation_pct > 0, np.maximum(0, (extension_percentile - 50) * 2.0), 0.0
+    )
 
-def market_state_to_legacy_dict(state: MarketState, symbol: str = "", price: float = 0.0) -> Dict[str, Any]:
+    # === CRITICALITY SCORE (same weights and clamping as compute_market_state) ===
+    w_vol = 0.70
+    w_trend = 0.20
+    w_ext = 0.10
+
+    criticality = w_vol * vol_percentile + w_trend * trend_risk + w_ext * extension_risk
+    criticality = np.maximum(0, np.minimum(100, criticality))
+    criticality_int = np.rint(np.nan_to_num(criticality)).astype(np.int64)
+
+    # === REGIME / TREND ===
+    regime = np.where(criticality_int < 40, "GREEN",
+                      np.where(criticality_int < 70, "YELLOW", "RED"))
+    trend_state = np.where(close > sma * (1.0 + hysteresis), "UP",
+                           np.where(close < sma * (1.0 - hysteresis), "DOWN", "NEUTRAL"))
+    if not explain:
+        return {'trend_state': trend_state, 'criticality': criticality_int, 'regime': regime}
+
+    # === EXPLAINABILITY: deterministic remainder allocation ===
+    parts = np.column_stack([
+        w_vol * vol_percentile,
+        w_trend * trend_risk,
+        w_ext * extension_risk,
+    ])
+    parts = np.nan_to_num(parts)
+    floors = np.floor(parts)
+    remainders = parts - floors
+    floors = floors.astype(np.int64)
+    to_allocate = np.minimum(criticality_int - floors.sum(axis=1), 3)
+    # Position of each component in a stable descending sort of remainders
+    position = np.zeros_like(floors)
+    for i in range(3):
+        for j in range(3):
+            if j == i:
+                continue
+            ahead = remainders[:, j] > remainders[:, i]
+            if j < i:
+                ahead |= remainders[:, j] == remainders[:, i]
+            position[:, i] += ahead
+    floors += (position < to_allocate[:, None]).astype(np.int64)
+    floors[:, 0] += criticality_int - floors.sum(axis=1)
+
+    # === REASON CODES ===
+    vol_code = np.select(
+        [vol_percentile >= 90, vol_percentile >= 70, vol_percentile <= 20],
+        ["VOL_EXTREME", "VOL_HIGH", "VOL_LOW"], default="VOL_NORMAL"
+    )
+    trend_code = np.select(
+        [trend_state == "DOWN", trend_state == "UP"],
+        ["TREND_DOWN", "TREND_UP"], default="TREND_FLAT"
+    )
+    ext_code = np.select(
+        [extension_percentile >= 95, extension_percentile >= 80],
+        ["EXTENSION_EXTREME", "EXTENSION_HIGH"], default=""
+    )
+    reason_codes = [
+        [v, t, e] if e else [v, t]
+        for v, t, e in zip(vol_code.tolist(), trend_code.tolist(), ext_code.tolist())
+    ]
+
+    return {
+        'trend_state': trend_state,
+        'criticality': criticality_int,
+        'regime': regime,
+        'reason_codes': reason_codes,
+        'volatility_component': floors[:, 0],
+        'trend_component': floors[:, 1],
+        'extension_component': floors[:, 2],
+    }
+
+
+def _rolling_vol_percentile(vol: np.ndarray, percentile_lookback: int) -> np.ndarray:
     """
-    Convert MarketState to legacy dictionary format for backward compatibility.
+    Trailing volatility percentile of every bar, as in compute_market_state().
     
-    This allows old code to continue working with minimal changes.
+    % of the previous valid volatilities in the window that are >= the current
+    one (current excluded); 50 while fewer than 30 observations are available.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_count, vol_n = rolling_rank_counts(vol, percentile_lookback, ">=", include_current=False)
+        return np.where(vol_n + 1 < 30, 50.0, vol_count / vol_n * 100)
+
+
+def _rolling_deviation_percentiles(deviation: np.ndarray, sma: np.ndarray,
+                                   percentile_lookback: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    SMA-deviation based percentiles of every bar, as in compute_market_state().
     
     Args:
-        state: MarketState object
-        symbol: Asset symbol (for legacy compatibility)
-        price: Current price (for legacy compatibility)
+        deviation: (close - sma) / sma * 100 per bar
+        sma: SMA per bar
+        percentile_lookback: Trailing window length
     
     Returns:
-        Dictionary matching old get_market_phase() format
+        Tuple (price_deviation_pct, extension_percentile, trend_risk_percentile);
+        trend_risk_percentile is NaN where compute_market_state() does not
+        modulate trend risk.
     """
-    # Map 3-tier regime to legacy 5-tier signal
-    if state.regime == "GREEN":
-        if state.trend_state == "UP":
-            signal = "🟢 STABLE REGIME"
-            tier = "STABLE"
-        else:
-            signal = "⚪ DORMANT REGIME"
-            tier = "DORMANT"
-    elif state.regime == "YELLOW":
-        signal = "🟡 ACTIVE REGIME"
-        tier = "ACTIVE"
-    else:  # RED
-        if state.criticality >= 80:
-            signal = "🔴 CRITICAL REGIME"
-            tier = "CRITICAL"
-        else:
-            signal = "🟠 HIGH ENERGY REGIME"
-            tier = "HIGH_ENERGY"
-    
-    return {
-        "symbol": symbol,
-        "price": price,
-        "volatility": state.volatility,
-        "vol_percentile": state.volatility_percentile,
-        "criticality_score": state.criticality,
-        "signal": signal,
-        "tier": tier,
-        "trend": state.trend_state,
-        "regime": state.regime,
-        "reason_codes": state.reason_codes
-    }
-
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_deviation_pct = np.where(sma > 0, deviation, 0.0)
 
-# --- CONFIGURATION & CONSTANTS ---
+        # === EXTENSION PERCENTILE (|deviation|, excludes current) ===
+        ext_count, dev_n = rolling_rank_counts(
+            np.abs(deviation), percentile_lookback, ">=", include_current=False,
+            thresholds=np.abs(price_deviation_pct)
+        )
+        dev_len = dev_n + 1  # Valid deviations in window incl. current
+        extension_percentile = np.where(dev_len > 30, ext_count / dev_n * 100, 50.0)
 
-# Binance API Configuration
-BINANCE_BASE_URL: str = "https://api.binance.com"
-BINANCE_KLINES_ENDPOINT: str = "/api/v3/klines"
+        # === TREND RISK (historical severity among below-SMA deviations, incl. current) ===
+        below = np.cumsum(deviation < 0)
+        below_prev = np.concatenate([np.zeros(percentile_lookback, dtype=below.dtype), below])[:len(below)]
+        below_count = below - below_prev
+        lower_count, _ = rolling_rank_counts(
+            deviation, percentile_lookback, "<", include_current=True,
+            thresholds=price_deviation_pct
+        )
+        trend_risk_percentile = (below_count - lower_count) / below_count * 100
 
-# Data Fetching Parameters
-DEFAULT_INTERVAL: str = "1d"
-DEFAULT_LOOKBACK_DAYS: int = 2000
+        modulate = (dev_len > 30) & (below_count > 0)
+        trend_risk_percentile = np.where(modulate, trend_risk_percentile, np.nan)
 
-# Analysis Parameters
-SMA_PERIOD: int = 200
-ROLLING_VOLATILITY_WINDOW: int = 30
+    return price_deviation_pct, extension_percentile, trend_risk_percentile
 
-# Volatility Thresholds (Dynamic Quantile-based) - 5-Tier System
-VOLATILITY_LOW_PERCENTILE: float = 33.33   # Below = Low Stress
-VOLATILITY_MEDIUM_PERCENTILE: float = 50.0  # Below = Normal Stress
-VOLATILITY_HIGH_PERCENTILE: float = 80.0    # Above = High Stress (Orange zone)
-VOLATILITY_EXTREME_PERCENTILE: float = 99.0 # Above = Extreme (instant Red)
 
-# Caching
-CACHE_DIR: str = "data"
-CACHE_FILENAME_TEMPLATE: str = "{symbol}_{interval}_cached.csv"
+def compute_market_states(df: pd.DataFrame,
+                          sma_window: int = 200,
+                          vol_window: int = 30,
+                          percentile_lookback: int = 504,
+                          hysteresis: float = 0.02,
+                          metrics: Optional[MetricsBundle] = None) -> pd.DataFrame:
+    """
+    Compute market state for EVERY bar in one pass (batch version of compute_market_state).
 
-# API Settings
-REQUEST_TIMEOUT: int = 10
-MAX_RETRIES: int = 3
-RETRY_DELAY: int = 2
+    Produces exactly the values compute_market_state(df, idx) returns for each idx,
+    but computes the rolling SMA/volatility once and maintains the trailing
+    percentile windows incrementally (O(n log W) instead of O(n²) for a loop).
+    Still no look-ahead bias - every row only uses data up to and including itself.
 
+    Args:
+        df: DataFrame with OHLCV data (must have 'close' column)
+        sma_window: Window for SMA trend calculation (default: 200)
+        vol_window: Window for volatility calculation (default: 30)
+        percentile_lookback: Window for volatility percentile rank (default: 504 ~2yr)
+        hysteresis: Dead zone around SMA for trend determination (default: 2%)
+        metrics: Shared MetricsBundle of df (optional)
 
-# --- METRICS CALCULATOR ---
+    Returns:
+        DataFrame indexed by date with one column per MarketState field.
+        Bars where compute_market_state would raise (insufficient data for
+        SMA/volatility) are omitted.
 
-class SOCMetricsCalculator:
-    """
-    Calculates financial metrics for SOC analysis:
-    - Daily returns and absolute magnitude
-    - Simple Moving Average (trend detection)
-    - Rolling volatility (criticality metric)
-    - 5-tier volatility thresholds for traffic light system
+    Example:
+        >>> states = compute_market_states(df)
+        >>> states['regime'].value_counts()
     """
+    if df is None or df.empty:
+        raise ValueError("DataFrame is empty")
 
-    def __init__(self, df: pd.DataFrame, sma_window: int = SMA_PERIOD, vol_window: int = ROLLING_VOLATILITY_WINDOW) -> None:
-        self.df = df.copy()
-        self.sma_window = sma_window
-        self.vol_window = vol_window
-        # 5-tier thresholds
-        self.vol_low_threshold = 0.0
-        self.vol_medium_threshold = 0.0
-        self.vol_high_threshold = 0.0
-        self.vol_extreme_threshold = 0.0
-        self._validate_dataframe()
+    if 'close' not in df.columns:
+        raise ValueError("DataFrame must contain 'close' column")
 
-    def _validate_dataframe(self) -> None:
-        """Ensure DataFrame has required 'close' column for calculations."""
-        if "close" not in self.df.columns:
-            raise ValueError("DataFrame must contain 'close' column")
+    # Rolling primitives are causal, so computing them once on the full frame
+    # yields the same values as recomputing them on every prefix.
+    if metrics is None:
+        metrics = MetricsBundle(df)
+    else:
+        metrics.check_frame(df)
 
-    def calculate_all_metrics(self) -> pd.DataFrame:
-        """
-        Calculate all SOC metrics and add them as DataFrame columns.
-        
-        Computed metrics:
-            - returns: Daily percentage change
-            - abs_returns: Absolute value of returns
-            - sma_200: 200-day Simple Moving Average (trend indicator)
-            - volatility: 30-day rolling standard deviation of returns
-            - vol_percentile: Current volatility rank vs 2-year history (0-100)
-            - vol_zone: 5-tier classification (low/normal/medium/high/extreme)
+    close = metrics.close.to_numpy(dtype=np.float64)
+    sma = metrics.sma(sma_window).to_numpy(dtype=np.float64)
+    vol = metrics.volatility(vol_window).to_numpy(dtype=np.float64)
+    deviation = metrics.deviation(sma_window).to_numpy(dtype=np.float64)
+
+    valid = ~np.isnan(sma) & ~np.isnan(vol)
+
+    vol_percentile = _rolling_vol_percentile(vol, percentile_lookback)
+    price_deviation_pct, extension_percentile, trend_risk_percentile = \
+        _rolling_deviation_percentiles(deviation, sma, percentile_lookback)
+
+    arrays = _market_state_arrays(
+        close, sma, price_deviation_pct, vol_percentile,
+        extension_percentile, trend_risk_percentile, hysteresis
+    )
+
+    dates = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.to_datetime(df.index)
+    states = pd.DataFrame({
+        'volatility': vol,
+        'volatility_percentile': vol_percentile,
+        **arrays,
+    }, index=pd.DatetimeIndex(dates, name='date'))
+
+    return states[valid]
+
+
+def market_states_to_list(states: pd.DataFrame) -> List[MarketState]:
+    """
+    Convert the output of compute_market_states() into MarketState objects.
+
+    Args:
+        states: DataFrame returned by compute_market_states()
+
+    Returns:
+        List of MarketState, one per row, in chronological order
+    """
+    return [
+        MarketState(
+            date=date,
+            volatility=float(row.volatility),
+            volatility_percentile=float(row.volatility_percentile),
+            trend_state=row.trend_state,
+            criticality=int(row.criticality),
+            regime=row.regime,
+            reason_codes=list(row.reason_codes),
+            volatility_component=int(row.volatility_component),
+            trend_component=int(row.trend_component),
+            extension_component=int(row.extension_component)
+        )
+        for date, row in zip(states.index, states.itertuples(index=False))
+    ]
+
+
+# =============================================================================
+# PARAMETER SWEEP (Grid of sma_window / vol_window / lookback / hysteresis)
+# =============================================================================
+
+SWEEP_PARAMETERS = ("sma_window", "vol_window", "percentile_lookback", "hysteresis")
+REGIME_ORDER = ["GREEN", "YELLOW", "RED"]
+
+
+def parameter_grid(sma_windows=(200,), vol_windows=(30,), percentile_lookbacks=(504,),
+                   hysteresis=(0.02,)) -> List[Tuple[int, int, int, float]]:
+    """
+    Cartesian product of parameter values for sweep_market_states().
+    
+    Example:
+        >>> grid = parameter_grid(sma_windows=[100, 150, 200], hysteresis=[0.0, 0.02])
+        >>> len(grid)
+        6
+    """
+    return list(itertools.product(sma_windows, vol_windows, percentile_lookbacks, hysteresis))
+
+
+def _regime_summary(criticality: np.ndarray, regime: np.ndarray) -> Dict[str, float]:
+    """Regime distribution and stability statistics of one state series."""
+    n = len(regime)
+    transitions = int((regime[1:] != regime[:-1]).sum()) if n > 1 else 0
+    return {
+        'n_bars': n,
+        'pct_green': float((regime == "GREEN").mean() * 100) if n else np.nan,
+        'pct_yellow': float((regime == "YELLOW").mean() * 100) if n else np.nan,
+        'pct_red': float((regime == "RED").mean() * 100) if n else np.nan,
+        'mean_criticality': float(criticality.mean()) if n else np.nan,
+        'transitions': transitions,
+        'avg_regime_duration': n / (transitions + 1) if n else np.nan,
+    }
+
+
+def sweep_market_states(df: pd.DataFrame,
+                        param_grid: List[Tuple[int, int, int, float]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Evaluate market states over one price history for a grid of parameters.
+    
+    Each combination yields exactly the criticality, regime and trend of
+    compute_market_states(df, *params), but shared work is done once:
+    returns are computed once, SMA/deviation once per sma_window, volatility
+    once per vol_window, volatility ranks once per (vol_window, lookback) and
+    deviation ranks once per (sma_window, lookback). Hysteresis only changes
+    the trend classification, so it is free on top.
+    
+    Args:
+        df: DataFrame with OHLCV data (must have 'close' column)
+        param_grid: Iterable of (sma_window, vol_window, percentile_lookback,
+            hysteresis) tuples, e.g. from parameter_grid()
+    
+    Returns:
+        Tuple (states, summary):
+        - states: tidy DataFrame with one row per parameter tuple and date
+          (columns: sma_window, vol_window, percentile_lookback, hysteresis,
+          date, criticality, regime, trend_state)
+        - summary: one row per parameter tuple with regime distribution
+          (pct_green/pct_yellow/pct_red), mean_criticality, transitions and
+          avg_regime_duration (bars per regime run)
+    
+    Example:
+        >>> grid = parameter_grid([100, 200], [20, 30], [252, 504], [0.0, 0.02])
+        >>> states, summary = sweep_market_states(df, grid)
+        >>> summary.sort_values('transitions').head()
+    """
+    if df is None or df.empty:
+        raise ValueError("DataFrame is empty")
+    
+    if 'close' not in df.columns:
+        raise ValueError("DataFrame must contain 'close' column")
+    
+    grid = [tuple(params) for params in param_grid]
+    for params in grid:
+        if len(params) != len(SWEEP_PARAMETERS):
+            raise ValueError(f"Parameter tuples must be {SWEEP_PARAMETERS}, got {params}")
+    
+    metrics = MetricsBundle(df)
+    close = metrics.close.to_numpy(dtype=np.float64)
+    dates = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.to_datetime(df.index)
+    
+    # Memoized intermediate results shared across combinations
+    # (SMA / deviation / volatility per window live in the MetricsBundle)
+    vol_rank_cache: Dict[Tuple[int, int], np.ndarray] = {}
+    dev_rank_cache: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    
+    state_frames = []
+    summary_rows = []
+    for sma_window, vol_window, percentile_lookback, hysteresis in grid:
+        sma = metrics.sma(sma_window).to_numpy(dtype=np.float64)
+        deviation = metrics.deviation(sma_window).to_numpy(dtype=np.float64)
+        vol = metrics.volatility(vol_window).to_numpy(dtype=np.float64)
+        
+        vol_key = (vol_window, percentile_lookback)
+        if vol_key not in vol_rank_cache:
+            vol_rank_cache[vol_key] = _rolling_vol_percentile(vol, percentile_lookback)
+        
+        dev_key = (sma_window, percentile_lookback)
+        if dev_key not in dev_rank_cache:
+            dev_rank_cache[dev_key] = _rolling_deviation_percentiles(deviation, sma, percentile_lookback)
+        price_deviation_pct, extension_percentile, trend_risk_percentile = dev_rank_cache[dev_key]
+        
+        arrays = _market_state_arrays(
+            close, sma, price_deviation_pct, vol_rank_cache[vol_key],
+            extension_percentile, trend_risk_percentile, hysteresis, explain=False
+        )
+        valid = ~np.isnan(sma) & ~np.isnan(vol)
+        criticality = arrays['criticality'][valid]
+        regime = arrays['regime'][valid]
+        n = int(valid.sum())
+        
+        state_frames.append(pd.DataFrame({
+            'sma_window': np.full(n, sma_window),
+            'vol_window': np.full(n, vol_window),
+            'percentile_lookback': np.full(n, percentile_lookback),
+            'hysteresis': np.full(n, hysteresis, dtype=np.float64),
+            'date': dates[valid],
+            'criticality': criticality,
+            'regime': pd.Categorical(regime, categories=REGIME_ORDER),
+            'trend_state': pd.Categorical(arrays['trend_state'][valid], categories=["UP", "DOWN", "NEUTRAL"]),
+        }))
+        summary_rows.append({
+            'sma_window': sma_window,
+            'vol_window': vol_window,
+            'percentile_lookback': percentile_lookback,
+            'hysteresis': hysteresis,
+            **_regime_summary(criticality, regime),
+        })
+    
+    states = pd.concat(state_frames, ignore_index=True) if state_frames else pd.DataFrame(
+        columns=list(SWEEP_PARAMETERS) + ['date', 'criticality', 'regime', 'trend_state']
+    )
+    summary = pd.DataFrame(summary_rows, columns=list(SWEEP_PARAMETERS) + [
+        'n_bars', 'pct_green', 'pct_yellow', 'pct_red', 'mean_criticality',
+        'transitions', 'avg_regime_duration'
+    ])
+    return states, summary
+
+
+# =============================================================================
+# MARKET STATE CACHE (Process-wide memoization of current states)
+# =============================================================================
+
+class MarketStateCache:
+    """
+    Bounded LRU/TTL cache for MarketState results.
+    
+    Shared by every caller in the process (analyzer, hero card, portfolio view),
+    so one Streamlit rerun computes the state of a symbol's latest bar only once.
+    Keys are built by cached_market_state(); entries of a symbol are dropped
+    explicitly via invalidate() when DataFetcher refreshes that symbol.
+    
+    Args:
+        max_size: Maximum number of entries (least recently used are evicted)
+        ttl_seconds: Maximum age of an entry in seconds
+    """
+    
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 900.0):
+        if max_size < 1:
+            raise ValueError(f"max_size must be >= 1, got {max_size}")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, MarketState]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple) -> Optional[MarketState]:
+        """Return the cached state for key (counts a hit or miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: tuple, state: MarketState) -> None:
+        """Store a state, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, symbol: Optional[str] = None) -> int:
+        """
+        Drop the entries of one symbol (or all entries if symbol is None).
         
         Returns:
-            DataFrame with all calculated metrics, NaN rows dropped.
+            Number of entries removed
         """
-        # Calculate returns
-        self.df["returns"] = self.df["close"].pct_change()
-        self.df["abs_returns"] = self.df["returns"].abs()
+        with self._lock:
+            if symbol is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key in self._entries if key[0] == symbol]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
 
-        # Calculate moving averages
-        self.df["sma_200"] = self.df["close"].rolling(window=self.sma_window).mean()
 
-        # Calculate rolling volatility (30-day)
-        self.df["volatility"] = self.df["returns"].rolling(window=self.vol_window).std()
-        
-        # Calculate volatility percentile (for criticality score)
-        # Rolling 2-year window (504 trading days) for percentile calculation
-        lookback = min(504, len(self.df) - 1)
-        self.df["vol_percentile"] = self.df["volatility"].rolling(window=lookback).apply(
-            lambda x: (x.iloc[-1] > x[:-1]).mean() * 100 if len(x) > 1 else 50, raw=False
+MARKET_STATE_CACHE = MarketStateCache()
+
+
+def cached_market_state(df: pd.DataFrame, idx: Optional[int] = None, symbol: str = "",
+                        sma_window: int = 200,
+                        vol_window: int = 30,
+                        percentile_lookback: int = 504,
+                        hysteresis: float = 0.02,
+                        metrics: Optional[MetricsBundle] = None) -> MarketState:
+    """
+    Memoized compute_market_state() backed by MARKET_STATE_CACHE.
+    
+    The cache key is (symbol, timestamp at idx, rows up to idx, hash of the
+    closes in the window the state depends on, parameters), so a refreshed or
+    edited history never hits a stale entry even without invalidation.
+    
+    Args:
+        df: DataFrame with OHLCV data (must have 'close' column)
+        idx: Integer index position to evaluate (default: last row)
+        symbol: Asset symbol (used for invalidation, optional)
+        sma_window, vol_window, percentile_lookback, hysteresis, metrics:
+            Same as compute_market_state()
+    
+    Returns:
+        MarketState identical to compute_market_state(df, idx, ...)
+    
+    Raises:
+        ValueError: Same conditions as compute_market_state() (errors are not cached)
+    """
+    if df is None or df.empty or 'close' not in df.columns:
+        return compute_market_state(df, 0 if idx is None else idx, sma_window, vol_window,
+                                    percentile_lookback, hysteresis)
+    if idx is None:
+        idx = len(df) - 1
+    if idx < 0 or idx >= len(df):
+        raise ValueError(f"Index {idx} out of bounds (df length: {len(df)})")
+    
+    tail_start = max(0, idx + 1 - (sma_window + vol_window + percentile_lookback))
+    tail = np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64)[tail_start:idx + 1])
+    tail_hash = hashlib.blake2b(tail.tobytes(), digest_size=16).hexdigest()
+    key = (symbol, df.index[idx], idx + 1, tail_hash,
+           sma_window, vol_window, percentile_lookback, hysteresis)
+    
+    state = MARKET_STATE_CACHE.get(key)
+    if state is None:
+        state = compute_market_state(df, idx, sma_window, vol_window, percentile_lookback, hysteresis,
+                                     metrics=metrics)
+        MARKET_STATE_CACHE.put(key, state)
+    # Callers may modify the returned state; keep the cached one untouched
+    return replace(state, reason_codes=list(state.reason_codes))
+
+
+# =============================================================================
+# MULTI-ASSET PANEL ENGINE (Current state for a whole universe)
+# =============================================================================
+
+def build_close_panel(data: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, List[str], List[pd.Timestamp]]:
+    """
+    Stack the close series of several assets into one 2-D float array.
+    
+    Columns are right-aligned on each asset's own latest bar (row -1 is the
+    current bar of every asset, row -2 the bar before, ...), so every asset keeps
+    its own trading calendar - a stock is not padded with crypto weekend bars.
+    Shorter histories are NaN-padded at the top, which pandas rolling windows
+    skip exactly like missing history.
+    
+    Args:
+        data: Mapping symbol -> OHLCV DataFrame (must have 'close' column)
+    
+    Returns:
+        Tuple (panel, symbols, dates): float64 array of shape (time, asset),
+        the symbols of the columns, and the latest bar date of each column.
+        Empty frames and frames without 'close' are skipped.
+    """
+    symbols = [s for s, df in data.items() if df is not None and not df.empty and 'close' in df.columns]
+    n_rows = max((len(data[s]) for s in symbols), default=0)
+    
+    panel = np.full((n_rows, len(symbols)), np.nan)
+    dates = []
+    for j, symbol in enumerate(symbols):
+        df = data[symbol]
+        panel[n_rows - len(df):, j] = df['close'].to_numpy(dtype=np.float64)
+        last = df.index[-1]
+        dates.append(last if isinstance(last, pd.Timestamp) else pd.Timestamp(last))
+    
+    return panel, symbols, dates
+
+
+def compute_panel_states(data: Dict[str, pd.DataFrame],
+                         sma_window: int = 200,
+                         vol_window: int = 30,
+                         percentile_lookback: int = 504,
+                         hysteresis: float = 0.02) -> pd.DataFrame:
+    """
+    Compute the CURRENT market state of many assets in one vectorized pass.
+    
+    Aligns all closes into a (time x asset) panel, computes SMA and volatility
+    for every column with a single rolling call, and ranks only the latest bar
+    against its trailing window with column-wise NumPy comparisons. Produces
+    exactly the values compute_market_state(df, len(df) - 1) returns per asset,
+    without building a DataFrame copy and rolling windows per symbol.
+    
+    Args:
+        data: Mapping symbol -> OHLCV DataFrame (must have 'close' column)
+        sma_window: Window for SMA trend calculation (default: 200)
+        vol_window: Window for volatility calculation (default: 30)
+        percentile_lookback: Window for volatility percentile rank (default: 504 ~2yr)
+        hysteresis: Dead zone around SMA for trend determination (default: 2%)
+    
+    Returns:
+        DataFrame indexed by symbol (input order) with columns date, price,
+        prev_price, sma and one column per MarketState field. Assets for which
+        compute_market_state would raise (insufficient data) are omitted.
+    
+    Example:
+        >>> frames = {s: fetcher.fetch_data(s) for s in ["SPY", "QQQ", "BTC-USD"]}
+        >>> panel = compute_panel_states(frames)
+        >>> panel.sort_values('criticality', ascending=False).head()
+    """
+    panel, symbols, dates = build_close_panel(data)
+    columns = ['date', 'price', 'prev_price', 'sma', 'volatility', 'volatility_percentile',
+               'trend_state', 'criticality', 'regime', 'reason_codes',
+               'volatility_component', 'trend_component', 'extension_component']
+    if not symbols:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='symbol'))
+    
+    # One rolling pass over all columns (same kernels as the single-asset path)
+    closes = pd.DataFrame(panel)
+    sma_df = closes.rolling(window=sma_window).mean()
+    vol = closes.pct_change().rolling(window=vol_window).std().to_numpy()
+    deviation = ((closes - sma_df) / sma_df * 100).to_numpy()
+    sma = sma_df.to_numpy()
+    
+    price = panel[-1]
+    prev_price = panel[-2] if len(panel) > 1 else np.full(len(symbols), np.nan)
+    current_sma = sma[-1]
+    current_vol = vol[-1]
+    current_dev = deviation[-1]
+    valid = ~np.isnan(current_sma) & ~np.isnan(current_vol)
+    
+    # Trailing window of the latest bar; NaN padding never counts as history
+    lookback = min(percentile_lookback, len(panel))
+    vol_window_vals = vol[-lookback:]
+    dev_window_vals = deviation[-lookback:]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_deviation_pct = np.where(current_sma > 0, current_dev, 0.0)
+        
+        # === VOLATILITY PERCENTILE (trailing, excludes current) ===
+        vol_len = (~np.isnan(vol_window_vals)).sum(axis=0)
+        vol_count = (vol_window_vals[:-1] >= current_vol).sum(axis=0)
+        vol_percentile = np.where(vol_len < 30, 50.0, vol_count / (vol_len - 1) * 100)
+        
+        # === EXTENSION PERCENTILE (|deviation|, excludes current) ===
+        dev_len = (~np.isnan(dev_window_vals)).sum(axis=0)
+        ext_count = (np.abs(dev_window_vals[:-1]) >= np.abs(price_deviation_pct)).sum(axis=0)
+        extension_percentile = np.where(dev_len > 30, ext_count / (dev_len - 1) * 100, 50.0)
+        
+        # === TREND RISK (historical severity among below-SMA deviations, incl. current) ===
+        below = dev_window_vals < 0
+        below_count = below.sum(axis=0)
+        severity_count = (below & (dev_window_vals >= price_deviation_pct)).sum(axis=0)
+        trend_risk_percentile = np.where(
+            (price_deviation_pct < 0) & (dev_len > 30) & (below_count > 0),
+            severity_count / below_count * 100, np.nan
         )
+    
+    arrays = _market_state_arrays(
+        price, current_sma, price_deviation_pct, vol_percentile,
+        extension_percentile, trend_risk_percentile, hysteresis
+    )
+    
+    states = pd.DataFrame({
+        'date': dates,
+        'price': price,
+        'prev_price': prev_price,
+        'sma': current_sma,
+        'volatility': current_vol,
+        'volatility_percentile': vol_percentile,
+        **arrays,
+    }, index=pd.Index(symbols, name='symbol'))
+    
+    return states[valid]
+
+
+def panel_market_phases(states: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert compute_panel_states() output into legacy market phase dictionaries.
+    
+    Args:
+        states: DataFrame returned by compute_panel_states()
+    
+    Returns:
+        Mapping symbol -> dictionary in SOCAnalyzer.get_market_phase() format
+    """
+    phases = {}
+    for symbol, state in zip(states.index, market_states_to_list(states.set_index('date'))):
+        row = states.loc[symbol]
+        phases[symbol] = market_phase_dict(state, symbol, float(row['price']),
+                                           float(row['prev_price']), float(row['sma']))
+    return phases
+
+
+# =============================================================================
+# STREAMING MARKET STATE (Incremental per-bar updates)
+# =============================================================================
+
+class _RollingMean:
+    """
+    Running-sum rolling mean over a fixed window.
+
+    Mirrors pandas' rolling().mean() update rules (Kahan-compensated add/remove)
+    so streamed values are bit-identical to the batch computation.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: deque = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = math.nan
+
+    def push(self, val: float) -> float:
+        """Add a value, evict the oldest one if the window is full, return the mean."""
+        self.values.append(val)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.compensation_remove
+                t = self.sum_x + y
+                self.compensation_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    self.neg_ct -= 1
+
+        if val == val:
+            self.nobs += 1
+            y = val - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct += 1
+            if val == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = val
+
+        if self.nobs < self.window or self.nobs == 0:
+            return math.nan
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class _RollingStd:
+    """
+    Welford-style rolling standard deviation (ddof=1) over a fixed window.
+
+    Mirrors pandas' rolling().std() update rules (Kahan-compensated Welford
+    add/remove) so streamed values are bit-identical to the batch computation.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: deque = deque()
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = math.nan
+
+    def push(self, val: float) -> float:
+        """Add a value, evict the oldest one if the window is full, return the std."""
+        self.values.append(val)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                if self.nobs:
+                    prev_mean = self.mean_x - self.compensation_remove
+                    y = old - self.compensation_remove
+                    t = y - self.mean_x
+                    self.compensation_remove = t + self.mean_x - y
+                    self.mean_x = self.mean_x - t / self.nobs
+                    self.ssqdm_x = self.ssqdm_x - (old - prev_mean) * (old - self.mean_x)
+                else:
+                    self.mean_x = 0.0
+                    self.ssqdm_x = 0.0
+
+        if val == val:
+            self.nobs += 1
+            if val == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = val
+            prev_mean = self.mean_x - self.compensation_add
+            y = val - self.compensation_add
+            t = y - self.mean_x
+            self.compensation_add = t + self.mean_x - y
+            self.mean_x = self.mean_x + t / self.nobs
+            self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+
+        if self.nobs < self.window or self.nobs <= 1:
+            return math.nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return 0.0
+        variance = self.ssqdm_x / (self.nobs - 1.0)
+        return math.sqrt(variance) if variance >= 0 else 0.0
+
+
+class MarketStateStream:
+    """
+    Incremental market state engine for a single symbol.
+
+    Feed closes one bar at a time with push(). Each call updates a running SMA
+    sum, a Welford rolling variance and sorted (order-statistic) windows for
+    the volatility and SMA-deviation percentiles, in O(log W) per bar.
+
+    The returned MarketState is identical to compute_market_state(df, idx)
+    for the same bar, so streamed regimes match the deep dive and the hero card.
+
+    Args:
+        sma_window: Window for SMA trend calculation (default: 200)
+        vol_window: Window for volatility calculation (default: 30)
+        percentile_lookback: Window for volatility percentile rank (default: 504 ~2yr)
+        hysteresis: Dead zone around SMA for trend determination (default: 2%)
+
+    Example:
+        >>> stream = MarketStateStream.from_history(df)
+        >>> state = stream.push(pd.Timestamp("2025-01-02"), 243.85)
+        >>> print(f"{state.regime}: {state.criticality}")
+    """
+
+    def __init__(self, sma_window: int = 200, vol_window: int = 30,
+                 percentile_lookback: int = 504, hysteresis: float = 0.02) -> None:
+        self.sma_window = sma_window
+        self.vol_window = vol_window
+        self.percentile_lookback = percentile_lookback
+        self.hysteresis = hysteresis
+
+        self._sma = _RollingMean(sma_window)
+        self._vol = _RollingStd(vol_window)
+        self._last_close = math.nan  # Forward-filled close (pct_change semantics)
+
+        # Trailing percentile windows: raw values (for eviction) + sorted copies
+        self._vol_window: deque = deque()
+        self._vol_sorted: List[float] = []
+        self._dev_window: deque = deque()
+        self._dev_sorted: List[float] = []
+        self._abs_dev_sorted: List[float] = []
+        self._below_count = 0
+
+        self.bar_count = 0
+        self.last_state: Optional[MarketState] = None
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, **params) -> "MarketStateStream":
+        """
+        Create a stream warmed up with the full close history of a DataFrame.
+
+        Args:
+            df: DataFrame with OHLCV data (must have 'close' column)
+            **params: sma_window, vol_window, percentile_lookback, hysteresis
+
+        Returns:
+            MarketStateStream whose last_state is the state of the last bar
+        """
+        if 'close' not in df.columns:
+            raise ValueError("DataFrame must contain 'close' column")
+        stream = cls(**params)
+        for timestamp, close in zip(df.index, df['close'].tolist()):
+            stream.push(timestamp, close)
+        return stream
+
+    def push(self, timestamp, close: float) -> Optional[MarketState]:
+        """
+        Append a new bar and return its MarketState.
+
+        Args:
+            timestamp: Bar timestamp (anything pd.Timestamp accepts)
+            close: Close price of the bar
+
+        Returns:
+            MarketState for the bar, or None while there is not enough history
+            (where compute_market_state would raise ValueError).
+        """
+        close = float(close)
+        self.bar_count += 1
+
+        # Rolling SMA and volatility of returns
+        sma = self._sma.push(close)
+        filled_close = close if close == close else self._last_close
+        if self._last_close == self._last_close and self._last_close != 0:
+            daily_return = filled_close / self._last_close - 1
+        else:
+            daily_return = math.nan
+        self._last_close = filled_close
+        vol = self._vol.push(daily_return)
+
+        deviation = (close - sma) / sma * 100 if sma != 0 else math.nan
+        price_deviation_pct = deviation if sma > 0 else 0.0
+        is_valid = sma == sma and vol == vol
+
+        lookback = self.percentile_lookback
+
+        # === VOLATILITY PERCENTILE (excludes current) ===
+        if len(self._vol_window) == lookback:
+            old = self._vol_window.popleft()
+            if old == old:
+                del self._vol_sorted[bisect_left(self._vol_sorted, old)]
+        vol_n = len(self._vol_sorted)
+        if is_valid:
+            if vol_n + 1 < 30:
+                vol_percentile = 50.0
+            else:
+                vol_count = _count_in_sorted(self._vol_sorted, vol, ">=")
+                vol_percentile = float(vol_count / vol_n * 100)
+        self._vol_window.append(vol)
+        if vol == vol:
+            self._vol_sorted.insert(bisect_right(self._vol_sorted, vol), vol)
+
+        # === EXTENSION PERCENTILE (|deviation|, excludes current) ===
+        if len(self._dev_window) == lookback:
+            old = self._dev_window.popleft()
+            if old == old:
+                del self._dev_sorted[bisect_left(self._dev_sorted, old)]
+                del self._abs_dev_sorted[bisect_left(self._abs_dev_sorted, abs(old))]
+                if old < 0:
+                    self._below_count -= 1
+        dev_n = len(self._abs_dev_sorted)
+        if is_valid:
+            if dev_n + 1 > 30:
+                threshold = abs(price_deviation_pct)
+                ext_count = _count_in_sorted(self._abs_dev_sorted, threshold, ">=")
+                extension_percentile = float(ext_count / dev_n * 100)
+            else:
+                extension_percentile = 50.0
+        self._dev_window.append(deviation)
+        if deviation == deviation:
+            self._dev_sorted.insert(bisect_right(self._dev_sorted, deviation), deviation)
+            abs_dev = abs(deviation)
+            self._abs_dev_sorted.insert(bisect_right(self._abs_dev_sorted, abs_dev), abs_dev)
+            if deviation < 0:
+                self._below_count += 1
+
+        if not is_valid:
+            return None
+
+        # === TREND RISK SEVERITY (below-SMA deviations, incl. current) ===
+        trend_risk_percentile = None
+        if price_deviation_pct < 0 and dev_n + 1 > 30 and self._below_count > 0:
+            lower = _count_in_sorted(self._dev_sorted, price_deviation_pct, "<")
+            trend_risk_percentile = float((self._below_count - lower) / self._below_count * 100)
+
+        state = _market_state_from_metrics(
+            date=pd.Timestamp(timestamp),
+            price=close,
+            sma=sma,
+            volatility=vol,
+            vol_percentile=vol_percentile,
+            extension_percentile=extension_percentile,
+            trend_risk_percentile=trend_risk_percentile,
+            hysteresis=self.hysteresis
+        )
+        self.last_state = state
+        return state
+
+
+def get_regime_color(regime: Literal["GREEN", "YELLOW", "RED"]) -> str:
+    """
+    Get hex color code for regime display.
+    
+    Args:
+        regime: GREEN, YELLOW, or RED
+    
+    Returns:
+        Hex color code
+    """
+    if regime == "GREEN":
+        return "#27AE60"  # Green
+    elif regime == "YELLOW":
+        return "#F39C12"  # Orange/Yellow
+    elif regime == "RED":
+        return "#C0392B"  # Red
+    else:
+        return "#95A5A6"  # Grey (fallback)
+
+
+def market_state_to_legacy_dict(state: MarketState, symbol: str = "", price: float = 0.0) -> Dict[str, Any]:
+    """
+    Convert MarketState to legacy dictionary format for backward compatibility.
+    
+    This allows old code to continue working with minimal changes.
+    
+    Args:
+        state: MarketState object
+        symbol: Asset symbol (for legacy compatibility)
+        price: Current price (for legacy compatibility)
+    
+    Returns:
+        Dictionary matching old get_market_phase() format
+    """
+    # Map 3-tier regime to legacy 5-tier signal
+    if state.regime == "GREEN":
+        if state.trend_state == "UP":
+            signal = "🟢 STABLE REGIME"
+            tier = "STABLE"
+        else:
+            signal = "⚪ DORMANT REGIME"
+            tier = "DORMANT"
+    elif state.regime == "YELLOW":
+        signal = "🟡 ACTIVE REGIME"
+        tier = "ACTIVE"
+    else:  # RED
+        if state.criticality >= 80:
+            signal = "🔴 CRITICAL REGIME"
+            tier = "CRITICAL"
+        else:
+            signal = "🟠 HIGH ENERGY REGIME"
+            tier = "HIGH_ENERGY"
+    
+    return {
+        "symbol": symbol,
+        "price": price,
+        "volatility": state.volatility,
+        "vol_percentile": state.volatility_percentile,
+        "criticality_score": state.criticality,
+        "signal": signal,
+        "tier": tier,
+        "trend": state.trend_state,
+        "regime": state.regime,
+        "reason_codes": state.reason_codes
+    }
+
+
+def market_phase_dict(state: MarketState, symbol: str, current_price: float,
+                      prev_price: Optional[float], sma_200: float) -> Dict[str, Any]:
+    """
+    Build the full legacy market phase dictionary (SOCAnalyzer.get_market_phase format).
+    
+    Extends market_state_to_legacy_dict() with 24h change, SMA distance and
+    stress fields.
+    
+    Args:
+        state: MarketState of the current bar
+        symbol: Asset symbol
+        current_price: Current close price
+        prev_price: Previous close price (None if unavailable)
+        sma_200: Current SMA value
+    
+    Returns:
+        Dictionary matching get_market_phase() format
+    """
+    # Calculate 24h price change
+    price_change_1d = 0.0
+    if prev_price is not None and prev_price > 0:
+        price_change_1d = ((current_price - prev_price) / prev_price) * 100
+    
+    # Distance from SMA
+    sma_distance_pct = ((current_price - sma_200) / sma_200) * 100 if sma_200 > 0 else 0
+    is_parabolic = sma_distance_pct > 30
+    
+    # Convert to legacy format
+    legacy_dict = market_state_to_legacy_dict(state, symbol, current_price)
+    
+    # Add extra fields for backward compatibility
+    legacy_dict.update({
+        "price_change_1d": price_change_1d,
+        "sma_200": sma_200,
+        "dist_to_sma": sma_distance_pct / 100,
+        "dist_to_sma_pct": sma_distance_pct,
+        "is_parabolic": is_parabolic,
+        "stress": "HIGH" if state.criticality >= 70 else ("MEDIUM" if state.criticality >= 40 else "LOW")
+    })
+    
+    return legacy_dict
+
+
+# --- CONFIGURATION & CONSTANTS ---
+
+# Binance API Configuration
+BINANCE_BASE_URL: str = "https://api.binance.com"
+BINANCE_KLINES_ENDPOINT: str = "/api/v3/klines"
+
+# Data Fetching Parameters
+DEFAULT_INTERVAL: str = "1d"
+DEFAULT_LOOKBACK_DAYS: int = 2000
+
+# Analysis Parameters
+SMA_PERIOD: int = 200
+ROLLING_VOLATILITY_WINDOW: int = 30
+
+# Volatility Thresholds (Dynamic Quantile-based) - 5-Tier System
+VOLATILITY_LOW_PERCENTILE: float = 33.33   # Below = Low Stress
+VOLATILITY_MEDIUM_PERCENTILE: float = 50.0  # Below = Normal Stress
+VOLATILITY_HIGH_PERCENTILE: float = 80.0    # Above = High Stress (Orange zone)
+VOLATILITY_EXTREME_PERCENTILE: float = 99.0 # Above = Extreme (instant Red)
+
+# Caching
+CACHE_DIR: str = "data"
+CACHE_FILENAME_TEMPLATE: str = "{symbol}_{interval}_cached{suffix}"
+# Storage format of the cache: "feather" (Arrow IPC, memory-mapped reads) or "csv"
+CACHE_BACKEND: str = "feather"
+# A requested start may precede the first cached bar by this many days
+# (weekends, holidays) before fetch_history() tops up the cache
+CACHE_START_TOLERANCE_DAYS: int = 7
+# Incremental refresh: re-request this many days before the last cached bar
+# (revised closes are reconciled), and retry a stale cache at most this often
+CACHE_OVERLAP_DAYS: int = 5
+CACHE_REFRESH_RETRY_MINUTES: int = 60
+# Relative close difference on the oldest overlapping bar above which the
+# provider is taken to have re-adjusted the history (split, dividend)
+CACHE_RESTATEMENT_TOLERANCE: float = 1e-4
+# Index of the cache files (fetch time, range, rows, provider, checksum,
+# requested start); entries of another schema version are ignored and rebuilt
+CACHE_MANIFEST_FILENAME: str = "cache_manifest.json"
+CACHE_SCHEMA_VERSION: int = 2
+
+# Staleness rules per asset class: hours (UTC) after 00:00 of a trading day
+# when its daily bar is final, and whether the market trades on weekends
+MARKET_SESSIONS: Dict[str, Dict[str, Any]] = {
+    "crypto": {"close_hour_utc": 24, "weekends": True},
+    "forex": {"close_hour_utc": 22, "weekends": False},
+    "futures": {"close_hour_utc": 22, "weekends": False},
+    "equity": {"close_hour_utc": 21, "weekends": False},
+}
+
+# API Settings
+REQUEST_TIMEOUT: int = 10
+# Retries of a rate-limited (429), failed (5xx) or dropped request, with
+# jittered exponential backoff from RETRY_DELAY seconds (capped)
+MAX_RETRIES: int = 3
+RETRY_DELAY: int = 2
+RETRY_MAX_DELAY: float = 30.0
+# Token buckets per provider class shared by all fetches of the process:
+# (sustained requests per second, burst)
+PROVIDER_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "BinanceProvider": (10.0, 20),   # 6000 request weight/min; a klines page weighs 2
+    "YFinanceProvider": (2.0, 5),    # Unofficial API, throttles bursts of requests
+}
+PROVIDER_DEFAULT_RATE_LIMIT: Tuple[float, int] = (2.0, 4)
+# Concurrent fetches (DataFetcher.fetch_many): worker threads per call, and
+# requests in flight per provider class across the whole process
+FETCH_MAX_WORKERS: int = 8
+PROVIDER_MAX_CONCURRENCY: Dict[str, int] = {
+    "BinanceProvider": 4,
+    "YFinanceProvider": 4,
+}
+PROVIDER_DEFAULT_CONCURRENCY: int = 2
+
+
+# --- METRICS CALCULATOR ---
+
+class SOCMetricsCalculator:
+    """
+    Calculates financial metrics for SOC analysis:
+    - Daily returns and absolute magnitude
+    - Simple Moving Average (trend detection)
+    - Rolling volatility (criticality metric)
+    - 5-tier volatility thresholds for traffic light system
+    
+    Metrics are computed lazily: each column is calculated on first access
+    (calculator["volatility"]) together with the columns it depends on (see
+    METRIC_DEPENDENCIES) and memoized. The input frame is not copied or
+    modified unless copy=True is requested.
+    
+    Args:
+        df: DataFrame with 'close' column
+        sma_window: Window for the trend SMA (default: 200)
+        vol_window: Window for rolling volatility (default: 30)
+        copy: If True, work on a private copy of df (default: False)
+        metrics: Shared MetricsBundle of df (optional); returns, SMA and
+            volatility are then taken from it instead of being recomputed
+    """
+
+    # Metric -> metrics/columns it is computed from
+    METRIC_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+        "returns": ("close",),
+        "abs_returns": ("returns",),
+        "sma_200": ("close",),
+        "volatility": ("returns",),
+        "vol_percentile": ("volatility",),
+        "vol_zone": ("volatility",),
+    }
+
+    def __init__(self, df: pd.DataFrame, sma_window: int = SMA_PERIOD, vol_window: int = ROLLING_VOLATILITY_WINDOW,
+                 copy: bool = False, metrics: Optional[MetricsBundle] = None) -> None:
+        self.df = df.copy() if copy else df
+        self.sma_window = sma_window
+        self.vol_window = vol_window
+        self._validate_dataframe()
+        if metrics is None:
+            metrics = MetricsBundle(self.df)
+        else:
+            metrics.check_frame(self.df)
+        self.bundle = metrics
+        self._metrics: Dict[str, pd.Series] = {}
+        self._thresholds: Optional[Tuple[float, float, float, float]] = None
+        self._all_metrics: Optional[pd.DataFrame] = None
+
+    def _validate_dataframe(self) -> None:
+        """Ensure DataFrame has required 'close' column for calculations."""
+        if "close" not in self.df.columns:
+            raise ValueError("DataFrame must contain 'close' column")
+
+    def __getitem__(self, name: str) -> pd.Series:
+        """Shorthand for get_metric(name)."""
+        return self.get_metric(name)
+
+    def get_metric(self, name: str) -> pd.Series:
+        """
+        Return one metric column, computing it (and its dependencies) on first access.
+        
+        Args:
+            name: Metric name (key of METRIC_DEPENDENCIES) or an input column
+        
+        Returns:
+            Series aligned with the input frame (no NaN rows dropped)
+        """
+        if name in self._metrics:
+            return self._metrics[name]
+        if name not in self.METRIC_DEPENDENCIES:
+            if name in self.df.columns:
+                return self.df[name]
+            raise KeyError(f"Unknown metric: {name!r}")
+        
+        inputs = [self.get_metric(dep) for dep in self.METRIC_DEPENDENCIES[name]]
+        self._metrics[name] = getattr(self, f"_compute_{name}")(*inputs)
+        return self._metrics[name]
+
+    @property
+    def computed_metrics(self) -> List[str]:
+        """Names of the metrics computed so far."""
+        return list(self._metrics)
+
+    def _compute_returns(self, close: pd.Series) -> pd.Series:
+        """Daily percentage change."""
+        return self.bundle.returns.rename("returns")
+
+    def _compute_abs_returns(self, returns: pd.Series) -> pd.Series:
+        """Absolute value of returns."""
+        return returns.abs().rename("abs_returns")
 
-        # Calculate thresholds (5-tier system)
-        self._calculate_volatility_thresholds()
-        
-        # Assign zones (5-tier)
-        self.df["vol_zone"] = self._assign_volatility_zones()
+    def _compute_sma_200(self, close: pd.Series) -> pd.Series:
+        """Trend SMA (sma_window, 200 by default)."""
+        return self.bundle.sma(self.sma_window).rename("sma_200")
 
-        # Drop NaN rows
-        self.df.dropna(inplace=True)
-        return self.df
+    def _compute_volatility(self, returns: pd.Series) -> pd.Series:
+        """Rolling standard deviation of returns (vol_window, 30 by default)."""
+        return self.bundle.volatility(self.vol_window).rename("volatility")
 
-    def _calculate_volatility_thresholds(self) -> None:
-        """Calculate 5-tier volatility thresholds."""
-        volatility = self.df["volatility"].dropna()
-        if volatility.empty:
-            return
-        self.vol_low_threshold = volatility.quantile(VOLATILITY_LOW_PERCENTILE / 100)
-        self.vol_medium_threshold = volatility.quantile(VOLATILITY_MEDIUM_PERCENTILE / 100)
-        self.vol_high_threshold = volatility.quantile(VOLATILITY_HIGH_PERCENTILE / 100)
-        self.vol_extreme_threshold = volatility.quantile(VOLATILITY_EXTREME_PERCENTILE / 100)
+    def _compute_vol_percentile(self, volatility: pd.Series) -> pd.Series:
+        """Current volatility rank vs 2-year history (0-100)."""
+        # Rolling 2-year window (504 trading days) for percentile calculation
+        # % of the previous (lookback - 1) values strictly below the current one
+        lookback = min(504, len(self.df) - 1)
+        if lookback > 1:
+            vol_percentile = rolling_percentile_rank(
+                volatility, lookback, op="<", include_current=False, min_periods=lookback
+            )
+        else:
+            vol_percentile = np.where(volatility.notna(), 50.0, np.nan)
+        return pd.Series(vol_percentile, index=volatility.index, name="vol_percentile")
 
-    def _assign_volatility_zones(self) -> pd.Series:
+    def _compute_vol_zone(self, volatility: pd.Series) -> pd.Series:
         """Assign 5-tier volatility zones."""
-        volatility = self.df["volatility"]
-        zones = pd.Series("normal", index=self.df.index)
+        zones = pd.Series("normal", index=volatility.index, name="vol_zone")
         zones[volatility <= self.vol_low_threshold] = "low"
         zones[(volatility > self.vol_low_threshold) & (volatility <= self.vol_medium_threshold)] = "normal"
         zones[(volatility > self.vol_medium_threshold) & (volatility <= self.vol_high_threshold)] = "medium"
@@ -516,6 +1985,69 @@ class SOCMetricsCalculator:
         zones[volatility > self.vol_extreme_threshold] = "extreme"
         return zones
 
+    def _volatility_thresholds(self) -> Tuple[float, float, float, float]:
+        """Calculate (once) the 5-tier volatility thresholds."""
+        if self._thresholds is None:
+            volatility = self.get_metric("volatility").dropna()
+            if volatility.empty:
+                self._thresholds = (0.0, 0.0, 0.0, 0.0)
+            else:
+                self._thresholds = (
+                    volatility.quantile(VOLATILITY_LOW_PERCENTILE / 100),
+                    volatility.quantile(VOLATILITY_MEDIUM_PERCENTILE / 100),
+                    volatility.quantile(VOLATILITY_HIGH_PERCENTILE / 100),
+                    volatility.quantile(VOLATILITY_EXTREME_PERCENTILE / 100),
+                )
+        return self._thresholds
+
+    @property
+    def vol_low_threshold(self) -> float:
+        return self._volatility_thresholds()[0]
+
+    @property
+    def vol_medium_threshold(self) -> float:
+        return self._volatility_thresholds()[1]
+
+    @property
+    def vol_high_threshold(self) -> float:
+        return self._volatility_thresholds()[2]
+
+    @property
+    def vol_extreme_threshold(self) -> float:
+        return self._volatility_thresholds()[3]
+
+    def valid_rows(self) -> np.ndarray:
+        """
+        Boolean mask of the rows calculate_all_metrics() keeps (no NaN in any column).
+        
+        Needs only returns, sma_200, volatility and vol_percentile - abs_returns
+        is NaN exactly where returns is, and vol_zone is never NaN.
+        """
+        valid = self.df.notna().all(axis=1).to_numpy()
+        for name in ("returns", "sma_200", "volatility", "vol_percentile"):
+            valid &= self.get_metric(name).notna().to_numpy()
+        return valid
+
+    def calculate_all_metrics(self) -> pd.DataFrame:
+        """
+        Calculate all SOC metrics and return them as DataFrame columns.
+        
+        Computed metrics:
+            - returns: Daily percentage change
+            - abs_returns: Absolute value of returns
+            - sma_200: 200-day Simple Moving Average (trend indicator)
+            - volatility: 30-day rolling standard deviation of returns
+            - vol_percentile: Current volatility rank vs 2-year history (0-100)
+            - vol_zone: 5-tier classification (low/normal/medium/high/extreme)
+        
+        Returns:
+            New DataFrame (input columns + metrics), NaN rows dropped.
+        """
+        if self._all_metrics is None:
+            metrics = {name: self.get_metric(name) for name in self.METRIC_DEPENDENCIES}
+            self._all_metrics = self.df.assign(**metrics).dropna()
+        return self._all_metrics
+
     def get_summary_stats(self) -> dict:
         """
         Get summary statistics for the calculated metrics.
@@ -524,18 +2056,19 @@ class SOCMetricsCalculator:
             Dictionary with total records, date range, current values,
             and volatility thresholds for all 5 tiers.
         """
-        if self.df.empty:
+        metrics_df = self.calculate_all_metrics()
+        if metrics_df.empty:
             return {}
         return {
-            "total_records": len(self.df),
-            "date_range": f"{self.df.index.min().date()} to {self.df.index.max().date()}",
-            "mean_return": self.df["returns"].mean(),
-            "std_return": self.df["returns"].std(),
-            "mean_volatility": self.df["volatility"].mean(),
-            "max_volatility": self.df["volatility"].max(),
-            "current_price": self.df["close"].iloc[-1],
-            "current_sma_200": self.df["sma_200"].iloc[-1],
-            "current_vol_percentile": self.df["vol_percentile"].iloc[-1] if "vol_percentile" in self.df.columns else 50,
+            "total_records": len(metrics_df),
+            "date_range": f"{metrics_df.index.min().date()} to {metrics_df.index.max().date()}",
+            "mean_return": metrics_df["returns"].mean(),
+            "std_return": metrics_df["returns"].std(),
+            "mean_volatility": metrics_df["volatility"].mean(),
+            "max_volatility": metrics_df["volatility"].max(),
+            "current_price": metrics_df["close"].iloc[-1],
+            "current_sma_200": metrics_df["sma_200"].iloc[-1],
+            "current_vol_percentile": metrics_df["vol_percentile"].iloc[-1],
             "vol_low_threshold": self.vol_low_threshold,
             "vol_medium_threshold": self.vol_medium_threshold,
             "vol_high_threshold": self.vol_high_threshold,
@@ -550,6 +2083,9 @@ class SOCMetricsCalculator:
 class DataProvider(ABC):
     """Abstract base class for data providers (Binance, Yahoo Finance, etc.)."""
     
+    # True if fetch_info() answers without a network request
+    static_info: bool = False
+    
     @abstractmethod
     def fetch_data(self, symbol: str, interval: str, lookback_days: int) -> pd.DataFrame:
         """Fetch OHLCV data for a symbol."""
@@ -563,6 +2099,9 @@ class DataProvider(ABC):
 
 class BinanceProvider(DataProvider):
     """Data provider for Binance cryptocurrency exchange."""
+    
+    static_info = True
+    
     def __init__(self):
         self.base_url = BINANCE_BASE_URL
 
@@ -580,111 +2119,749 @@ class BinanceProvider(DataProvider):
         url = f"{self.base_url}{BINANCE_KLINES_ENDPOINT}"
         params = {
             "symbol": symbol,
-            "interval": interval,
-            "startTime": start_time,
-            "endTime": end_time,
-            "limit": 1000,
+            "interval": interval,
+            "startTime": start_time,
+            "endTime": end_time,
+            "limit": 1000,
+        }
+        
+        all_klines = []
+        current_start = start_time
+        
+        while current_start < end_time:
+            params["startTime"] = current_start
+            try:
+                klines = call_with_retry(self, lambda: self._get_json(url, params))
+            except Exception as e:
+                # Never return (and cache) the pages fetched so far as the history
+                print(f"Binance Error: {e}")
+                return pd.DataFrame()
+
+            if not klines:
+                break
+            all_klines.extend(klines)
+            current_start = klines[-1][0] + 1
+            if len(klines) < 1000:
+                break
+                
+        # Parse
+        df = pd.DataFrame(all_klines, columns=[
+            "timestamp", "open", "high", "low", "close", "volume",
+            "close_time", "quote_volume", "trades", "taker_buy_base", "taker_buy_quote", "ignore"
+        ])
+        if df.empty:
+            return pd.DataFrame()
+            
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        for col in ["open", "high", "low", "close", "volume"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df.set_index("timestamp", inplace=True)
+        return df[["open", "high", "low", "close", "volume"]]
+
+    @staticmethod
+    def _get_json(url: str, params: Dict[str, Any]) -> Any:
+        """One GET request; HTTP errors raise (see is_retryable())."""
+        response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+class YFinanceProvider(DataProvider):
+    """Data provider for Yahoo Finance (stocks, ETFs, indices)."""
+    
+    def fetch_info(self, symbol: str) -> Dict[str, Any]:
+        try:
+            ticker = yf.Ticker(symbol)
+            info = call_with_retry(self, lambda: ticker.info)
+            description = info.get("longBusinessSummary", "")
+            if len(description) > 300:
+                description = description[:297] + "..."
+            return {
+                "name": info.get("longName", symbol),
+                "sector": info.get("sector", "Unknown"),
+                "description": description,
+            }
+        except Exception:
+            return {"name": symbol, "description": ""}
+
+    def fetch_data(self, symbol: str, interval: str, lookback_days: int) -> pd.DataFrame:
+        start_date = datetime.now() - timedelta(days=lookback_days)
+        try:
+            # Ticker.history() rather than yf.download(): the latter keeps its
+            # results in module-global state and is unsafe in concurrent fetches
+            df = call_with_retry(self, lambda: yf.Ticker(symbol).history(
+                start=start_date, auto_adjust=True, raise_errors=True, timeout=REQUEST_TIMEOUT))
+            if df.empty:
+                return pd.DataFrame()
+            
+            if isinstance(df.columns, pd.MultiIndex):
+                try:
+                    df.columns = df.columns.get_level_values(0)
+                except Exception:
+                    pass
+                
+            df.columns = [str(c).lower() for c in df.columns]
+            df.index = pd.to_datetime(df.index)
+            if df.index.tz is not None:
+                df.index = df.index.tz_localize(None)   # Exchange-local dates, like the cache
+            df.index.name = "timestamp"
+            
+            required = ["open", "high", "low", "close", "volume"]
+            available = [c for c in required if c in df.columns]
+            return df[available]
+        except Exception as e:
+            print(f"YFinance Error: {e}")
+            return pd.DataFrame()
+
+_PROVIDER_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_PROVIDER_RATE_LIMITERS: Dict[str, "TokenBucket"] = {}
+_PROVIDER_REGISTRY_LOCK = threading.Lock()
+
+
+def _per_provider(registry: Dict[str, Any], provider: DataProvider, factory):
+    """Process-wide object of a provider class, created by factory(class name) on first use."""
+    name = type(provider).__name__
+    with _PROVIDER_REGISTRY_LOCK:
+        if name not in registry:
+            registry[name] = factory(name)
+        return registry[name]
+
+
+def provider_slots(provider: DataProvider) -> threading.BoundedSemaphore:
+    """
+    Process-wide semaphore bounding the concurrent requests to a provider.
+    
+    Shared by every DataFetcher of the same provider class; the limit is
+    PROVIDER_MAX_CONCURRENCY[class name] (default PROVIDER_DEFAULT_CONCURRENCY).
+    """
+    return _per_provider(_PROVIDER_SLOTS, provider, lambda name: threading.BoundedSemaphore(
+        PROVIDER_MAX_CONCURRENCY.get(name, PROVIDER_DEFAULT_CONCURRENCY)))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting a request rate.
+    
+    Holds up to `capacity` tokens, refilled at `rate` per second; each
+    request takes one, so bursts of `capacity` requests pass at once and
+    the sustained rate is `rate`. pause() blocks every caller, e.g. after
+    the provider answered 429.
+    
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum number of stored tokens (burst size)
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"rate must be > 0 and capacity >= 1, got {rate}, {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens, sleeping until they are available.
+        
+        Returns:
+            Seconds waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return waited
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+    
+    def pause(self, seconds: float) -> None:
+        """Block all callers for `seconds` and drop the stored burst."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+    
+    def available(self) -> float:
+        """Tokens available right now."""
+        with self._lock:
+            return min(self.capacity, self._tokens + (time.monotonic() - self._updated) * self.rate)
+
+
+def provider_rate_limiter(provider: DataProvider) -> TokenBucket:
+    """
+    Process-wide token bucket of a provider class (PROVIDER_RATE_LIMITS).
+    
+    Shared by every request of every DataFetcher, so concurrent fetches
+    together stay within the provider's limit.
+    """
+    return _per_provider(_PROVIDER_RATE_LIMITERS, provider, lambda name: TokenBucket(
+        *PROVIDER_RATE_LIMITS.get(name, PROVIDER_DEFAULT_RATE_LIMIT)))
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether a request failed with 429 Too Many Requests."""
+    return (isinstance(error, YFRateLimitError)
+            or getattr(getattr(error, "response", None), "status_code", None) == 429)
+
+
+# Timeouts and dropped connections of requests (Binance), curl_cffi (yfinance)
+# and the standard library
+TRANSIENT_NETWORK_ERRORS = (
+    requests.ConnectionError, requests.Timeout,
+    curl_exceptions.ConnectionError, curl_exceptions.Timeout,
+    ConnectionError, TimeoutError,
+)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors (5xx), timeouts and dropped connections."""
+    if is_rate_limited(error) or isinstance(error, TRANSIENT_NETWORK_ERRORS):
+        return True
+    # HTTP errors of both clients carry the response and its status code
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and status >= 500
+
+
+def retry_delay(attempt: int, error: Optional[Exception] = None, base_delay: float = RETRY_DELAY) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+    
+    The server's Retry-After header if it sent one, else base_delay * 2^attempt
+    with equal jitter (50-100%, so concurrent clients spread out), capped at
+    RETRY_MAX_DELAY.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return min(float(headers.get("Retry-After")), RETRY_MAX_DELAY)
+    except (TypeError, ValueError):
+        pass
+    return min(base_delay * 2 ** attempt, RETRY_MAX_DELAY) * random.uniform(0.5, 1.0)
+
+
+def call_with_retry(provider: DataProvider, request, max_retries: int = MAX_RETRIES,
+                    base_delay: float = RETRY_DELAY):
+    """
+    Run one provider request under its rate limiter, retrying transient failures.
+    
+    Every attempt takes a token of provider_rate_limiter(provider). A 429
+    pauses the whole bucket for the backoff delay (all threads back off
+    together); other retryable errors (see is_retryable()) only delay this
+    request. Other exceptions, and the last failure, are raised.
+    
+    Args:
+        provider: Provider the request goes to
+        request: Callable doing the request
+        max_retries: Retries after the first attempt
+        base_delay: Backoff delay of the first retry (seconds)
+    
+    Returns:
+        The request's return value
+    """
+    limiter = provider_rate_limiter(provider)
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            return request()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = retry_delay(attempt, e, base_delay)
+            if is_rate_limited(e):
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of one symbol of DataFetcher.fetch_many().
+    
+    Attributes:
+        symbol: Ticker symbol as requested
+        data: OHLCV frame (empty if nothing could be fetched)
+        info: Asset metadata (only when requested)
+        error: Exception raised while fetching, if any
+        cached: True if served from a fresh cache without a worker
+    """
+    symbol: str
+    data: pd.DataFrame
+    info: Optional[Dict[str, Any]] = None
+    error: Optional[Exception] = None
+    cached: bool = False
+    
+    @property
+    def ok(self) -> bool:
+        """Fetched without error and with at least one bar."""
+        return self.error is None and not self.data.empty
+
+
+def asset_class(symbol: str) -> str:
+    """
+    Market of a ticker symbol, a key of MARKET_SESSIONS.
+    
+    Binance pairs (BTCUSDT) and Yahoo crypto tickers (BTC-USD) are crypto,
+    "=X" tickers forex, "=F" tickers futures, everything else equity
+    (stocks, ETFs, indices).
+    """
+    symbol = symbol.upper()
+    if symbol.endswith("USDT") or symbol.endswith("BUSD") or re.search(r"-(USD|USDT|EUR|GBP|BTC|ETH)$", symbol):
+        return "crypto"
+    if symbol.endswith("=X"):
+        return "forex"
+    if symbol.endswith("=F"):
+        return "futures"
+    return "equity"
+
+
+def latest_session_date(symbol: str, now: Optional[datetime] = None) -> date:
+    """
+    Date of the latest daily bar of `symbol` that is complete at `now`.
+    
+    Args:
+        symbol: Ticker symbol
+        now: Reference time (default: current UTC time; naive = UTC)
+    
+    Returns:
+        The last trading day (weekends skipped unless the market trades
+        them) whose bar closed before `now`. Holidays are not modelled.
+    """
+    session = MARKET_SESSIONS[asset_class(symbol)]
+    now = now if now is not None else datetime.now(timezone.utc)
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    day = (now - timedelta(hours=session["close_hour_utc"])).date()
+    while not session["weekends"] and day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def reconcile_bars(cached: pd.DataFrame, fresh: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extend a cached history with freshly fetched bars.
+    
+    The fresh bars win from their first timestamp on, so closes revised by
+    the provider in the overlap replace the cached values; older cached bars
+    are kept as they are (check restatement_ratio() first: after a split or
+    dividend adjustment they are on a different scale).
+    """
+    if fresh.empty:
+        return cached
+    if cached.empty:
+        return fresh
+    return pd.concat([cached[cached.index < fresh.index[0]], fresh])
+
+
+def restatement_ratio(cached: pd.DataFrame, fresh: pd.DataFrame) -> float:
+    """
+    Scale factor between fresh and cached prices on the oldest common bar.
+    
+    Providers serving adjusted prices (Yahoo Finance with auto_adjust)
+    rescale every bar before a split or dividend; the oldest bar of the
+    overlap is final, so a ratio other than 1 there means the whole cached
+    history before it is on the old scale.
+    
+    Returns:
+        fresh close / cached close on the first common timestamp (1.0 when
+        the frames do not overlap)
+    """
+    if cached.empty or fresh.empty:
+        return 1.0
+    common = cached.index.intersection(fresh.index)
+    if len(common) == 0:
+        return 1.0
+    first = common[0]
+    cached_close = float(cached['close'].loc[first])
+    return float(fresh['close'].loc[first]) / cached_close if cached_close else 1.0
+
+
+def rescale_bars(df: pd.DataFrame, ratio: float) -> pd.DataFrame:
+    """Multiply the price columns (open, high, low, close) by ratio."""
+    df = df.copy()
+    prices = [column for column in ['open', 'high', 'low', 'close'] if column in df.columns]
+    df[prices] = df[prices] * ratio
+    return df
+
+
+def cache_is_stale(symbol: str, last_bar, fetched_at: Optional[datetime],
+                   now: Optional[datetime] = None) -> bool:
+    """
+    Whether a cached history ending at `last_bar` should be topped up.
+    
+    Stale when the last bar is older than latest_session_date() for the
+    symbol's asset class, or when it was fetched before its session closed
+    (a provider's partial bar of a running session) and that session has
+    closed since. In both cases only if the cache was not fetched within
+    the last CACHE_REFRESH_RETRY_MINUTES (holidays or provider delays then
+    cost one small request per retry interval, not one per read).
+    
+    Args:
+        symbol: Ticker symbol
+        last_bar: Timestamp of the last cached bar
+        fetched_at: When the cache was last fetched (None = unknown)
+        now: Reference time (default: current UTC time; naive = UTC)
+    """
+    now = now if now is not None else datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    bar_day = pd.Timestamp(last_bar).date()
+    if bar_day >= latest_session_date(symbol, now):
+        # Complete unless fetched before the close of its (now closed) session
+        bar_close = datetime.combine(bar_day, datetime.min.time(), tzinfo=timezone.utc) \
+            + timedelta(hours=MARKET_SESSIONS[asset_class(symbol)]["close_hour_utc"])
+        if fetched_at is None or fetched_at >= bar_close or now < bar_close:
+            return False
+    if fetched_at is None:
+        return True
+    return now - fetched_at >= timedelta(minutes=CACHE_REFRESH_RETRY_MINUTES)
+
+
+class CacheBackend(ABC):
+    """Storage format of DataFetcher's per-symbol OHLCV cache files."""
+    
+    # File extension of the cache files (e.g. ".csv")
+    suffix: str = ""
+    
+    @abstractmethod
+    def read(self, path: Path) -> pd.DataFrame:
+        """Load a cached frame (timestamp index, OHLCV columns)."""
+        pass
+    
+    @abstractmethod
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        """Store a frame, replacing the file atomically."""
+        pass
+    
+    @staticmethod
+    def _replace(path: Path, write) -> None:
+        """Write to a temporary sibling and rename it over `path`."""
+        # Unique per writer: concurrent fetches of one symbol must not share it
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+
+class CsvCacheBackend(CacheBackend):
+    """Plain CSV files (parsed on every read)."""
+    
+    suffix = ".csv"
+    
+    def read(self, path: Path) -> pd.DataFrame:
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+    
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        self._replace(path, df.to_csv)
+
+
+class FeatherCacheBackend(CacheBackend):
+    """
+    Uncompressed Arrow IPC (Feather v2) files with typed columns.
+    
+    The index is stored as a datetime64 column, prices keep their binary
+    value. Reads memory-map the file and wrap the Arrow buffers as numpy
+    arrays without copying, so a frame loads in well under a millisecond;
+    such frames are read-only (call .copy() before writing values in place).
+    
+    Args:
+        float_dtype: Store float columns as this dtype (e.g. np.float32 to
+            halve the size); None keeps them as they are
+        zero_copy: Return frames backed by the mapped file (read-only);
+            False returns ordinary writable frames
+    """
+    
+    suffix = ".feather"
+    
+    def __init__(self, float_dtype=None, zero_copy: bool = True):
+        self.float_dtype = float_dtype
+        self.zero_copy = zero_copy
+    
+    def read(self, path: Path) -> pd.DataFrame:
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        names = table.column_names
+        index = pd.DatetimeIndex(table.column(0).to_numpy(), name=names[0])
+        return pd.DataFrame({name: table.column(name).to_numpy() for name in names[1:]},
+                            index=index, copy=not self.zero_copy)
+    
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        df = df.copy()
+        if self.float_dtype is not None:
+            floats = df.select_dtypes('floating').columns
+            df[floats] = df[floats].astype(self.float_dtype)
+        df.index = pd.DatetimeIndex(df.index, name=df.index.name or "timestamp")
+        table = pa.Table.from_pandas(df.reset_index(), preserve_index=False).replace_schema_metadata(None)
+        self._replace(path, lambda tmp_path: feather.write_feather(table, str(tmp_path),
+                                                                   compression='uncompressed'))
+
+
+CACHE_BACKENDS = {
+    "csv": CsvCacheBackend,
+    "feather": FeatherCacheBackend,
+}
+
+
+class CacheManifest:
+    """
+    JSON index of the cache files in a directory (CACHE_MANIFEST_FILENAME).
+    
+    Holds per file the symbol, provider, last fetch time, first/last bar,
+    row count, schema version, a SHA-256 of the file, the earliest start
+    ever requested from the provider and whether the history reaches back to
+    it (complete), so freshness checks, staleness reports, eviction and the
+    decision to request older bars need no file parsing. An entry is only
+    trusted while the file's size and mtime match the recorded ones; files
+    written behind DataFetcher's back thus fall back to their mtime until
+    they are recorded again.
+    
+    The index is re-read when another writer replaced it and saved
+    atomically after every change.
+    
+    Args:
+        cache_dir: Directory of the cache files and the manifest
+    
+    Example:
+        >>> manifest = DataFetcher().manifest
+        >>> manifest.report()[['symbol', 'last_bar', 'is_stale']]
+    """
+    
+    # Serializes load-modify-save cycles of all manifests in the process
+    _lock = threading.RLock()
+    
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.path = self.cache_dir / CACHE_MANIFEST_FILENAME
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded_mtime: Optional[int] = None
+    
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Entry of a cache file, or None if unknown or out of date."""
+        path = Path(path)
+        with self._lock:
+            entry = self._load().get(path.name)
+        if entry is None or entry.get("schema_version") != CACHE_SCHEMA_VERSION:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry
+    
+    def record(self, path: Path, symbol: str, df: pd.DataFrame, provider: Optional[str] = None,
+               fetched_at: Optional[datetime] = None, requested_start=None) -> Dict[str, Any]:
+        """
+        Store the entry of a cache file that was just written.
+        
+        The requested start is kept across records (the earliest one wins),
+        so a top-up of the latest bars does not forget how far back the
+        provider was asked. The entry is complete when the first bar lies
+        within CACHE_START_TOLERANCE_DAYS of that start; an incomplete
+        history starts where the provider's data starts (recent listing,
+        truncated source) and asking for older bars again is pointless.
+        
+        Args:
+            path: Cache file
+            symbol: Ticker symbol of the file
+            df: Frame stored in the file
+            provider: Name of the data provider (None = unknown)
+            fetched_at: Time of the fetch (default: now)
+            requested_start: Start of the range requested from the provider
+                (None = not a full-history request)
+        
+        Returns:
+            The new entry
+        """
+        path = Path(path)
+        fetched_at = fetched_at if fetched_at is not None else datetime.now(timezone.utc)
+        stat = path.stat()
+        first_bar = pd.Timestamp(df.index[0]) if len(df) else None
+        with self._lock:
+            previous = self._load().get(path.name) or {}
+        starts = [pd.Timestamp(start) for start in (requested_start, previous.get("requested_start"))
+                  if start is not None]
+        requested_start = min(starts) if starts else None
+        if requested_start is None or first_bar is None:
+            complete = None   # Unknown
+        else:
+            complete = bool(first_bar <= requested_start + pd.Timedelta(days=CACHE_START_TOLERANCE_DAYS))
+        entry = {
+            "symbol": symbol,
+            "provider": provider,
+            "last_fetch_time": fetched_at.astimezone(timezone.utc).isoformat(),
+            "first_bar": first_bar.isoformat() if first_bar is not None else None,
+            "last_bar": pd.Timestamp(df.index[-1]).isoformat() if len(df) else None,
+            "rows": int(len(df)),
+            "schema_version": CACHE_SCHEMA_VERSION,
+            "content_hash": self.file_hash(path),
+            "requested_start": requested_start.isoformat() if requested_start is not None else None,
+            "complete": complete,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
         }
+        with self._lock:
+            self._load()[path.name] = entry
+            self._save()
+        return entry
+    
+    def remove(self, path: Path) -> bool:
+        """Drop the entry of a cache file; True if there was one."""
+        with self._lock:
+            removed = self._load().pop(Path(path).name, None) is not None
+            if removed:
+                self._save()
+        return removed
+    
+    def last_fetch_time(self, path: Path) -> Optional[datetime]:
+        """Recorded fetch time of a cache file (UTC), or None."""
+        entry = self.get(path)
+        return datetime.fromisoformat(entry["last_fetch_time"]) if entry else None
+    
+    def verify(self, path: Path) -> bool:
+        """Whether a cache file still has its recorded content hash."""
+        entry = self.get(path)
+        return entry is not None and entry["content_hash"] == self.file_hash(path)
+    
+    def report(self, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Freshness of every recorded cache file, from the index alone.
         
-        all_klines = []
-        current_start = start_time
+        Args:
+            now: Reference time (default: current UTC time; naive = UTC)
         
-        while current_start < end_time:
-            params["startTime"] = current_start
-            try:
-                response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-                response.raise_for_status()
-                klines = response.json()
-            except Exception as e:
-                print(f"Binance Error: {e}")
-                break
-
-            if not klines:
-                break
-            all_klines.extend(klines)
-            current_start = klines[-1][0] + 1
-            if len(klines) < 1000:
-                break
-                
-        # Parse
-        df = pd.DataFrame(all_klines, columns=[
-            "timestamp", "open", "high", "low", "close", "volume",
-            "close_time", "quote_volume", "trades", "taker_buy_base", "taker_buy_quote", "ignore"
-        ])
-        if df.empty:
-            return pd.DataFrame()
-            
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        for col in ["open", "high", "low", "close", "volume"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        df.set_index("timestamp", inplace=True)
-        return df[["open", "high", "low", "close", "volume"]]
-
-class YFinanceProvider(DataProvider):
-    """Data provider for Yahoo Finance (stocks, ETFs, indices)."""
+        Returns:
+            DataFrame indexed by file name with columns symbol, asset_class,
+            provider, first_bar, last_bar, rows, last_fetch_time, age_hours,
+            complete (None = unknown) and is_stale (see cache_is_stale())
+        """
+        now = now if now is not None else datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        with self._lock:
+            entries = {name: entry for name, entry in self._load().items()
+                       if entry.get("schema_version") == CACHE_SCHEMA_VERSION}
+        
+        rows = []
+        for name, entry in entries.items():
+            fetched_at = datetime.fromisoformat(entry["last_fetch_time"])
+            rows.append({
+                "file": name,
+                "symbol": entry["symbol"],
+                "asset_class": asset_class(entry["symbol"]),
+                "provider": entry["provider"],
+                "first_bar": pd.Timestamp(entry["first_bar"]) if entry["first_bar"] else pd.NaT,
+                "last_bar": pd.Timestamp(entry["last_bar"]) if entry["last_bar"] else pd.NaT,
+                "rows": entry["rows"],
+                "last_fetch_time": fetched_at,
+                "age_hours": (now - fetched_at).total_seconds() / 3600,
+                "complete": entry["complete"],
+                "is_stale": entry["last_bar"] is None or cache_is_stale(entry["symbol"], entry["last_bar"],
+                                                                        fetched_at, now),
+            })
+        columns = ["symbol", "asset_class", "provider", "first_bar", "last_bar", "rows",
+                   "last_fetch_time", "age_hours", "complete", "is_stale"]
+        return pd.DataFrame(rows, columns=["file"] + columns).set_index("file").sort_index()
     
-    def fetch_info(self, symbol: str) -> Dict[str, Any]:
+    def evict(self, max_age_days: float, now: Optional[datetime] = None) -> List[str]:
+        """
+        Delete the cache files not fetched within `max_age_days`.
+        
+        Args:
+            max_age_days: Maximum age of the last fetch
+            now: Reference time (default: current UTC time; naive = UTC)
+        
+        Returns:
+            Symbols whose files were removed
+        """
+        report = self.report(now)
+        expired = report[report["age_hours"] > max_age_days * 24]
+        with self._lock:
+            entries = self._load()
+            for name in expired.index:
+                (self.cache_dir / name).unlink(missing_ok=True)
+                entries.pop(name, None)
+            if len(expired):
+                self._save()
+        return list(expired["symbol"])
+    
+    @staticmethod
+    def file_hash(path: Path) -> str:
+        """SHA-256 hex digest of a file's bytes."""
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Entries, re-read if the file changed since the last load (call under _lock)."""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            description = info.get("longBusinessSummary", "")
-            if len(description) > 300:
-                description = description[:297] + "..."
-            return {
-                "name": info.get("longName", symbol),
-                "sector": info.get("sector", "Unknown"),
-                "description": description,
-            }
-        except Exception:
-            return {"name": symbol, "description": ""}
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._loaded_mtime:
+            try:
+                self._entries = json.loads(self.path.read_text())["entries"] if mtime is not None else {}
+            except (ValueError, KeyError):
+                self._entries = {}   # Unreadable manifest: rebuilt as files are recorded
+            self._loaded_mtime = mtime
+        return self._entries
+    
+    def _save(self) -> None:
+        """Write the entries atomically (call under _lock)."""
+        payload = json.dumps({"schema_version": CACHE_SCHEMA_VERSION, "entries": self._entries},
+                             indent=1, sort_keys=True)
+        CacheBackend._replace(self.path, lambda tmp_path: tmp_path.write_text(payload))
+        self._loaded_mtime = self.path.stat().st_mtime_ns
 
-    def fetch_data(self, symbol: str, interval: str, lookback_days: int) -> pd.DataFrame:
-        start_date = datetime.now() - timedelta(days=lookback_days)
-        try:
-            df = yf.download(symbol, start=start_date, progress=False, auto_adjust=True)
-            if df.empty:
-                return pd.DataFrame()
-            
-            if isinstance(df.columns, pd.MultiIndex):
-                try:
-                    df.columns = df.columns.get_level_values(0)
-                except Exception:
-                    pass
-                
-            df.columns = [str(c).lower() for c in df.columns]
-            df.index = pd.to_datetime(df.index)
-            df.index.name = "timestamp"
-            
-            required = ["open", "high", "low", "close", "volume"]
-            available = [c for c in required if c in df.columns]
-            return df[available]
-        except Exception as e:
-            print(f"YFinance Error: {e}")
-            return pd.DataFrame()
 
 class DataFetcher:
     """
     Unified data fetcher that routes requests to appropriate provider.
     
     Automatically selects Binance for USDT/BUSD pairs, Yahoo Finance for
-    stocks/indices. Supports optional CSV caching for performance.
+    stocks/indices. Supports optional disk caching for performance; a
+    cached history that misses the latest completed session is topped up
+    with the new bars only. Every cache write is recorded in the
+    CacheManifest of the cache directory (see `manifest`).
     
     Args:
         cache_enabled: If True, cache fetched data to disk (default: True)
+        cache_backend: Storage format of the cache files (default: CACHE_BACKEND)
+        auto_refresh: If True, top up stale caches on read (default: True)
     """
     
-    def __init__(self, cache_enabled: bool = True):
+    def __init__(self, cache_enabled: bool = True, cache_backend: Optional[CacheBackend] = None,
+                 auto_refresh: bool = True):
         self.cache_enabled = cache_enabled
+        self.auto_refresh = auto_refresh
         self.cache_dir = Path(CACHE_DIR)
         if self.cache_enabled:
             self.cache_dir.mkdir(exist_ok=True)
+        self.cache_backend = cache_backend if cache_backend is not None else CACHE_BACKENDS[CACHE_BACKEND]()
         self.binance = BinanceProvider()
         self.yfinance = YFinanceProvider()
+        self._manifest: Optional[CacheManifest] = None
+
+    @property
+    def manifest(self) -> CacheManifest:
+        """Manifest of the current cache_dir."""
+        if self._manifest is None or self._manifest.cache_dir != Path(self.cache_dir):
+            self._manifest = CacheManifest(self.cache_dir)
+        return self._manifest
 
     def fetch_data(self, symbol: str) -> pd.DataFrame:
         """
         Fetch OHLCV data for a symbol, using cache if available.
         
+        A stale cache (see is_stale()) is refreshed incrementally: only the
+        bars since the last cached one (plus CACHE_OVERLAP_DAYS) are
+        requested, reconciled with the cache and stored.
+        
         Args:
             symbol: Ticker symbol (e.g., 'AAPL', 'BTC-USD', 'BTCUSDT')
             
@@ -693,35 +2870,435 @@ class DataFetcher:
             indexed by timestamp.
         """
         # Check cache
-        cache_path = self._get_cache_path(symbol)
-        if self.cache_enabled and cache_path.exists():
-            try:
-                return pd.read_csv(cache_path, index_col=0, parse_dates=True)
-            except Exception:
-                pass
+        if self.cache_enabled:
+            cached = self._read_cache(symbol)
+            if cached is not None:
+                if self.auto_refresh and self.is_stale(symbol, cached):
+                    return self._refresh(symbol, cached)
+                return cached
 
         # Fetch
-        if symbol.endswith("USDT") or symbol.endswith("BUSD"):
-            df = self.binance.fetch_data(symbol, DEFAULT_INTERVAL, DEFAULT_LOOKBACK_DAYS)
-        else:
-            df = self.yfinance.fetch_data(symbol, DEFAULT_INTERVAL, DEFAULT_LOOKBACK_DAYS)
+        provider = self._provider(symbol)
+        df = provider.fetch_data(symbol, DEFAULT_INTERVAL, DEFAULT_LOOKBACK_DAYS)
 
         # Save cache
         if self.cache_enabled and not df.empty:
-            df.to_csv(cache_path)
+            self._store(symbol, df, provider,
+                        requested_start=pd.Timestamp(datetime.now() - timedelta(days=DEFAULT_LOOKBACK_DAYS)))
+        
+        # Fresh history: drop memoized states of this symbol
+        MARKET_STATE_CACHE.invalidate(symbol)
         
         return df
 
+    def fetch_history(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Fetch OHLCV data for a date range through the cache.
+        
+        Serves the slice from the cached frame. Only when `start` is older
+        than the first cached bar (by more than CACHE_START_TOLERANCE_DAYS)
+        is the provider asked for the longer history, and the cache is
+        replaced by the extended frame. A history that starts later than
+        requested (recent listing) keeps `start` as its requested start in
+        the manifest, so later calls do not ask the provider again.
+        
+        Args:
+            symbol: Ticker symbol (e.g., 'AAPL', 'BTC-USD', 'BTCUSDT')
+            start: First date to include (None = all cached history)
+            end: Last date to include (None = up to the latest bar)
+            
+        Returns:
+            DataFrame with columns [open, high, low, close, volume] for the
+            range (empty if nothing could be fetched).
+        """
+        df = self.fetch_data(symbol)
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        
+        tolerance = pd.Timedelta(days=CACHE_START_TOLERANCE_DAYS)
+        if start is not None and (df.empty or start < df.index[0] - tolerance) \
+                and not self._requested_since(symbol, start):
+            provider = self._provider(symbol)
+            extended = provider.fetch_data(symbol, DEFAULT_INTERVAL, self._lookback_days(start))
+            if not extended.empty and (df.empty or extended.index[0] < df.index[0]):
+                # Keep cached bars newer than the fetched range (should not happen)
+                df = pd.concat([extended, df[df.index > extended.index[-1]]]) if not df.empty else extended
+                if self.cache_enabled:
+                    self._store(symbol, df, provider, requested_start=start)
+                MARKET_STATE_CACHE.invalidate(symbol)
+            elif not extended.empty and self.cache_enabled:
+                # No older bars at the provider: remember the request, keep the file
+                self.manifest.record(self._get_cache_path(symbol), symbol, df, type(provider).__name__,
+                                     self._last_fetch_time(symbol), requested_start=start)
+        
+        if df.empty:
+            return df
+        return df.loc[start:end]
+
     def fetch_info(self, symbol: str) -> Dict[str, Any]:
+        return self._provider(symbol).fetch_info(symbol)
+
+    def fetch_many(self, symbols: List[str], with_info: bool = False,
+                   max_workers: int = FETCH_MAX_WORKERS, on_result=None) -> List[FetchResult]:
+        """
+        Fetch several symbols concurrently.
+        
+        Fresh cache hits are resolved on the calling thread without taking a
+        worker (unless their info needs a request); the remaining symbols go
+        to a pool of at most `max_workers` threads, and every request waits
+        for a slot of its provider (see provider_slots()). Errors are caught
+        per symbol.
+        
+        Args:
+            symbols: Ticker symbols (duplicates are fetched once)
+            with_info: Also fetch the asset metadata (fetch_info())
+            max_workers: Upper bound of worker threads
+            on_result: Called as on_result(result, done, total) on the
+                calling thread as each symbol finishes (e.g. a progress bar)
+        
+        Returns:
+            One FetchResult per symbol, in the order of `symbols`
+        
+        Example:
+            >>> results = DataFetcher().fetch_many(["SPY", "BTCUSDT", "GLD"], with_info=True)
+            >>> frames = {r.symbol: r.data for r in results if r.ok}
+        """
+        unique = list(dict.fromkeys(symbols))
+        by_symbol: Dict[str, FetchResult] = {}
+        
+        def finish(result: FetchResult) -> None:
+            by_symbol[result.symbol] = result
+            if on_result is not None:
+                on_result(result, len(by_symbol), len(unique))
+        
+        pending = []
+        for symbol in unique:
+            cached = self._fresh_cache(symbol)
+            if cached is not None and not (with_info and not self._provider(symbol).static_info):
+                finish(FetchResult(symbol, cached, self.fetch_info(symbol) if with_info else None, cached=True))
+            else:
+                pending.append((symbol, cached))
+        
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+                futures = [pool.submit(self._fetch_one, symbol, with_info, cached) for symbol, cached in pending]
+                for future in as_completed(futures):
+                    finish(future.result())
+        return [by_symbol[symbol] for symbol in symbols]
+
+    def _fresh_cache(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Cached frame of a symbol if fetch_data() would return it as is, else None."""
+        if not self.cache_enabled:
+            return None
+        cached = self._read_cache(symbol)
+        if cached is None or (self.auto_refresh and self.is_stale(symbol, cached)):
+            return None
+        return cached
+
+    def _fetch_one(self, symbol: str, with_info: bool, cached: Optional[pd.DataFrame] = None) -> FetchResult:
+        """Worker of fetch_many(): one symbol, holding a provider slot per request."""
+        slots = provider_slots(self._provider(symbol))
+        try:
+            if cached is None:
+                with slots:
+                    cached = self.fetch_data(symbol)
+            info = None
+            if with_info:
+                with slots:
+                    info = self.fetch_info(symbol)
+            return FetchResult(symbol, cached, info)
+        except Exception as e:
+            return FetchResult(symbol, cached if cached is not None else pd.DataFrame(), error=e)
+
+    def is_stale(self, symbol: str, df: Optional[pd.DataFrame] = None, now: Optional[datetime] = None) -> bool:
+        """
+        Whether a cached history should be topped up (see cache_is_stale()).
+        
+        Args:
+            symbol: Ticker symbol
+            df: The cached frame; None looks up the last bar in the manifest
+                (the file is only parsed if it has no valid entry)
+            now: Reference time (default: current UTC time; naive = UTC)
+        
+        Returns:
+            True if the history misses a completed session, or if nothing
+            is cached when df is None.
+        """
+        if df is None:
+            entry = self.manifest.get(self._get_cache_path(symbol))
+            if entry is not None and entry["last_bar"] is not None:
+                return cache_is_stale(symbol, entry["last_bar"], self._last_fetch_time(symbol), now)
+            df = self._read_cache(symbol)
+            if df is None:
+                return True
+        if df.empty:
+            return False
+        return cache_is_stale(symbol, df.index[-1], self._last_fetch_time(symbol), now)
+
+    def _last_fetch_time(self, symbol: str) -> Optional[datetime]:
+        """When the cache of a symbol was last fetched (UTC), or None."""
+        cache_path = self._get_cache_path(symbol)
+        fetched_at = self.manifest.last_fetch_time(cache_path)
+        if fetched_at is not None:
+            return fetched_at
+        # Not recorded: the file's write time
+        if not cache_path.exists():
+            return None
+        return datetime.fromtimestamp(cache_path.stat().st_mtime, timezone.utc)
+
+    def _requested_since(self, symbol: str, start: pd.Timestamp) -> bool:
+        """Whether the cached history was already requested from `start` or earlier."""
+        if not self.cache_enabled:
+            return False
+        entry = self.manifest.get(self._get_cache_path(symbol))
+        return bool(entry and entry["requested_start"] and pd.Timestamp(entry["requested_start"]) <= start)
+
+    def _store(self, symbol: str, df: pd.DataFrame, provider: Optional[DataProvider] = None,
+               fetched_at: Optional[datetime] = None, requested_start=None) -> None:
+        """Write the cache file of a symbol and record it in the manifest."""
+        cache_path = self._get_cache_path(symbol)
+        self.cache_backend.write(df, cache_path)
+        self.manifest.record(cache_path, symbol, df, type(provider).__name__ if provider else None, fetched_at,
+                             requested_start)
+
+    def _refresh(self, symbol: str, cached: pd.DataFrame) -> pd.DataFrame:
+        """Request the bars since the last cached one and merge them into the cache."""
+        since_last = (datetime.now() - pd.Timestamp(cached.index[-1]).to_pydatetime().replace(tzinfo=None)).days
+        provider = self._provider(symbol)
+        try:
+            fresh = provider.fetch_data(symbol, DEFAULT_INTERVAL, max(since_last, 0) + CACHE_OVERLAP_DAYS)
+        except Exception:
+            fresh = pd.DataFrame()   # Offline: keep serving the cached history
+        
+        ratio = restatement_ratio(cached, fresh)
+        if abs(ratio - 1.0) > CACHE_RESTATEMENT_TOLERANCE:
+            # Re-adjusted history (split, dividend): reload the cached span, or
+            # bring the cached prices to the new scale if that fails
+            try:
+                full = provider.fetch_data(symbol, DEFAULT_INTERVAL, self._lookback_days(cached.index[0]))
+            except Exception:
+                full = pd.DataFrame()
+            if not full.empty and abs(restatement_ratio(full, fresh) - 1.0) <= CACHE_RESTATEMENT_TOLERANCE:
+                cached = full
+            else:
+                cached = rescale_bars(cached, ratio)
+        df = reconcile_bars(cached, fresh)
+        
+        # Store even an unchanged frame: it marks the refresh attempt
+        self._store(symbol, df, provider)
+        if not fresh.empty:
+            MARKET_STATE_CACHE.invalidate(symbol)
+        return df
+
+    @staticmethod
+    def _lookback_days(start) -> int:
+        """Days to request so that the history reaches back to `start`."""
+        return (datetime.now() - pd.Timestamp(start).to_pydatetime().replace(tzinfo=None)).days + 1
+
+    def _provider(self, symbol: str) -> DataProvider:
+        """Binance for USDT/BUSD pairs, Yahoo Finance for everything else."""
         if symbol.endswith("USDT") or symbol.endswith("BUSD"):
-            return self.binance.fetch_info(symbol)
-        return self.yfinance.fetch_info(symbol)
+            return self.binance
+        return self.yfinance
+
+    def _read_cache(self, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        Cached frame of a symbol, or None.
+        
+        A CSV left by the former cache format is converted to the current
+        backend on first read; files without a valid manifest entry are
+        recorded with their write time as fetch time.
+        """
+        cache_path = self._get_cache_path(symbol)
+        df = None
+        try:
+            if cache_path.exists():
+                df = self.cache_backend.read(cache_path)
+            else:
+                legacy_path = self._get_cache_path(symbol, CsvCacheBackend.suffix)
+                if legacy_path != cache_path and legacy_path.exists():
+                    self.cache_backend.write(CsvCacheBackend().read(legacy_path), cache_path)
+                    # Keep the CSV's write time: it is the time of the last fetch
+                    shutil.copystat(legacy_path, cache_path)
+                    df = self.cache_backend.read(cache_path)
+        except Exception:
+            return None
+        
+        if df is not None and self.manifest.get(cache_path) is None:
+            try:
+                self.manifest.record(cache_path, symbol, df, fetched_at=self._last_fetch_time(symbol))
+            except OSError:
+                pass   # Read-only cache directory: serve the file unrecorded
+        return df
 
-    def _get_cache_path(self, symbol: str) -> Path:
+    def _get_cache_path(self, symbol: str, suffix: Optional[str] = None) -> Path:
         """Generate filesystem-safe cache file path for a given symbol."""
         safe_symbol = symbol.replace("^", "").replace(".", "_")
-        return self.cache_dir / CACHE_FILENAME_TEMPLATE.format(symbol=safe_symbol, interval=DEFAULT_INTERVAL)
+        return self.cache_dir / CACHE_FILENAME_TEMPLATE.format(
+            symbol=safe_symbol, interval=DEFAULT_INTERVAL,
+            suffix=self.cache_backend.suffix if suffix is None else suffix
+        )
+
+
+def migrate_csv_cache(cache_dir: str = CACHE_DIR, backend: Optional[CacheBackend] = None,
+                      remove_csv: bool = False) -> List[Path]:
+    """
+    Convert every cached CSV in cache_dir to the given backend (one-shot).
+    
+    Files that already have a counterpart in the target format are skipped,
+    so the migration can be re-run safely. Converted files are recorded in
+    the directory's CacheManifest (symbol = file name stem).
+    
+    Args:
+        cache_dir: Cache directory (default: CACHE_DIR)
+        backend: Target backend (default: CACHE_BACKEND)
+        remove_csv: Delete each CSV after its conversion
+    
+    Returns:
+        Paths of the files written
+    
+    Example:
+        >>> migrate_csv_cache()   # data/*_cached.csv -> data/*_cached.feather
+    """
+    backend = backend if backend is not None else CACHE_BACKENDS[CACHE_BACKEND]()
+    csv_suffix = CsvCacheBackend.suffix
+    pattern = CACHE_FILENAME_TEMPLATE.format(symbol="*", interval=DEFAULT_INTERVAL, suffix=csv_suffix)
+    manifest = CacheManifest(cache_dir)
+    symbol_suffix = pattern[1:]
+    written = []
+    for csv_path in sorted(Path(cache_dir).glob(pattern)):
+        target = csv_path.with_name(csv_path.name[:-len(csv_suffix)] + backend.suffix)
+        if target == csv_path or target.exists():
+            continue
+        df = CsvCacheBackend().read(csv_path)
+        backend.write(df, target)
+        shutil.copystat(csv_path, target)
+        manifest.record(target, csv_path.name[:-len(symbol_suffix)], df,
+                        fetched_at=datetime.fromtimestamp(csv_path.stat().st_mtime, timezone.utc))
+        written.append(target)
+        if remove_csv:
+            csv_path.unlink()
+    return written
+
+
+# =============================================================================
+# HISTORICAL SIGNAL PRIMITIVES
+# =============================================================================
+
+SIGNAL_TIERS = ('STABLE', 'ACTIVE', 'HIGH_ENERGY', 'CRITICAL', 'DORMANT')
+
+# Return horizons (bars) reported per signal in the historical analysis
+PRIOR_HORIZONS = (5, 10, 20, 30)
+SHORT_TERM_HORIZONS = (1, 3, 5, 10)
+LONG_TERM_HORIZONS = (30, 60, 90, 120, 180, 252)
+
+
+def classify_signal_tiers(close: np.ndarray, sma: np.ndarray, volatility: np.ndarray,
+                          vol_low: float, vol_medium: float, vol_high: float,
+                          vol_extreme: float) -> np.ndarray:
+    """
+    Classify every bar into the 5-tier traffic light signal.
+
+    Volatility zones are bounded by the four thresholds (upper bound
+    inclusive); trend is close vs SMA. Conditions are evaluated in order and
+    the first match wins:
+
+        extreme volatility                  -> CRITICAL
+        uptrend + low/normal / medium / high -> STABLE / ACTIVE / HIGH_ENERGY
+        downtrend + high / otherwise         -> CRITICAL / DORMANT
+        near SMA + medium or high            -> ACTIVE, otherwise STABLE
+
+    Args:
+        close: Close prices
+        sma: Trend SMA aligned with close
+        volatility: Rolling volatility aligned with close
+        vol_low, vol_medium, vol_high, vol_extreme: Zone thresholds
+
+    Returns:
+        Object array of signal names (one of SIGNAL_TIERS)
+    """
+    close = np.asarray(close, dtype=float)
+    sma = np.asarray(sma, dtype=float)
+    volatility = np.asarray(volatility, dtype=float)
+
+    is_uptrend = close > sma
+    is_downtrend = close < sma
+    is_neutral = ~is_uptrend & ~is_downtrend
+    is_low_or_normal = (volatility <= vol_low) | ((volatility > vol_low) & (volatility <= vol_medium))
+    is_medium = (volatility > vol_medium) & (volatility <= vol_high)
+    is_high = (volatility > vol_high) & (volatility <= vol_extreme)
+    is_extreme = volatility > vol_extreme
+
+    return np.select(
+        [
+            is_extreme,
+            is_uptrend & is_low_or_normal,
+            is_uptrend & is_medium,
+            is_uptrend & is_high,
+            is_uptrend,
+            is_downtrend & is_high,
+            is_downtrend,
+            is_neutral & (is_high | is_medium),
+        ],
+        ['CRITICAL', 'STABLE', 'ACTIVE', 'HIGH_ENERGY', 'DORMANT', 'CRITICAL', 'DORMANT', 'ACTIVE'],
+        default='STABLE',
+    ).astype(object)
+
 
+def forward_max_drawdown(close: np.ndarray, horizon: int = 10) -> np.ndarray:
+    """
+    Worst drop (in %) from each bar to the lowest close of the next `horizon` bars.
+
+    Uses a sliding-window minimum over windows of horizon + 1 bars starting
+    at each bar (the bar itself included, so the value is never positive).
+    The last `horizon` bars have no complete window and are NaN.
+
+    Args:
+        close: Close prices
+        horizon: Number of forward bars
+
+    Returns:
+        Float array aligned with close
+    """
+    close = np.asarray(close, dtype=float)
+    drawdown = np.full(len(close), np.nan)
+    if len(close) > horizon:
+        future_min = sliding_window_view(close, horizon + 1).min(axis=1)
+        start_price = close[:len(future_min)]
+        drawdown[:len(future_min)] = ((future_min - start_price) / start_price) * 100
+    return drawdown
+
+
+
+def signal_phase_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run-length encode the 'signal' column into one row per phase.
+
+    A phase is a run of consecutive bars with the same signal. Every other
+    numeric column of `df` is taken from the phase's first bar (the signal
+    start), except 'close', which yields the start and end prices.
+
+    Args:
+        df: Frame with 'signal' and 'close' columns (plus any per-bar columns)
+
+    Returns:
+        DataFrame indexed by phase start date with columns signal, duration,
+        price_start, price_end, price_change_pct and the start-bar values
+    """
+    signal = df['signal'].to_numpy()
+    is_start = np.ones(len(signal), dtype=bool)
+    is_start[1:] = signal[1:] != signal[:-1]
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], len(signal)) - 1
+
+    close = df['close'].to_numpy()
+    phases = df.iloc[starts].drop(columns=['signal', 'close'])
+    phases.insert(0, 'signal', signal[starts])
+    phases.insert(1, 'duration', ends - starts + 1)
+    phases.insert(2, 'price_start', close[starts])
+    phases.insert(3, 'price_end', close[ends])
+    phases.insert(4, 'price_change_pct', (close[ends] - close[starts]) / close[starts] * 100)
+    return phases
 
 # --- ANALYZER ---
 
@@ -732,14 +3309,24 @@ class SOCAnalyzer:
     """
 
     def __init__(self, df: pd.DataFrame, symbol: str, asset_info: Optional[Dict[str, Any]] = None,
-                 sma_window: int = SMA_PERIOD, vol_window: int = ROLLING_VOLATILITY_WINDOW, hysteresis: float = 0.0):
+                 sma_window: int = SMA_PERIOD, vol_window: int = ROLLING_VOLATILITY_WINDOW, hysteresis: float = 0.0,
+                 metrics: Optional[MetricsBundle] = None):
         self.df = df
         self.symbol = symbol
         self.asset_info = asset_info or {}
         self.hysteresis = hysteresis
-        self.calculator = SOCMetricsCalculator(df, sma_window, vol_window)
-        self.metrics_df = self.calculator.calculate_all_metrics()
-        self.summary_stats = self.calculator.get_summary_stats()
+        self.metrics = metrics if metrics is not None else MetricsBundle(df, symbol)
+        self.calculator = SOCMetricsCalculator(df, sma_window, vol_window, metrics=self.metrics)
+
+    @property
+    def metrics_df(self) -> pd.DataFrame:
+        """All SOC metrics, NaN rows dropped (computed on first access)."""
+        return self.calculator.calculate_all_metrics()
+
+    @property
+    def summary_stats(self) -> Dict[str, Any]:
+        """Summary statistics of the metrics (computed on first access)."""
+        return self.calculator.get_summary_stats()
 
     def get_market_phase(self) -> Dict[str, Any]:
         """
@@ -747,48 +3334,30 @@ class SOCAnalyzer:
         
         Returns legacy format dictionary for backward compatibility.
         """
-        if self.metrics_df.empty:
+        # Only the columns that decide which rows have complete metrics are needed
+        valid = self.calculator.valid_rows()
+        if not valid.any():
             return {"signal": "NO_DATA", "color": "grey", "criticality_score": 0}
 
         try:
             # Use new single source of truth
-            state = compute_market_state(
+            state = cached_market_state(
                 df=self.df,
                 idx=len(self.df) - 1,  # Last row (current)
+                symbol=self.symbol,
                 sma_window=self.calculator.sma_window,
                 vol_window=self.calculator.vol_window,
-                hysteresis=self.hysteresis
+                hysteresis=self.hysteresis,
+                metrics=self.metrics
             )
             
-            # Get current price and SMA for additional fields
-            current_price = self.summary_stats["current_price"]
-            sma_200 = self.summary_stats["current_sma_200"]
-            
-            # Calculate 24h price change
-            price_change_1d = 0.0
-            if len(self.metrics_df) >= 2:
-                prev_price = self.metrics_df["close"].iloc[-2]
-                if prev_price > 0:
-                    price_change_1d = ((current_price - prev_price) / prev_price) * 100
-            
-            # Distance from SMA
-            sma_distance_pct = ((current_price - sma_200) / sma_200) * 100 if sma_200 > 0 else 0
-            is_parabolic = sma_distance_pct > 30
-            
-            # Convert to legacy format
-            legacy_dict = market_state_to_legacy_dict(state, self.symbol, current_price)
-            
-            # Add extra fields for backward compatibility
-            legacy_dict.update({
-                "price_change_1d": price_change_1d,
-                "sma_200": sma_200,
-                "dist_to_sma": sma_distance_pct / 100,
-                "dist_to_sma_pct": sma_distance_pct,
-                "is_parabolic": is_parabolic,
-                "stress": "HIGH" if state.criticality >= 70 else ("MEDIUM" if state.criticality >= 40 else "LOW")
-            })
+            # Get current price and SMA for additional fields (last complete rows)
+            closes = self.df["close"].to_numpy()[valid]
+            current_price = closes[-1]
+            sma_200 = self.calculator["sma_200"].to_numpy()[valid][-1]
+            prev_price = closes[-2] if len(closes) >= 2 else None
             
-            return legacy_dict
+            return market_phase_dict(state, self.symbol, current_price, prev_price, sma_200)
             
         except Exception as e:
             # Fallback on error
@@ -834,10 +3403,8 @@ class SOCAnalyzer:
         
         # Calculate criticality using rolling volatility percentile
         vol_window = min(504, len(df_plot) - 1)  # ~2 years lookback
-        df_plot['criticality_score'] = df_plot['volatility'].rolling(
-            window=vol_window, min_periods=30
-        ).apply(
-            lambda x: (x.iloc[-1] <= x).sum() / len(x) * 100 if len(x) > 1 else 50, raw=False
+        df_plot['criticality_score'] = rolling_percentile_rank(
+            df_plot['volatility'], vol_window, op=">=", include_current=True, min_periods=30
         )
         
         # Apply trend modifiers (same as get_current_market_state)
@@ -851,27 +3418,12 @@ class SOCAnalyzer:
         df_plot['criticality_score'] = df_plot['criticality_score'].fillna(50)
         
         # Calculate POINT-IN-TIME volatility percentile (NO LOOK-AHEAD BIAS)
-        # For each day, compare to trailing 252 days (1 year) only
-        def calc_rolling_vola_percentile(series, window=252):
-            """Calculate volatility percentile using rolling window (point-in-time)."""
-            result = []
-            for i in range(len(series)):
-                if i < 30:  # Need minimum data
-                    result.append(50.0)
-                else:
-                    # Look back at window (or all available data if less than window)
-                    lookback_start = max(0, i - window)
-                    historical_vols = series.iloc[lookback_start:i+1]
-                    current_vol = series.iloc[i]
-                    
-                    if len(historical_vols) > 1:
-                        percentile = (historical_vols < current_vol).mean() * 100
-                    else:
-                        percentile = 50.0
-                    result.append(percentile)
-            return result
-        
-        df_plot['vola_percentile'] = calc_rolling_vola_percentile(df_plot['volatility'])
+        # For each day, compare to trailing 252 days (1 year) plus the current day only
+        vola_percentile = rolling_percentile_rank(
+            df_plot['volatility'], 253, op="<", include_current=True, min_periods=1
+        )
+        vola_percentile[:30] = 50.0  # Need minimum data
+        df_plot['vola_percentile'] = vola_percentile
         
         def get_color_for_row(row):
             """Use centralized regime classifier for each bar."""
@@ -1051,204 +3603,63 @@ class SOCAnalyzer:
             if vol_low is None or vol_high is None:
                 return {"error": "Could not calculate volatility thresholds"}
             
-            # Determine trend and stress for each row
-            df['is_uptrend'] = df['close'] > df['sma_200']
-            df['is_downtrend'] = df['close'] < df['sma_200']
-            df['is_low_vol'] = df['volatility'] <= vol_low
-            df['is_normal_vol'] = (df['volatility'] > vol_low) & (df['volatility'] <= vol_medium)
-            df['is_medium_vol'] = (df['volatility'] > vol_medium) & (df['volatility'] <= vol_high)
-            df['is_high_vol'] = (df['volatility'] > vol_high) & (df['volatility'] <= vol_extreme)
-            df['is_extreme_vol'] = df['volatility'] > vol_extreme
-            
             # 5-Tier regime assignment (Compliance-safe naming)
-            def assign_signal(row):
-                """Classify regime based on volatility zone and trend direction."""
-                # Extreme volatility always = CRITICAL
-                if row['is_extreme_vol']:
-                    return 'CRITICAL'
-                
-                # Uptrend scenarios
-                if row['is_uptrend']:
-                    if row['is_low_vol'] or row['is_normal_vol']:
-                        return 'STABLE'
-                    elif row['is_medium_vol']:
-                        return 'ACTIVE'
-                    elif row['is_high_vol']:
-                        return 'HIGH_ENERGY'
-                
-                # Downtrend scenarios
-                elif row['is_downtrend']:
-                    if row['is_high_vol']:
-                        return 'CRITICAL'
-                    else:
-                        return 'DORMANT'
-                
-                # Neutral (near SMA)
-                else:
-                    if row['is_high_vol'] or row['is_medium_vol']:
-                        return 'ACTIVE'
-                    else:
-                        return 'STABLE'
-                
-                return 'DORMANT'
-            
-            df['signal'] = df.apply(assign_signal, axis=1)
-            
-            # Calculate PRIOR returns - what happened BEFORE the signal (looking backward)
-            df['prior_5d'] = df['close'].pct_change(5)
-            df['prior_10d'] = df['close'].pct_change(10)
-            df['prior_20d'] = df['close'].pct_change(20)
-            df['prior_30d'] = df['close'].pct_change(30)
-            
-            # Calculate forward returns - SHORT TERM (from signal start)
-            df['return_1d'] = df['close'].pct_change(1).shift(-1)
-            df['return_3d'] = df['close'].pct_change(3).shift(-3)
-            df['return_5d'] = df['close'].pct_change(5).shift(-5)
-            df['return_10d'] = df['close'].pct_change(10).shift(-10)
+            df['signal'] = classify_signal_tiers(
+                df['close'].to_numpy(), df['sma_200'].to_numpy(), df['volatility'].to_numpy(),
+                vol_low, vol_medium, vol_high, vol_extreme
+            )
             
-            # Calculate forward returns - LONG TERM
-            df['return_30d'] = df['close'].pct_change(30).shift(-30)
-            df['return_60d'] = df['close'].pct_change(60).shift(-60)
-            df['return_90d'] = df['close'].pct_change(90).shift(-90)
+            # PRIOR returns (what happened BEFORE the signal) and FORWARD returns
+            # (from signal start), read from the symbol's cached horizon matrix
+            returns = self.metrics.horizon_returns()
+            rows = np.flatnonzero(self.calculator.valid_rows())
+            for horizon in PRIOR_HORIZONS:
+                df[f'prior_{horizon}d'] = returns.trailing(horizon)[rows]
+            for horizon in SHORT_TERM_HORIZONS + LONG_TERM_HORIZONS:
+                df[f'return_{horizon}d'] = returns.forward(horizon)[rows]
             
             # Calculate MAX DRAWDOWN over next 10 days (worst-case drop)
-            def calc_max_drawdown_10d(idx):
-                """Calculate max drawdown in 10 days following this index."""
-                loc = df.index.get_loc(idx)
-                if loc + 10 >= len(df):
-                    return np.nan
-                future_prices = df['close'].iloc[loc:loc+11]
-                start_price = future_prices.iloc[0]
-                min_price = future_prices.min()
-                return ((min_price - start_price) / start_price) * 100
-            
-            df['max_dd_10d'] = df.index.map(calc_max_drawdown_10d)
+            df['max_dd_10d'] = forward_max_drawdown(df['close'].to_numpy(), 10)
             
-            # Identify signal phases (consecutive periods of same signal)
-            df['signal_change'] = (df['signal'] != df['signal'].shift()).cumsum()
+            # One row per phase (run of consecutive days with the same signal)
+            phases = signal_phase_table(df)
+            current_signal = phases['signal'].iloc[-1]
+            current_streak = int(phases['duration'].iloc[-1])
             
-            # Mark first day of each phase (signal START)
-            df['is_phase_start'] = df['signal'] != df['signal'].shift()
-            
-            # 5-Tier regime types (Compliance-safe naming)
-            signal_types = ['STABLE', 'ACTIVE', 'HIGH_ENERGY', 'CRITICAL', 'DORMANT']
+            # All per-signal statistics in one grouped aggregation
+            horizon_cols = ([f'prior_{h}d' for h in PRIOR_HORIZONS] +
+                            [f'return_{h}d' for h in SHORT_TERM_HORIZONS + LONG_TERM_HORIZONS])
+            aggregated = phases.groupby('signal', sort=False).agg(
+                total_days=('duration', 'sum'),
+                phase_count=('duration', 'size'),
+                avg_duration=('duration', 'mean'),
+                median_duration=('duration', 'median'),
+                p95_duration=('duration', lambda d: d.quantile(0.95)),
+                max_duration=('duration', 'max'),
+                min_duration=('duration', 'min'),
+                std_duration=('duration', 'std'),
+                avg_price_change_during=('price_change_pct', 'mean'),
+                **{col: (col, 'mean') for col in horizon_cols},
+                avg_max_dd_10d=('max_dd_10d', 'mean'),
+                worst_max_dd_10d=('max_dd_10d', 'min'),
+            )
+            aggregated[horizon_cols] = aggregated[horizon_cols] * 100
+            # Single-phase std and all-NaN horizons are reported as 0
+            aggregated = aggregated.fillna(0)
             
-            # Analyze each signal type
-            signal_stats = {}
-            for signal_type in signal_types:
-                signal_df = df[df['signal'] == signal_type]
-                
-                if len(signal_df) == 0:
-                    signal_stats[signal_type] = {
-                        'total_days': 0,
-                        'phase_count': 0,
-                        # Duration statistics
-                        'avg_duration': 0,
-                        'median_duration': 0,
-                        'p95_duration': 0,
-                        'max_duration': 0,
-                        'min_duration': 0,
-                        'std_duration': 0,
-                        'avg_price_change_during': 0,
-                        'pct_of_time': 0,
-                        # PRIOR returns
-                        'prior_5d': 0,
-                        'prior_10d': 0,
-                        'prior_20d': 0,
-                        'prior_30d': 0,
-                        # Short-term returns (from signal START only)
-                        'start_return_1d': 0,
-                        'start_return_3d': 0,
-                        'start_return_5d': 0,
-                        'start_return_10d': 0,
-                        # Long-term returns (any day in phase)
-                        'avg_return_30d': 0,
-                        'avg_return_60d': 0,
-                        'avg_return_90d': 0,
-                        # Max drawdown
-                        'avg_max_dd_10d': 0,
-                        'worst_max_dd_10d': 0
-                    }
-                    continue
-                
-                # Get only the FIRST DAY of each phase for short-term analysis
-                phase_starts = signal_df[signal_df['is_phase_start']]
-                
-                # Count distinct phases
-                phases = signal_df.groupby('signal_change').agg({
-                    'close': ['first', 'last', 'count'],
-                    'return_30d': 'first',  # Return from phase start
-                    'return_60d': 'first',
-                    'return_90d': 'first',
-                    'max_dd_10d': 'first'   # Max drawdown from phase start
-                })
-                phases.columns = ['price_start', 'price_end', 'duration', 'ret_30', 'ret_60', 'ret_90', 'max_dd']
-                phases['price_change_pct'] = (phases['price_end'] - phases['price_start']) / phases['price_start'] * 100
-                
-                # Calculate PRIOR returns (what happened before signal fired) - from phase START only
-                prior_5d = phase_starts['prior_5d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['prior_5d'].isna().all() else 0
-                prior_10d = phase_starts['prior_10d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['prior_10d'].isna().all() else 0
-                prior_20d = phase_starts['prior_20d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['prior_20d'].isna().all() else 0
-                prior_30d = phase_starts['prior_30d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['prior_30d'].isna().all() else 0
-                
-                # Calculate short-term FORWARD returns from phase START only
-                start_1d = phase_starts['return_1d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['return_1d'].isna().all() else 0
-                start_3d = phase_starts['return_3d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['return_3d'].isna().all() else 0
-                start_5d = phase_starts['return_5d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['return_5d'].isna().all() else 0
-                start_10d = phase_starts['return_10d'].mean() * 100 if len(phase_starts) > 0 and not phase_starts['return_10d'].isna().all() else 0
-                
-                # Max drawdown stats
-                avg_max_dd = phases['max_dd'].mean() if len(phases) > 0 and not phases['max_dd'].isna().all() else 0
-                worst_max_dd = phases['max_dd'].min() if len(phases) > 0 and not phases['max_dd'].isna().all() else 0
-                
-                # Duration statistics for regime persistence analysis
-                durations = phases['duration']
-                avg_dur = durations.mean() if len(phases) > 0 else 0
-                median_dur = durations.median() if len(phases) > 0 else 0
-                p95_dur = durations.quantile(0.95) if len(phases) > 0 else 0
-                max_dur = durations.max() if len(phases) > 0 else 0
-                min_dur = durations.min() if len(phases) > 0 else 0
-                std_dur = durations.std() if len(phases) > 1 else 0
-                
-                signal_stats[signal_type] = {
-                    'total_days': len(signal_df),
-                    'phase_count': len(phases),
-                    # Duration statistics (for regime persistence analysis)
-                    'avg_duration': avg_dur,
-                    'median_duration': median_dur,
-                    'p95_duration': p95_dur,
-                    'max_duration': max_dur,
-                    'min_duration': min_dur,
-                    'std_duration': std_dur,
-                    'avg_price_change_during': phases['price_change_pct'].mean() if len(phases) > 0 else 0,
-                    'pct_of_time': len(signal_df) / len(df) * 100,
-                    # PRIOR returns (what led to this signal)
-                    'prior_5d': prior_5d,
-                    'prior_10d': prior_10d,
-                    'prior_20d': prior_20d,
-                    'prior_30d': prior_30d,
-                    # Short-term FORWARD returns (from signal START only)
-                    'start_return_1d': start_1d,
-                    'start_return_3d': start_3d,
-                    'start_return_5d': start_5d,
-                    'start_return_10d': start_10d,
-                    # Long-term FORWARD returns (from phase start)
-                    'avg_return_30d': phases['ret_30'].mean() * 100 if len(phases) > 0 and not phases['ret_30'].isna().all() else 0,
-                    'avg_return_60d': phases['ret_60'].mean() * 100 if len(phases) > 0 and not phases['ret_60'].isna().all() else 0,
-                    'avg_return_90d': phases['ret_90'].mean() * 100 if len(phases) > 0 and not phases['ret_90'].isna().all() else 0,
-                    # Max drawdown (worst-case)
-                    'avg_max_dd_10d': avg_max_dd,
-                    'worst_max_dd_10d': worst_max_dd
-                }
+            aggregated.insert(9, 'pct_of_time', aggregated['total_days'] / len(df) * 100)
             
-            # Current signal streak
-            current_signal = df['signal'].iloc[-1]
-            current_streak = 1
-            for i in range(len(df) - 2, -1, -1):
-                if df['signal'].iloc[i] == current_signal:
-                    current_streak += 1
-                else:
-                    break
+            # Short-term forward returns are measured from the phase START,
+            # long-term ones are averaged per phase
+            aggregated = aggregated.rename(columns={
+                **{f'return_{h}d': f'start_return_{h}d' for h in SHORT_TERM_HORIZONS},
+                **{f'return_{h}d': f'avg_return_{h}d' for h in LONG_TERM_HORIZONS},
+            })
+            phase_stats = aggregated.to_dict('index')
+            signal_stats = {
+                signal_type: phase_stats.get(signal_type, dict.fromkeys(aggregated.columns, 0))
+                for signal_type in SIGNAL_TIERS
+            }
             
             # Data range info
             years_of_data = (df.index[-1] - df.index[0]).days / 365.25
@@ -1714,9 +4125,296 @@ class SOCAnalyzer:
         return "\n".join(report_parts)
 
 
-# =============================================================================
-# DYNAMIC POSITION SIZING SIMULATION MODULE
-# =============================================================================
+# =============================================================================
+# DYNAMIC POSITION SIZING SIMULATION MODULE
+# =============================================================================
+
+# Exposure rules per strategy mode (thresholds are the same for both modes)
+STRATEGY_PROFILES = {
+    # DEFENSIVE MODE: Max safety, protect capital
+    "defensive": {
+        "name": "Defensive",
+        "high_stress_threshold": 80,     # Critical/Red
+        "medium_stress_threshold": 60,   # High Energy/Orange
+        "high_stress_exposure": 0.2,     # Red/Critical: 20%
+        "medium_stress_exposure": 0.5,   # Orange/High Energy: 50%
+        "bear_market_exposure": 0.0,     # Bear: 0%
+    },
+    # AGGRESSIVE MODE: Ride the bubble, reduce only at extremes
+    "aggressive": {
+        "name": "Aggressive",
+        "high_stress_threshold": 80,
+        "medium_stress_threshold": 60,
+        "high_stress_exposure": 0.5,     # Red/Critical: 50%
+        "medium_stress_exposure": 1.0,   # Orange/High Energy: 100% (ride momentum!)
+        "bear_market_exposure": 0.0,     # Bear: 0% (hard exit)
+    },
+}
+
+
+def strategy_profile(strategy_mode: str = "defensive", trading_fee_pct: float = 0.005,
+                     interest_rate_annual: float = 0.03, **overrides) -> Dict[str, Any]:
+    """
+    Build a strategy profile for DynamicExposureSimulator.run_simulations().
+    
+    Args:
+        strategy_mode: "defensive" or "aggressive" (base exposure table;
+            anything other than "aggressive" is defensive)
+        trading_fee_pct: Trading fee as decimal
+        interest_rate_annual: Annual interest on cash as decimal
+        **overrides: Replace any entry of the exposure table, e.g.
+            high_stress_exposure=0.0 or name="Custom"
+    
+    Returns:
+        Profile dictionary
+    """
+    mode = "aggressive" if strategy_mode.lower() == "aggressive" else "defensive"
+    unknown = set(overrides) - set(STRATEGY_PROFILES[mode])
+    if unknown:
+        raise ValueError(f"Unknown strategy profile keys: {sorted(unknown)}")
+    return {
+        **STRATEGY_PROFILES[mode],
+        "trading_fee_pct": trading_fee_pct,
+        "interest_rate_annual": interest_rate_annual,
+        **overrides,
+    }
+
+
+def simulate_exposure_equity(returns: np.ndarray, exposure: np.ndarray, initial_capital: float,
+                             trading_fee_pct, daily_interest_rate,
+                             initial_exposure: float = 1.0) -> Tuple[np.ndarray, Any, Any, Any]:
+    """
+    Equity curve of a strategy holding `exposure` of its value in the asset.
+    
+    Each day the portfolio first pays trading_fee_pct on the traded volume
+    |exposure change| x value (changes <= 0.001 are not traded), then the
+    invested part earns the asset return and the cash part earns
+    daily_interest_rate. The update is purely multiplicative,
+    
+        value_t = value_t-1 x (1 - fee x |de_t|) x (1 + e_t x r_t + (1 - e_t) x i),
+    
+    so the curve is a cumulative product and the fee and interest totals are
+    sums over the pre-trade values.
+    
+    A 2-D exposure (strategy x day) simulates all strategies at once; fee and
+    interest may then be one value per strategy.
+    
+    Args:
+        returns: Daily asset returns (NaN treated as 0)
+        exposure: Invested fraction per day (0.0 - 1.0), shape (days,) or (strategies, days)
+        initial_capital: Starting portfolio value
+        trading_fee_pct: Fee as decimal of traded volume (scalar or per strategy)
+        daily_interest_rate: Interest on cash per day as decimal (scalar or per strategy)
+        initial_exposure: Exposure before the first day (start fully invested)
+    
+    Returns:
+        Tuple of (equity curve, total fees paid, total interest earned, trade count);
+        for 2-D exposure the totals are arrays with one value per strategy
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=float), nan=0.0)
+    exposure = np.asarray(exposure, dtype=float)
+    trading_fee_pct = np.asarray(trading_fee_pct, dtype=float)
+    daily_interest_rate = np.asarray(daily_interest_rate, dtype=float)
+    if exposure.ndim == 2:
+        trading_fee_pct = trading_fee_pct.reshape(-1, 1)
+        daily_interest_rate = daily_interest_rate.reshape(-1, 1)
+    
+    exposure_change = np.abs(np.diff(exposure, axis=-1, prepend=initial_exposure))
+    is_trade = exposure_change > 0.001  # Threshold to avoid floating point issues
+    fee_rate = np.where(is_trade, exposure_change * trading_fee_pct, 0.0)
+    growth = 1 + exposure * returns + (1 - exposure) * daily_interest_rate
+    
+    equity = initial_capital * np.cumprod((1 - fee_rate) * growth, axis=-1)
+    pre_trade_value = np.concatenate(
+        (np.full(equity.shape[:-1] + (1,), float(initial_capital)), equity[..., :-1]), axis=-1
+    )
+    total_fees_paid = np.sum(pre_trade_value * fee_rate, axis=-1)
+    total_interest_earned = np.sum(
+        pre_trade_value * (1 - fee_rate) * (1 - exposure) * daily_interest_rate, axis=-1
+    )
+    trade_count = is_trade.sum(axis=-1)
+    if exposure.ndim == 1:
+        return equity, float(total_fees_paid), float(total_interest_earned), int(trade_count)
+    return equity, total_fees_paid, total_interest_earned, trade_count
+
+
+# Strategy parameters that run_sensitivity() can vary
+SENSITIVITY_PARAMETERS = ("high_stress_threshold", "medium_stress_threshold", "high_stress_exposure",
+                          "medium_stress_exposure", "bear_market_exposure", "trading_fee_pct",
+                          "interest_rate_annual")
+
+
+def sensitivity_grid(strategy_mode: str = "defensive", **values) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of strategy parameters as profiles for run_sensitivity().
+    
+    Args:
+        strategy_mode: Base exposure table for parameters not varied
+        **values: Iterable of values per name in SENSITIVITY_PARAMETERS
+    
+    Example:
+        >>> grid = sensitivity_grid(high_stress_threshold=[70, 80, 90],
+        ...                         trading_fee_pct=[0.001, 0.005])
+        >>> len(grid)
+        6
+    """
+    unknown = set(values) - set(SENSITIVITY_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sensitivity parameters: {sorted(unknown)}")
+    names = list(values)
+    return [strategy_profile(strategy_mode, **dict(zip(names, combination)))
+            for combination in itertools.product(*(values[name] for name in names))]
+
+
+def _simulate_grid(returns: np.ndarray, is_uptrend: np.ndarray, criticality: np.ndarray,
+                   params: Dict[str, np.ndarray], initial_capital: float) -> Dict[str, np.ndarray]:
+    """
+    Simulate one chunk of grid points; every parameter array has one value per point.
+    
+    Exposure rules and the equity engine broadcast over a (point x day)
+    matrix, so the chunk is a handful of array operations.
+    """
+    column = {name: np.asarray(values, dtype=float)[:, None] for name, values in params.items()}
+    exposure = np.where(
+        ~is_uptrend, column['bear_market_exposure'],                       # Bear market
+        np.where(criticality > column['high_stress_threshold'], column['high_stress_exposure'],
+                 np.where(criticality > column['medium_stress_threshold'],
+                          column['medium_stress_exposure'], 1.0))
+    )
+    equity, fees, interest, trades = simulate_exposure_equity(
+        returns, exposure, initial_capital, params['trading_fee_pct'],
+        np.asarray(params['interest_rate_annual'], dtype=float) / 365
+    )
+    
+    total_return_pct = (equity[:, -1] - initial_capital) / initial_capital * 100
+    peak = np.maximum.accumulate(equity, axis=1)
+    max_drawdown_pct = ((equity - peak) / peak * 100).min(axis=1)
+    annualized_vol = (equity[:, 1:] / equity[:, :-1] - 1).std(axis=1, ddof=1) * np.sqrt(252) * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(annualized_vol > 0, total_return_pct / annualized_vol, 0.0)
+    return {
+        'final_value': equity[:, -1],
+        'total_return_pct': total_return_pct,
+        'max_drawdown_pct': max_drawdown_pct,
+        'annualized_vol': annualized_vol,
+        'sharpe_ratio': sharpe,
+        'avg_exposure_pct': exposure.mean(axis=1) * 100,
+        'total_fees_paid': fees,
+        'total_interest_earned': interest,
+        'trade_count': trades,
+    }
+
+
+def _simulate_grid_task(args: tuple) -> Dict[str, np.ndarray]:
+    """Process-pool entry point for _simulate_grid()."""
+    return _simulate_grid(*args)
+
+
+def _suffix_max_drawdown(log_equity: np.ndarray) -> np.ndarray:
+    """
+    Max drawdown (as log ratio, <= 0) of every suffix log_equity[s:].
+    
+    Prepending a bar at s adds one candidate peak, so
+    D(s) = min(min(log_equity[s:]) - log_equity[s], D(s + 1)).
+    """
+    suffix_min = np.minimum.accumulate(log_equity[::-1])[::-1]
+    return np.minimum.accumulate((suffix_min - log_equity)[::-1])[::-1]
+
+
+def _window_max_drawdown(log_equity: np.ndarray, window: int, chunk_size: int = 2048) -> np.ndarray:
+    """Max drawdown (as log ratio, <= 0) of every window log_equity[s:s + window]."""
+    windows = sliding_window_view(log_equity, window)
+    drawdown = np.empty(len(windows))
+    for start in range(0, len(windows), chunk_size):
+        chunk = windows[start:start + chunk_size]
+        drawdown[start:start + chunk_size] = (chunk - np.maximum.accumulate(chunk, axis=1)).min(axis=1)
+    return drawdown
+
+# Equity curve point selection for the simulation charts
+EQUITY_CURVE_GRANULARITIES = ("daily", "weekly", "monthly", "lttb")
+
+
+def lttb_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a series.
+    
+    Keeps the first and last point and, from each of max_points - 2 equal
+    buckets, the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket - preserving peaks and
+    troughs that a fixed-step sample would miss.
+    
+    Args:
+        values: Series values (x is the position)
+        max_points: Number of points to keep (>= 3)
+    
+    Returns:
+        Sorted positions of the kept points
+    """
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    
+    # Bucket edges over the inner points 1 .. n-2, plus the last point as final bucket
+    edges = np.append(np.arange(max_points - 1) * (n - 2) // (max_points - 2) + 1, n)
+    positions = np.arange(n, dtype=float)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(max_points - 2):
+        start, end, next_end = edges[bucket], edges[bucket + 1], edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = positions[end:next_end].mean()
+        next_y = values[end:next_end].mean()
+        area = np.abs((positions[anchor] - next_x) * (values[start:end] - values[anchor])
+                      - (positions[anchor] - positions[start:end]) * (next_y - values[anchor]))
+        anchor = start + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def equity_curve_snapshots(df: pd.DataFrame, granularity: str = "monthly",
+                           max_points: int = 500,
+                           shared_curves: Optional[List[np.ndarray]] = None) -> pd.DataFrame:
+    """
+    Chart points of a simulation's daily data.
+    
+    With "lttb", lttb_indices() picks max_points of buyhold_equity, of
+    soc_equity and of every shared curve, and the chart uses the union of
+    these points - each plotted curve keeps its own peaks and troughs, and
+    results built with the same shared curves get the same dates.
+    
+    Args:
+        df: Daily frame with buyhold_equity, soc_equity, exposure and criticality_score
+        granularity: "daily", "weekly" or "monthly" (last trading day of each
+            period) or "lttb" (largest-triangle points of each curve)
+        max_points: Point budget per curve for "lttb"
+        shared_curves: Further daily curves plotted on the same dates for
+            "lttb", e.g. the SOC equity of the other profiles of a run
+    
+    Returns:
+        DataFrame with date, buyhold_value, soc_value, exposure (%) and criticality
+    """
+    if granularity not in EQUITY_CURVE_GRANULARITIES:
+        raise ValueError(f"Unknown equity curve granularity '{granularity}', "
+                         f"expected one of {list(EQUITY_CURVE_GRANULARITIES)}")
+    if granularity == "lttb":
+        curves = [df['buyhold_equity'].to_numpy(), df['soc_equity'].to_numpy(), *(shared_curves or [])]
+        points = df.iloc[np.unique(np.concatenate([lttb_indices(curve, max_points) for curve in curves]))]
+    elif granularity == "daily":
+        points = df
+    else:
+        points = df.groupby(df.index.to_period('W' if granularity == "weekly" else 'M')).tail(1)
+    
+    return pd.DataFrame({
+        'date': points.index,
+        'buyhold_value': points['buyhold_equity'].to_numpy(),
+        'soc_value': points['soc_equity'].to_numpy(),
+        'exposure': points['exposure'].to_numpy() * 100,
+        'criticality': points['criticality_score'].to_numpy(),
+    })
+
 
 class DynamicExposureSimulator:
     """
@@ -1739,34 +4437,38 @@ class DynamicExposureSimulator:
     
     ANNUAL_RISK_FREE_RATE = 0.02  # 2% annual risk-free rate for cash
     
-    def __init__(self, df: pd.DataFrame, symbol: str, initial_capital: float = 10000.0):
+    def __init__(self, df: pd.DataFrame, symbol: str, initial_capital: float = 10000.0,
+                 metrics: Optional[MetricsBundle] = None):
         self.df = df.copy()
         self.symbol = symbol
         self.initial_capital = initial_capital
-        self._prepare_data()
+        self._prepare_data(metrics)
     
-    def _prepare_data(self):
+    def _prepare_data(self, metrics: Optional[MetricsBundle] = None):
         """Prepare dataframe with volatility metrics and criticality scores."""
         if 'close' not in self.df.columns:
             raise ValueError("DataFrame must contain 'close' column")
         
-        # Calculate metrics
-        self.df['sma_200'] = self.df['close'].rolling(window=200).mean()
-        self.df['returns'] = self.df['close'].pct_change()
-        self.df['volatility'] = self.df['returns'].rolling(window=30).std()
+        # Calculate metrics (or take them from the shared bundle)
+        if metrics is None:
+            metrics = MetricsBundle(self.df, self.symbol)
+        else:
+            metrics.check_frame(self.df)
+        self.df['sma_200'] = metrics.sma(200).to_numpy()
+        self.df['returns'] = metrics.returns.to_numpy()
+        self.df['volatility'] = metrics.volatility(30).to_numpy()
         
-        # Drop NaN rows first to ensure clean data
-        self.df = self.df.dropna(subset=['close', 'sma_200', 'volatility'])
+        # Drop NaN rows first to ensure clean data (an own frame: the metrics
+        # bundle still references the unfiltered one)
+        self.df = self.df.dropna(subset=['close', 'sma_200', 'volatility']).copy()
         
         if len(self.df) < 30:
             return
         
         # Calculate rolling volatility percentile (criticality score proxy)
         vol_window = min(504, len(self.df) - 1)  # ~2 years
-        self.df['criticality_score'] = self.df['volatility'].rolling(
-            window=vol_window, min_periods=30
-        ).apply(
-            lambda x: (x.iloc[-1] <= x).sum() / len(x) * 100, raw=False
+        self.df['criticality_score'] = rolling_percentile_rank(
+            self.df['volatility'], vol_window, op=">=", include_current=True, min_periods=30
         )
         
         # Apply trend modifier to criticality score
@@ -1805,7 +4507,9 @@ class DynamicExposureSimulator:
     def run_simulation(self, start_date: str = None, 
                        strategy_mode: str = "defensive",
                        trading_fee_pct: float = 0.005,
-                       interest_rate_annual: float = 0.03) -> Dict[str, Any]:
+                       interest_rate_annual: float = 0.03,
+                       curve_granularity: str = "monthly",
+                       curve_points: int = 500) -> Dict[str, Any]:
         """
         Run both strategies and return results with realistic friction costs.
         
@@ -1819,104 +4523,258 @@ class DynamicExposureSimulator:
                 - Aggressive: Max return, ride momentum longer
             trading_fee_pct: Trading fee as decimal (default 0.005 = 0.5%)
             interest_rate_annual: Annual interest on cash (default 0.03 = 3%)
+            curve_granularity: Points of 'equity_curve' (see equity_curve_snapshots())
+            curve_points: Point budget per curve for curve_granularity="lttb"
             
         Returns:
             Dictionary with simulation results and equity curves.
         """
-        df = self.df.copy()
+        profile = strategy_profile(strategy_mode, trading_fee_pct=trading_fee_pct,
+                                   interest_rate_annual=interest_rate_annual)
+        return self.run_simulations([profile], start_date, curve_granularity, curve_points)[0]
+    
+    def run_simulations(self, profiles: List[Dict[str, Any]], start_date: str = None,
+                        curve_granularity: str = "monthly",
+                        curve_points: int = 500) -> List[Dict[str, Any]]:
+        """
+        Run several SOC Dynamic strategy profiles against Buy & Hold in one pass.
+        
+        The date filter, Buy & Hold curve and drawdowns are computed once; the
+        exposure of every profile is stacked into a (strategy x day) matrix
+        and all equity curves come from one simulate_exposure_equity() call.
+        
+        Args:
+            profiles: Strategy profiles as returned by strategy_profile()
+            start_date: Optional start date (YYYY-MM-DD)
+            curve_granularity: Points of 'equity_curve' (see equity_curve_snapshots())
+            curve_points: Point budget per curve for curve_granularity="lttb"
+        
+        Returns:
+            One result dictionary per profile, in order, each shaped like
+            run_simulation()'s result (or {"error": ...} for all profiles).
+        
+        Example:
+            >>> results = simulator.run_simulations([strategy_profile("defensive"),
+            ...                                      strategy_profile("aggressive")])
+        """
+        df = self.df
         
         # Filter by start date if provided
         if start_date:
             df = df[df.index >= pd.to_datetime(start_date)]
         
         if len(df) < 30:
-            return {"error": "Insufficient data for simulation"}
-        
-        # Daily interest rate for cash portion
-        daily_interest_rate = interest_rate_annual / 365
-        
-        # Define exposure rules based on strategy mode
-        is_aggressive = strategy_mode.lower() == "aggressive"
+            return [{"error": "Insufficient data for simulation"} for _ in profiles]
+        if curve_granularity not in EQUITY_CURVE_GRANULARITIES:
+            raise ValueError(f"Unknown equity curve granularity '{curve_granularity}', "
+                             f"expected one of {list(EQUITY_CURVE_GRANULARITIES)}")
+        
+        # Target exposure for each strategy and day
+        exposure = np.array([self._profile_exposure(df, profile) for profile in profiles])
+        exposure = exposure.reshape(len(profiles), len(df))
+        
+        # SOC Dynamic: exposure-weighted returns with fees and interest
+        soc_equity, total_fees, total_interest, trade_counts = simulate_exposure_equity(
+            df['returns'].to_numpy(), exposure, self.initial_capital,
+            [profile['trading_fee_pct'] for profile in profiles],
+            [profile['interest_rate_annual'] / 365 for profile in profiles]   # Daily interest on cash
+        )
         
-        # Thresholds (same for both modes)
-        high_stress_threshold = 80  # Critical/Red
-        medium_stress_threshold = 60  # High Energy/Orange
+        # Buy & Hold: Simple vectorized calculation (no trades after initial buy)
+        base = df.copy()
+        base['buyhold_return'] = base['returns']
+        base['buyhold_equity'] = self.initial_capital * (1 + base['buyhold_return']).cumprod()
+        base['buyhold_peak'] = base['buyhold_equity'].cummax()
+        base['buyhold_drawdown'] = (base['buyhold_equity'] - base['buyhold_peak']) / base['buyhold_peak'] * 100
+        buyhold_vol = base['buyhold_return'].std() * np.sqrt(252) * 100  # Annualized
+        
+        # Every profile's chart shows all curves of the run on the same dates
+        shared_curves = list(soc_equity) if curve_granularity == "lttb" else None
+        return [
+            self._simulation_results(base, profile, exposure[i], soc_equity[i], float(total_fees[i]),
+                                     float(total_interest[i]), int(trade_counts[i]), buyhold_vol,
+                                     curve_granularity, curve_points, shared_curves)
+            for i, profile in enumerate(profiles)
+        ]
+    
+    def walk_forward(self, profile: Optional[Dict[str, Any]] = None, horizon: Optional[int] = None,
+                     min_days: int = 30) -> pd.DataFrame:
+        """
+        Backtest the strategy from every possible start date in one pass.
         
-        # Exposure rules differ by mode
-        if is_aggressive:
-            # AGGRESSIVE MODE: Ride the bubble, reduce only at extremes
-            high_stress_exposure = 0.5    # Red/Critical: 50%
-            medium_stress_exposure = 1.0   # Orange/High Energy: 100% (ride momentum!)
-            bear_market_exposure = 0.0     # Bear: 0% (hard exit)
-        else:
-            # DEFENSIVE MODE: Max safety, protect capital
-            high_stress_exposure = 0.2     # Red/Critical: 20%
-            medium_stress_exposure = 0.5   # Orange/High Energy: 50%
-            bear_market_exposure = 0.0     # Bear: 0%
-        
-        # Calculate target exposure for each day
-        def calc_exposure(row):
-            """Calculate position exposure based on trend and criticality score."""
-            if not row['is_uptrend']:
-                return bear_market_exposure  # Bear market
-            if row['criticality_score'] > high_stress_threshold:
-                return high_stress_exposure  # Red/Critical
-            elif row['criticality_score'] > medium_stress_threshold:
-                return medium_stress_exposure  # Orange/High Energy
-            else:
-                return 1.0  # Green/Stable = 100%
+        For each start s the result equals run_simulation(start_date=s) (up
+        to floating-point rounding): the portfolio starts fully invested,
+        pays the fee of its first exposure change, and is held until the end
+        of the data or for a fixed number of days.
         
-        df['exposure'] = df.apply(calc_exposure, axis=1)
+        Daily growth factors are turned into one cumulative log-equity curve
+        L, so every start/end pair is a difference of L (plus the start-day
+        fee). Max drawdowns come from a reverse running minimum (to the end)
+        or running maxima over sliding windows (fixed horizon), and the
+        volatility from prefix sums of daily returns.
         
-        # === ITERATIVE SIMULATION WITH FEES AND INTEREST ===
-        # We need to iterate day-by-day to properly track fees and portfolio value
+        Args:
+            profile: Strategy profile from strategy_profile() (default: defensive)
+            horizon: Holding period in trading days (None = hold to the end)
+            min_days: Minimum days per backtest (run_simulation requires 30)
         
-        # Buy & Hold: Simple vectorized calculation (no trades after initial buy)
-        df['buyhold_return'] = df['returns']
-        df['buyhold_equity'] = self.initial_capital * (1 + df['buyhold_return']).cumprod()
+        Returns:
+            DataFrame indexed by start date with end_date, days,
+            total_return_pct, max_drawdown_pct, annualized_vol, sharpe_ratio
+            (return / volatility, as in run_simulation) and buyhold_return_pct,
+            buyhold_max_drawdown_pct.
+        
+        Example:
+            >>> outcomes = simulator.walk_forward(horizon=252)
+            >>> outcomes['total_return_pct'].describe()
+        """
+        if profile is None:
+            profile = strategy_profile()
+        if horizon is not None and horizon < min_days:
+            raise ValueError(f"horizon must be at least min_days ({min_days})")
+        
+        df = self.df
+        n = len(df)
+        length = horizon if horizon is not None else min_days
+        if n < max(length, 1) or 'criticality_score' not in df.columns:
+            return pd.DataFrame(columns=['end_date', 'days', 'total_return_pct', 'max_drawdown_pct',
+                                         'annualized_vol', 'sharpe_ratio', 'buyhold_return_pct',
+                                         'buyhold_max_drawdown_pct'])
+        
+        returns = np.nan_to_num(df['returns'].to_numpy(dtype=float), nan=0.0)
+        exposure = self._profile_exposure(df, profile)
+        fee_pct = profile['trading_fee_pct']
+        daily_interest_rate = profile['interest_rate_annual'] / 365
+        
+        # Growth factor per day: continuing (trade vs previous day) and as
+        # first day of a backtest (trade vs the fully invested start)
+        growth = 1 + exposure * returns + (1 - exposure) * daily_interest_rate
+        change = np.abs(np.diff(exposure, prepend=1.0))
+        first_change = np.abs(exposure - 1.0)
+        factor = (1 - np.where(change > 0.001, change * fee_pct, 0.0)) * growth
+        first_factor = (1 - np.where(first_change > 0.001, first_change * fee_pct, 0.0)) * growth
+        
+        log_equity = np.cumsum(np.log(factor))
+        log_buyhold = np.cumsum(np.log1p(returns))
+        
+        # Start/end positions of every backtest
+        if horizon is None:
+            starts = np.arange(n - min_days + 1)
+            ends = np.full(len(starts), n - 1)
+            max_dd = _suffix_max_drawdown(log_equity)[starts]
+            buyhold_max_dd = _suffix_max_drawdown(log_buyhold)[starts]
+        else:
+            starts = np.arange(n - horizon + 1)
+            ends = starts + horizon - 1
+            max_dd = _window_max_drawdown(log_equity, horizon)
+            buyhold_max_dd = _window_max_drawdown(log_buyhold, horizon)
+        
+        total_return = np.exp(np.log(first_factor[starts]) + log_equity[ends] - log_equity[starts]) - 1
+        buyhold_return = np.exp(np.log1p(returns[starts]) + log_buyhold[ends] - log_buyhold[starts]) - 1
+        
+        # Volatility of daily equity returns after the first day (pct_change)
+        daily = np.concatenate(([0.0], factor - 1))
+        sum_1 = np.cumsum(daily)
+        sum_2 = np.cumsum(daily ** 2)
+        count = ends - starts
+        total_1 = sum_1[ends + 1] - sum_1[starts + 1]
+        total_2 = sum_2[ends + 1] - sum_2[starts + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (total_2 - total_1 ** 2 / count) / (count - 1)
+        annualized_vol = np.sqrt(np.maximum(variance, 0.0)) * np.sqrt(252) * 100
+        
+        total_return_pct = total_return * 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(annualized_vol > 0, total_return_pct / annualized_vol, 0.0)
+        
+        return pd.DataFrame({
+            'end_date': df.index[ends],
+            'days': count + 1,
+            'total_return_pct': total_return_pct,
+            'max_drawdown_pct': np.expm1(max_dd) * 100,
+            'annualized_vol': annualized_vol,
+            'sharpe_ratio': sharpe,
+            'buyhold_return_pct': buyhold_return * 100,
+            'buyhold_max_drawdown_pct': np.expm1(buyhold_max_dd) * 100,
+        }, index=df.index[starts].rename('start_date'))
+    
+    def run_sensitivity(self, profiles: List[Dict[str, Any]], start_date: str = None,
+                        workers: Optional[int] = None, chunk_size: int = 250) -> pd.DataFrame:
+        """
+        Evaluate a grid of strategy parameters on this prepared dataset.
         
-        # SOC Dynamic: Day-by-day simulation with fees and interest
-        soc_equity = []
-        soc_portfolio_value = self.initial_capital
-        prev_exposure = 1.0  # Start fully invested
+        Returns, trend and criticality are shared by all grid points; each
+        chunk of points is simulated as one (point x day) matrix. Metrics
+        equal the 'soc_dynamic' block of run_simulation() for the same profile.
         
-        total_fees_paid = 0.0
-        total_interest_earned = 0.0
-        trade_count = 0
+        Args:
+            profiles: Strategy profiles, e.g. from sensitivity_grid()
+            start_date: Optional start date (YYYY-MM-DD)
+            workers: Number of worker processes for large grids (None = in process)
+            chunk_size: Grid points per array pass (bounds memory)
         
-        for idx, row in df.iterrows():
-            current_exposure = row['exposure']
-            daily_return = row['returns'] if not pd.isna(row['returns']) else 0.0
-            
-            # Step 1: Check for exposure change (TRADE)
-            exposure_change = abs(current_exposure - prev_exposure)
-            if exposure_change > 0.001:  # Threshold to avoid floating point issues
-                # Calculate trade volume and fee
-                trade_volume = exposure_change * soc_portfolio_value
-                fee = trade_volume * trading_fee_pct
-                soc_portfolio_value -= fee
-                total_fees_paid += fee
-                trade_count += 1
-            
-            # Step 2: Apply asset returns to invested portion
-            invested_portion = soc_portfolio_value * current_exposure
-            cash_portion = soc_portfolio_value * (1 - current_exposure)
-            
-            # Asset return on invested portion
-            invested_portion *= (1 + daily_return)
-            
-            # Step 3: Apply daily interest on cash portion
-            daily_interest = cash_portion * daily_interest_rate
-            cash_portion += daily_interest
-            total_interest_earned += daily_interest
-            
-            # Step 4: Update portfolio value
-            soc_portfolio_value = invested_portion + cash_portion
-            soc_equity.append(soc_portfolio_value)
-            
-            # Update previous exposure for next iteration
-            prev_exposure = current_exposure
+        Returns:
+            Tidy DataFrame, one row per profile: the SENSITIVITY_PARAMETERS and
+            final_value, total_return_pct, max_drawdown_pct, annualized_vol,
+            sharpe_ratio, avg_exposure_pct, total_fees_paid,
+            total_interest_earned, trade_count. Pivot it for a heatmap.
+        
+        Example:
+            >>> grid = sensitivity_grid(high_stress_threshold=range(60, 96, 5),
+            ...                         trading_fee_pct=[0.0, 0.001, 0.005, 0.01])
+            >>> cube = simulator.run_sensitivity(grid)
+            >>> cube.pivot_table(index='high_stress_threshold', columns='trading_fee_pct',
+            ...                  values='sharpe_ratio')
+        """
+        df = self.df
+        if start_date:
+            df = df[df.index >= pd.to_datetime(start_date)]
+        if len(df) < 30:
+            raise ValueError("Insufficient data for simulation")
+        
+        params = pd.DataFrame([{name: profile[name] for name in SENSITIVITY_PARAMETERS}
+                               for profile in profiles], columns=list(SENSITIVITY_PARAMETERS))
+        shared = (df['returns'].to_numpy(dtype=float), df['is_uptrend'].to_numpy(dtype=bool),
+                  df['criticality_score'].to_numpy(dtype=float))
+        tasks = [
+            shared + ({name: params[name].to_numpy()[start:start + chunk_size] for name in params},
+                      self.initial_capital)
+            for start in range(0, len(params), chunk_size)
+        ]
+        
+        if workers and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunks = list(pool.map(_simulate_grid_task, tasks))
+        else:
+            chunks = [_simulate_grid(*task) for task in tasks]
         
+        metrics = {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.array([])
+                   for name in (chunks[0] if chunks else {})}
+        return pd.concat([params, pd.DataFrame(metrics)], axis=1)
+    
+    @staticmethod
+    def _profile_exposure(df: pd.DataFrame, profile: Dict[str, Any]) -> np.ndarray:
+        """Target exposure per day for one strategy profile."""
+        criticality = df['criticality_score'].to_numpy()
+        return np.select(
+            [
+                ~df['is_uptrend'].to_numpy(dtype=bool),                   # Bear market
+                criticality > profile['high_stress_threshold'],           # Red/Critical
+                criticality > profile['medium_stress_threshold'],         # Orange/High Energy
+            ],
+            [profile['bear_market_exposure'], profile['high_stress_exposure'],
+             profile['medium_stress_exposure']],
+            default=1.0                                                   # Green/Stable = 100%
+        )
+    
+    def _simulation_results(self, base: pd.DataFrame, profile: Dict[str, Any], exposure: np.ndarray,
+                            soc_equity: np.ndarray, total_fees_paid: float, total_interest_earned: float,
+                            trade_count: int, buyhold_vol: float, curve_granularity: str = "monthly",
+                            curve_points: int = 500,
+                            shared_curves: Optional[List[np.ndarray]] = None) -> Dict[str, Any]:
+        """Assemble the result dictionary of one strategy profile."""
+        df = base.copy()
+        df['exposure'] = exposure
         df['soc_equity'] = soc_equity
         
         # Track exposure statistics
@@ -1925,21 +4783,8 @@ class DynamicExposureSimulator:
         days_cash = (df['exposure'] == 0).sum()
         total_days = len(df)
         
-        # Build equity curves (monthly snapshots for chart)
-        df['year_month'] = df.index.to_period('M')
-        monthly_snapshots = []
-        
-        for period in df['year_month'].unique():
-            month_df = df[df['year_month'] == period]
-            if not month_df.empty:
-                last_day = month_df.iloc[-1]
-                monthly_snapshots.append({
-                    'date': last_day.name,
-                    'buyhold_value': last_day['buyhold_equity'],
-                    'soc_value': last_day['soc_equity'],
-                    'exposure': last_day['exposure'] * 100,
-                    'criticality': last_day['criticality_score']
-                })
+        # Build equity curve (chart points)
+        equity_curve = equity_curve_snapshots(df, curve_granularity, curve_points, shared_curves)
         
         # Final values
         final_buyhold = df['buyhold_equity'].iloc[-1] if len(df) > 0 else self.initial_capital
@@ -1950,8 +4795,6 @@ class DynamicExposureSimulator:
         soc_return_pct = ((final_soc - self.initial_capital) / self.initial_capital) * 100
         
         # Calculate max drawdown for each strategy
-        df['buyhold_peak'] = df['buyhold_equity'].cummax()
-        df['buyhold_drawdown'] = (df['buyhold_equity'] - df['buyhold_peak']) / df['buyhold_peak'] * 100
         max_dd_buyhold = df['buyhold_drawdown'].min()
         
         df['soc_peak'] = df['soc_equity'].cummax()
@@ -1962,7 +4805,6 @@ class DynamicExposureSimulator:
         df['soc_daily_return'] = df['soc_equity'].pct_change()
         
         # Calculate Sharpe-like ratio (return / volatility)
-        buyhold_vol = df['buyhold_return'].std() * np.sqrt(252) * 100  # Annualized
         soc_vol = df['soc_daily_return'].std() * np.sqrt(252) * 100  # Annualized
         
         buyhold_sharpe = buyhold_return_pct / buyhold_vol if buyhold_vol > 0 else 0
@@ -2003,7 +4845,7 @@ class DynamicExposureSimulator:
             'outperformance_pct': soc_return_pct - buyhold_return_pct,
             'outperformance_abs': final_soc - final_buyhold,
             'drawdown_protection': max_dd_soc - max_dd_buyhold,  # Positive = less drawdown
-            'equity_curve': pd.DataFrame(monthly_snapshots),
+            'equity_curve': equity_curve,
             'daily_data': df[['close', 'sma_200', 'criticality_score', 'exposure', 
                               'buyhold_equity', 'soc_equity', 'buyhold_drawdown', 'soc_drawdown']].copy(),
             'summary': {
@@ -2022,13 +4864,13 @@ class DynamicExposureSimulator:
                 'drawdown_reduction': max_dd_soc - max_dd_buyhold,
                 'avg_exposure': avg_exposure,
                 'days_in_cash': days_cash,
-                'strategy_mode': 'Aggressive' if is_aggressive else 'Defensive',
-                'high_stress_threshold': high_stress_threshold,
-                'medium_stress_threshold': medium_stress_threshold,
-                'high_stress_exposure': high_stress_exposure * 100,
-                'medium_stress_exposure': medium_stress_exposure * 100,
-                'trading_fee_pct': trading_fee_pct * 100,
-                'interest_rate_annual': interest_rate_annual * 100,
+                'strategy_mode': profile['name'],
+                'high_stress_threshold': profile['high_stress_threshold'],
+                'medium_stress_threshold': profile['medium_stress_threshold'],
+                'high_stress_exposure': profile['high_stress_exposure'] * 100,
+                'medium_stress_exposure': profile['medium_stress_exposure'] * 100,
+                'trading_fee_pct': profile['trading_fee_pct'] * 100,
+                'interest_rate_annual': profile['interest_rate_annual'] * 100,
                 'total_fees_paid': total_fees_paid,
                 'total_interest_earned': total_interest_earned,
                 'trade_count': trade_count,
@@ -2039,10 +4881,409 @@ class DynamicExposureSimulator:
         return results
 
 
+# Rebalancing schedules for PortfolioExposureSimulator (pandas period aliases)
+REBALANCE_FREQUENCIES = {
+    "never": None,
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "quarterly": "Q",
+    "yearly": "Y",
+}
+
+
+def rebalance_schedule(index: pd.DatetimeIndex, frequency: str = "monthly") -> np.ndarray:
+    """
+    Rebalancing days of a trading calendar.
+    
+    A day is a rebalancing day when it is the first bar of a new calendar
+    period (week, month, ...); the first bar itself is the initial allocation.
+    
+    Args:
+        index: Trading days
+        frequency: Key of REBALANCE_FREQUENCIES
+    
+    Returns:
+        Boolean array, True on rebalancing days
+    """
+    if frequency not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency '{frequency}', "
+                         f"expected one of {list(REBALANCE_FREQUENCIES)}")
+    period = REBALANCE_FREQUENCIES[frequency]
+    flags = np.zeros(len(index), dtype=bool)
+    if period is None or len(index) < 2:
+        return flags
+    codes = index.to_period(period).asi8
+    flags[1:] = codes[1:] != codes[:-1]
+    return flags
+
+
+def simulate_portfolio_equity(returns: np.ndarray, exposure: np.ndarray, weights: np.ndarray,
+                              rebalance: np.ndarray, initial_capital: float, trading_fee_pct: float,
+                              daily_interest_rate: float, initial_exposure: float = 1.0) -> Dict[str, Any]:
+    """
+    Equity of a multi-asset portfolio with one exposure-managed sleeve per asset.
+    
+    Capital is split into sleeves by `weights`. Each sleeve follows the
+    single-asset rule of simulate_exposure_equity(): it holds exposure e of
+    its value in its asset and the rest in cash, paying trading_fee_pct on
+    exposure changes. On rebalancing days the sleeves are reset to the
+    target weights before trading; the fee is charged on the invested
+    volume moved, trading_fee_pct x sum_i e_i x |sleeve_i - w_i x value|.
+    
+    Between two rebalancing days every sleeve compounds on its own, so the
+    sleeve values are cumulative products of daily factors within each
+    segment. The segment growth and the drifted weights at its end give
+    the next rebalancing fee, and a cumulative product over segments gives
+    the capital allocated at every segment start - all array operations
+    over (day x asset), with no loop over days or assets.
+    
+    Args:
+        returns: Daily asset returns, shape (days, assets) (NaN treated as 0)
+        exposure: Invested fraction per day and asset (0.0 - 1.0), broadcastable to returns
+        weights: Target capital weights per asset (sum to 1)
+        rebalance: Boolean rebalancing flag per day (the first day is ignored)
+        initial_capital: Starting portfolio value
+        trading_fee_pct: Fee as decimal of traded volume
+        daily_interest_rate: Interest on cash per day as decimal
+        initial_exposure: Exposure before the first day (start fully invested)
+    
+    Returns:
+        Dictionary with 'equity' (days,), 'sleeves', 'contribution' (asset
+        P&L), 'interest', 'fees' (exposure trades) of shape (days, assets),
+        'rebalance_fees' (days,), 'trade_count' and 'rebalance_count'.
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=float), nan=0.0)
+    exposure = np.broadcast_to(np.asarray(exposure, dtype=float), returns.shape)
+    weights = np.asarray(weights, dtype=float)
+    rebalance = np.asarray(rebalance, dtype=bool).copy()
+    n_days = len(returns)
+    
+    # Daily factor of every sleeve (same recurrence as simulate_exposure_equity)
+    exposure_change = np.abs(np.diff(exposure, axis=0, prepend=np.full((1, returns.shape[1]), initial_exposure)))
+    is_trade = exposure_change > 0.001
+    fee_rate = np.where(is_trade, exposure_change * trading_fee_pct, 0.0)
+    factor = (1 - fee_rate) * (1 + exposure * returns + (1 - exposure) * daily_interest_rate)
+    
+    # Segments between rebalancing days
+    rebalance[0] = True
+    starts = np.flatnonzero(rebalance)
+    ends = np.append(starts[1:] - 1, n_days - 1)
+    segment = np.cumsum(rebalance) - 1
+    
+    # Sleeve growth since its segment start, before (prev) and after each day
+    log_equity = np.cumsum(np.log(factor), axis=0)
+    log_prev = np.vstack((np.zeros((1, returns.shape[1])), log_equity[:-1]))
+    log_start = log_prev[starts][segment]
+    growth = np.exp(log_equity - log_start)
+    growth_prev = np.exp(log_prev - log_start)
+    
+    # Segment growth, drifted weights and the fee of the following rebalance
+    segment_growth = growth[ends] @ weights
+    drift = weights * growth[ends] / segment_growth[:, None]
+    rebalance_fee_rate = np.concatenate((
+        [0.0], trading_fee_pct * np.sum(exposure[ends[:-1]] * np.abs(drift[:-1] - weights), axis=1)
+    ))
+    
+    # Capital allocated at every segment start (after its rebalancing fee)
+    allocated = initial_capital * np.cumprod(
+        (1 - rebalance_fee_rate) * np.concatenate(([1.0], segment_growth[:-1]))
+    )
+    sleeve_base = allocated[segment][:, None] * weights
+    sleeves = sleeve_base * growth
+    pre_trade_value = sleeve_base * growth_prev
+    
+    rebalance_fees = np.zeros(n_days)
+    rebalance_fees[starts] = allocated / (1 - rebalance_fee_rate) * rebalance_fee_rate
+    
+    return {
+        'equity': sleeves.sum(axis=1),
+        'sleeves': sleeves,
+        'contribution': pre_trade_value * (1 - fee_rate) * exposure * returns,
+        'interest': pre_trade_value * (1 - fee_rate) * (1 - exposure) * daily_interest_rate,
+        'fees': pre_trade_value * fee_rate,
+        'rebalance_fees': rebalance_fees,
+        'trade_count': int(is_trade.sum()),
+        'rebalance_count': len(starts) - 1,
+    }
+
+
+class PortfolioExposureSimulator:
+    """
+    Backtests the SOC exposure rules on a weighted multi-asset portfolio.
+    
+    Every asset is prepared by DynamicExposureSimulator (criticality score
+    and trend), the assets are aligned on their common trading days and the
+    portfolio is simulated with simulate_portfolio_equity().
+    
+    EXPOSURE RULES:
+    - "asset": each sleeve follows the strategy profile on its own criticality
+    - "portfolio": all sleeves follow the profile on the portfolio criticality
+      (Σ weight_i × criticality_i) and trend (majority of weight above SMA200)
+    
+    COMPLIANCE: This is a BACKTESTING simulation for educational purposes only.
+    Past performance is not indicative of future results.
+    """
+    
+    def __init__(self, data: Dict[str, pd.DataFrame], weights: Dict[str, float],
+                 initial_capital: float = 10000.0, metrics: Optional[Dict[str, MetricsBundle]] = None):
+        """
+        Args:
+            data: Mapping symbol -> OHLCV DataFrame
+            weights: Mapping symbol -> target weight (same rules as
+                PortfolioInput: non-negative, sum to 1.0 ± 1e-6)
+            initial_capital: Starting portfolio value
+            metrics: Optional mapping symbol -> shared MetricsBundle
+        """
+        if not weights:
+            raise ValueError("Portfolio cannot be empty")
+        total_weight = sum(weights.values())
+        if abs(total_weight - 1.0) > 1e-6:
+            raise ValueError(f"Portfolio weights must sum to 1.0, got {total_weight:.6f}")
+        for symbol, weight in weights.items():
+            if weight < 0:
+                raise ValueError(f"Asset {symbol} has negative weight: {weight}")
+            if symbol not in data:
+                raise ValueError(f"No price data for {symbol}")
+        
+        self.symbols = list(weights)
+        self.weights = np.array([weights[s] for s in self.symbols], dtype=float)
+        self.initial_capital = initial_capital
+        metrics = metrics or {}
+        self.simulators = {
+            s: DynamicExposureSimulator(data[s], s, initial_capital, metrics.get(s)) for s in self.symbols
+        }
+        self._align()
+    
+    def _align(self):
+        """Stack returns, criticality and trend of all assets on their common days."""
+        frames = []
+        for symbol, sim in self.simulators.items():
+            if 'criticality_score' not in sim.df.columns:
+                raise ValueError(f"Insufficient data for {symbol}")
+            frames.append(sim.df)
+        
+        self.dates = frames[0].index
+        for df in frames[1:]:
+            self.dates = self.dates.intersection(df.index)
+        if len(self.dates) < 30:
+            raise ValueError("Insufficient common history for portfolio simulation")
+        
+        # Returns compound over days an asset trades but the portfolio calendar skips
+        # (e.g. crypto weekends); the first day keeps the asset's own daily return
+        growth = np.column_stack([
+            (1 + df['returns'].fillna(0)).cumprod().reindex(self.dates).to_numpy() for df in frames
+        ])
+        self.returns = np.vstack((
+            [df.loc[self.dates[0], 'returns'] for df in frames], growth[1:] / growth[:-1] - 1
+        ))
+        self.criticality = np.column_stack([df['criticality_score'].reindex(self.dates).to_numpy() for df in frames])
+        self.is_uptrend = np.column_stack([df['is_uptrend'].reindex(self.dates).to_numpy(dtype=bool) for df in frames])
+    
+    def run(self, profile: Optional[Dict[str, Any]] = None, rebalance: str = "monthly",
+            exposure_rule: str = "asset", start_date: str = None) -> Dict[str, Any]:
+        """
+        Simulate the portfolio against a fully invested portfolio with the same
+        weights and rebalancing schedule.
+        
+        Args:
+            profile: Strategy profile from strategy_profile() (default: defensive)
+            rebalance: Key of REBALANCE_FREQUENCIES
+            exposure_rule: "asset" or "portfolio"
+            start_date: Optional start date (YYYY-MM-DD)
+        
+        Returns:
+            Dictionary with 'portfolio' and 'buyhold' metrics, 'attribution'
+            (per-asset P&L, interest and fees), 'daily_data' (equity, drawdown,
+            exposure), 'sleeves', 'exposure' and 'contribution' (cumulative
+            asset P&L) as DataFrames indexed by date.
+        
+        Example:
+            >>> sim = PortfolioExposureSimulator(data, {"SPY": 0.6, "GLD": 0.4})
+            >>> result = sim.run(strategy_profile("aggressive"), rebalance="quarterly")
+            >>> result['attribution']
+        """
+        if profile is None:
+            profile = strategy_profile()
+        if exposure_rule not in ("asset", "portfolio"):
+            raise ValueError(f"Unknown exposure rule '{exposure_rule}', expected 'asset' or 'portfolio'")
+        
+        rows = slice(None)
+        if start_date:
+            rows = self.dates >= pd.to_datetime(start_date)
+        dates = self.dates[rows]
+        if len(dates) < 30:
+            raise ValueError("Insufficient data for simulation")
+        returns, criticality, is_uptrend = self.returns[rows], self.criticality[rows], self.is_uptrend[rows]
+        
+        # Target exposure per day and asset
+        if exposure_rule == "asset":
+            exposure = np.column_stack([
+                DynamicExposureSimulator._profile_exposure(
+                    pd.DataFrame({'criticality_score': criticality[:, j], 'is_uptrend': is_uptrend[:, j]}), profile)
+                for j in range(len(self.symbols))
+            ])
+        else:
+            portfolio_trend = pd.DataFrame({
+                'criticality_score': np.clip(criticality @ self.weights, 0, 100),
+                'is_uptrend': is_uptrend @ self.weights > 0.5,
+            })
+            exposure = np.repeat(DynamicExposureSimulator._profile_exposure(portfolio_trend, profile)[:, None],
+                                 len(self.symbols), axis=1)
+        
+        schedule = rebalance_schedule(dates, rebalance)
+        fee_pct = profile['trading_fee_pct']
+        daily_interest_rate = profile['interest_rate_annual'] / 365
+        soc = simulate_portfolio_equity(returns, exposure, self.weights, schedule, self.initial_capital,
+                                        fee_pct, daily_interest_rate)
+        buyhold = simulate_portfolio_equity(returns, 1.0, self.weights, schedule, self.initial_capital,
+                                            fee_pct, daily_interest_rate)
+        
+        # Invested fraction of the whole portfolio at the end of each day
+        invested_exposure = np.sum(soc['sleeves'] * exposure, axis=1) / soc['equity']
+        
+        daily = pd.DataFrame({
+            'equity': soc['equity'],
+            'buyhold_equity': buyhold['equity'],
+            'exposure': invested_exposure,
+            'rebalance_fees': soc['rebalance_fees'],
+        }, index=dates)
+        for column in ('equity', 'buyhold_equity'):
+            peak = daily[column].cummax()
+            daily[column.replace('equity', 'drawdown')] = (daily[column] - peak) / peak * 100
+        
+        attribution = pd.DataFrame({
+            'weight': self.weights,
+            'contribution': soc['contribution'].sum(axis=0),
+            'interest': soc['interest'].sum(axis=0),
+            'fees': soc['fees'].sum(axis=0),
+            'avg_exposure_pct': exposure.mean(axis=0) * 100,
+        }, index=pd.Index(self.symbols, name='symbol'))
+        attribution['contribution_pct'] = attribution['contribution'] / self.initial_capital * 100
+        
+        total_fees = float(soc['fees'].sum() + soc['rebalance_fees'].sum())
+        return {
+            'initial_capital': self.initial_capital,
+            'start_date': dates[0],
+            'end_date': dates[-1],
+            'total_days': len(dates),
+            'rebalance': rebalance,
+            'exposure_rule': exposure_rule,
+            'portfolio': {
+                **self._performance(daily['equity'], daily['drawdown']),
+                'avg_exposure_pct': invested_exposure.mean() * 100,
+                'total_fees_paid': total_fees,
+                'total_interest_earned': float(soc['interest'].sum()),
+                'trade_count': soc['trade_count'],
+                'rebalance_count': soc['rebalance_count'],
+            },
+            'buyhold': {
+                **self._performance(daily['buyhold_equity'], daily['buyhold_drawdown']),
+                'total_fees_paid': float(buyhold['rebalance_fees'].sum()),
+            },
+            'attribution': attribution,
+            'daily_data': daily,
+            'sleeves': pd.DataFrame(soc['sleeves'], index=dates, columns=self.symbols),
+            'exposure': pd.DataFrame(exposure, index=dates, columns=self.symbols),
+            'contribution': pd.DataFrame(np.cumsum(soc['contribution'], axis=0), index=dates, columns=self.symbols),
+        }
+    
+    def _performance(self, equity: pd.Series, drawdown: pd.Series) -> Dict[str, float]:
+        """Return, drawdown and volatility metrics of an equity curve (as run_simulation)."""
+        total_return_pct = (equity.iloc[-1] - self.initial_capital) / self.initial_capital * 100
+        annualized_vol = equity.pct_change().std() * np.sqrt(252) * 100
+        return {
+            'final_value': float(equity.iloc[-1]),
+            'total_return_pct': total_return_pct,
+            'max_drawdown_pct': drawdown.min(),
+            'annualized_vol': annualized_vol,
+            'sharpe_ratio': total_return_pct / annualized_vol if annualized_vol > 0 else 0,
+        }
+
+
 # =============================================================================
 # MODEL AUDIT & STRESS TEST METRICS
 # =============================================================================
 
+# Display of a "Big Short" event by protection status
+CRASH_EVENT_STATUS = {
+    "protected": ("✅", "Model was defensive before and during crash"),
+    "late": ("⚠️", "Model switched to defensive during crash"),
+    "missed": ("❌", "Model stayed fully invested"),
+}
+# A drawdown episode counts as a crash when its trough is at least this deep (%)
+CRASH_EVENT_MIN_DRAWDOWN_PCT: float = -10.0
+
+
+def drawdown_troughs(drawdown: np.ndarray) -> np.ndarray:
+    """
+    Trough of every drawdown episode (interval merging of the crash bars).
+    
+    An episode is a maximal run of bars below zero, i.e. from a peak until
+    the full recovery to it (or the end of the series); its trough is its
+    deepest bar (the first one on a flat bottom). However many intermediate
+    lows and rebounds a crash has, it yields a single trough.
+    
+    Args:
+        drawdown: Drawdown per bar (<= 0)
+    
+    Returns:
+        Sorted integer positions, one per episode
+    """
+    drawdown = np.asarray(drawdown, dtype=float)
+    in_drawdown = drawdown < 0
+    positions = np.flatnonzero(in_drawdown)
+    if len(positions) == 0:
+        return np.array([], dtype=int)
+    episode = np.cumsum(in_drawdown & ~np.concatenate(([False], in_drawdown[:-1])))[positions]
+    # Group by episode, deepest first (lexsort is stable: earliest bar on ties)
+    order = np.lexsort((drawdown[positions], episode))
+    first_of_episode = np.concatenate(([True], episode[order][1:] != episode[order][:-1]))
+    return positions[order[first_of_episode]]
+
+
+def select_crash_events(dates: pd.DatetimeIndex, drawdown: np.ndarray, candidates: np.ndarray,
+                        max_events: int = 5, min_separation_days: int = 30) -> np.ndarray:
+    """
+    Deepest candidate troughs that are at least min_separation_days apart.
+    
+    Candidates are visited from deepest to shallowest; each kept event
+    blocks the interval of +/- min_separation_days around it. A candidate is
+    tested against its two neighbours among the kept dates (searchsorted).
+    With the episode troughs of drawdown_troughs() as candidates each crash
+    contributes a single event; the gap only separates episodes split by a
+    brief recovery to the peak.
+    
+    Args:
+        dates: Bar dates
+        drawdown: Drawdown per bar
+        candidates: Positions to choose from (e.g. drawdown_troughs())
+        max_events: Maximum number of events
+        min_separation_days: Minimum calendar distance between two events
+    
+    Returns:
+        Positions of the events, deepest first
+    """
+    candidates = np.asarray(candidates, dtype=int)
+    order = candidates[np.argsort(np.asarray(drawdown, dtype=float)[candidates], kind='stable')]
+    times = dates.values.astype('datetime64[ns]').astype(np.int64)
+    gap = pd.Timedelta(days=min_separation_days).value
+    
+    kept_times = np.empty(0, dtype=np.int64)
+    events = []
+    for position in order:
+        if len(events) >= max_events:
+            break
+        time = times[position]
+        slot = np.searchsorted(kept_times, time)
+        if (slot > 0 and time - kept_times[slot - 1] < gap) or \
+           (slot < len(kept_times) and kept_times[slot] - time < gap):
+            continue
+        kept_times = np.insert(kept_times, slot, time)
+        events.append(position)
+    return np.array(events, dtype=int)
+
+
 def calculate_audit_metrics(daily_data: pd.DataFrame, strategy_mode: str = "defensive") -> Dict[str, Any]:
     """
     Calculate Model Audit & Stress Test metrics for transparency and trust.
@@ -2149,70 +5390,44 @@ def calculate_audit_metrics(daily_data: pd.DataFrame, strategy_mode: str = "defe
     # 3. BIG SHORT CHECKLIST (Top 5 Drawdown Analysis)
     # ===========================================================================
     
-    # Find the 5 worst 30-day rolling returns for Buy & Hold
-    df['rolling_30d_return'] = df['close'].pct_change(30) * 100
+    # Event detection: the trough of each drawdown episode (peak to recovery)
+    # that is deep enough to be a crash and has a 7-bar model history ending
+    # 7 days earlier, deepest first, at most one per 30-day interval
+    dates = df.index
+    drawdown = df['buyhold_drawdown'].to_numpy(dtype=float)
+    exposure = df['exposure'].to_numpy(dtype=float)
+    prior_offset = pd.Timedelta(days=7)
     
-    # Find local minima (trough points) in drawdown
-    df['is_trough'] = (df['buyhold_drawdown'] < df['buyhold_drawdown'].shift(1)) & \
-                      (df['buyhold_drawdown'] < df['buyhold_drawdown'].shift(-1))
+    troughs = drawdown_troughs(drawdown)
+    troughs = troughs[(drawdown[troughs] <= CRASH_EVENT_MIN_DRAWDOWN_PCT)
+                      & (dates.searchsorted(dates[troughs] - prior_offset, side='right') > 0)]
+    events = select_crash_events(dates, drawdown, troughs)
     
-    # Get worst drawdown points
-    worst_drawdowns = df.nsmallest(20, 'buyhold_drawdown')[['buyhold_drawdown', 'close', 'exposure']]
+    # Average exposure of the 7 bars up to 7 days before each trough (prefix sums)
+    prior_end = dates.searchsorted(dates[events] - prior_offset, side='right')
+    prior_start = np.maximum(prior_end - 7, 0)
+    exposure_sum = np.concatenate(([0.0], np.cumsum(exposure)))
+    avg_prior_exposure = (exposure_sum[prior_end] - exposure_sum[prior_start]) / (prior_end - prior_start)
+    at_trough_exposure = exposure[events]
     
-    # Group nearby points (within 30 days) and take the worst from each cluster
-    big_short_events = []
-    used_dates = set()
+    # Protection status: defensive before and during, switched during, or missed
+    status = np.select(
+        [(avg_prior_exposure < 0.8) & (at_trough_exposure < 0.5), at_trough_exposure < 0.8],
+        ["protected", "late"], default="missed"
+    )
     
-    for date, row in worst_drawdowns.iterrows():
-        # Skip if too close to already-selected event
-        skip = False
-        for used_date in used_dates:
-            if abs((date - used_date).days) < 30:
-                skip = True
-                break
-        
-        if skip:
-            continue
-        
-        used_dates.add(date)
-        
-        # Check model status 7 days prior
-        prior_date = date - pd.Timedelta(days=7)
-        prior_data = df[df.index <= prior_date].tail(7)
-        
-        if len(prior_data) > 0:
-            avg_prior_exposure = prior_data['exposure'].mean()
-            was_defensive_prior = avg_prior_exposure < 0.8
-            
-            # Check status at the trough
-            at_trough_exposure = row['exposure']
-            
-            # Determine protection status
-            if was_defensive_prior and at_trough_exposure < 0.5:
-                status = "protected"
-                emoji = "✅"
-                description = "Model was defensive before and during crash"
-            elif at_trough_exposure < 0.8:
-                status = "late"
-                emoji = "⚠️"
-                description = "Model switched to defensive during crash"
-            else:
-                status = "missed"
-                emoji = "❌"
-                description = "Model stayed fully invested"
-            
-            big_short_events.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'drawdown': round(row['buyhold_drawdown'], 1),
-                'prior_exposure': round(avg_prior_exposure * 100, 0),
-                'trough_exposure': round(at_trough_exposure * 100, 0),
-                'status': status,
-                'emoji': emoji,
-                'description': description
-            })
-        
-        if len(big_short_events) >= 5:
-            break
+    big_short_events = [
+        {
+            'date': dates[position].strftime('%Y-%m-%d'),
+            'drawdown': round(drawdown[position], 1),
+            'prior_exposure': round(prior * 100, 0),
+            'trough_exposure': round(trough * 100, 0),
+            'status': str(state),
+            'emoji': CRASH_EVENT_STATUS[state][0],
+            'description': CRASH_EVENT_STATUS[state][1]
+        }
+        for position, prior, trough, state in zip(events, avg_prior_exposure, at_trough_exposure, status)
+    ]
     
     # Sort by drawdown severity
     big_short_events = sorted(big_short_events, key=lambda x: x['drawdown'])
@@ -2235,55 +5450,59 @@ def calculate_audit_metrics(daily_data: pd.DataFrame, strategy_mode: str = "defe
     # ===========================================================================
     
     # Identify defensive phases where the asset actually rose or dropped <5%
-    false_alarms = []
-    true_alerts = []
+    # One grouped pass over the defensive phases (at least 2 days long):
+    # B&H return from first to last close and max drawdown within the phase
+    defensive = df[df['is_defensive']]
+    phase_id = defensive['defensive_phase'].to_numpy()
+    phase_peak = defensive.groupby(phase_id)['close'].cummax()
+    phases = pd.DataFrame({
+        'date': defensive.index,
+        'close': defensive['close'].to_numpy(),
+        'drawdown': ((defensive['close'] - phase_peak) / phase_peak * 100).to_numpy(),
+    }).groupby(phase_id).agg(
+        start_date=('date', 'first'), end_date=('date', 'last'), duration=('close', 'count'),
+        start_price=('close', 'first'), end_price=('close', 'last'), max_drawdown=('drawdown', 'min')
+    )
+    phases = phases[phases['duration'] >= 2]
+    phase_return = ((phases['end_price'] - phases['start_price']) / phases['start_price'] * 100).to_numpy()
     
-    for phase_id in defensive_phases.index:
-        phase_data = df[df['defensive_phase'] == phase_id]
-        
-        if len(phase_data) < 2:
-            continue
-        
-        # Calculate B&H return during this defensive phase
-        start_price = phase_data['close'].iloc[0]
-        end_price = phase_data['close'].iloc[-1]
-        phase_return = (end_price - start_price) / start_price * 100
-        
-        # Also check the max drawdown during this phase
-        phase_peak = phase_data['close'].cummax()
-        phase_drawdown = ((phase_data['close'] - phase_peak) / phase_peak * 100).min()
-        
-        phase_info = {
-            'start_date': phase_data.index[0].strftime('%Y-%m-%d'),
-            'end_date': phase_data.index[-1].strftime('%Y-%m-%d'),
-            'duration': len(phase_data),
-            'phase_return': round(phase_return, 1),
-            'max_drawdown': round(phase_drawdown, 1)
-        }
-        
-        # False alarm: price rose or dropped less than 5%
-        if phase_return >= 0 or phase_drawdown > -5:
-            false_alarms.append(phase_info)
-        else:
-            true_alerts.append(phase_info)
+    # False alarm: price rose or dropped less than 5%
+    is_false_alarm = (phase_return >= 0) | (phases['max_drawdown'].to_numpy() > -5)
+    
+    def _phase_details(mask: np.ndarray, limit: int = 5) -> List[Dict[str, Any]]:
+        """Display rows of the first `limit` phases selected by mask."""
+        rows = phases[mask].head(limit)
+        return [
+            {
+                'start_date': row.start_date.strftime('%Y-%m-%d'),
+                'end_date': row.end_date.strftime('%Y-%m-%d'),
+                'duration': int(row.duration),
+                'phase_return': round(ret, 1),
+                'max_drawdown': round(row.max_drawdown, 1)
+            }
+            for row, ret in zip(rows.itertuples(), phase_return[mask][:limit])
+        ]
     
-    total_alerts = len(false_alarms) + len(true_alerts)
-    false_alarm_rate = len(false_alarms) / total_alerts * 100 if total_alerts > 0 else 0
-    true_alert_rate = len(true_alerts) / total_alerts * 100 if total_alerts > 0 else 0
+    false_alarm_count = int(is_false_alarm.sum())
+    true_alert_count = int((~is_false_alarm).sum())
+    total_alerts = false_alarm_count + true_alert_count
+    false_alarm_rate = false_alarm_count / total_alerts * 100 if total_alerts > 0 else 0
+    true_alert_rate = true_alert_count / total_alerts * 100 if total_alerts > 0 else 0
     
     # Calculate "insurance cost" - what we paid for false alarms
     # This is the opportunity cost of being defensive when market rose
-    insurance_cost = sum(fa['phase_return'] for fa in false_alarms if fa['phase_return'] > 0)
+    false_alarm_returns = np.round(phase_return[is_false_alarm], 1)
+    insurance_cost = false_alarm_returns[false_alarm_returns > 0].sum()
     
     false_alarm_stats = {
         'total_alerts': total_alerts,
-        'false_alarms': len(false_alarms),
-        'true_alerts': len(true_alerts),
+        'false_alarms': false_alarm_count,
+        'true_alerts': true_alert_count,
         'false_alarm_rate': round(false_alarm_rate, 1),
         'true_alert_rate': round(true_alert_rate, 1),
-        'insurance_cost_pct': round(insurance_cost, 1),
-        'false_alarm_details': false_alarms[:5],  # Top 5 for display
-        'true_alert_details': true_alerts[:5]
+        'insurance_cost_pct': round(float(insurance_cost), 1),
+        'false_alarm_details': _phase_details(is_false_alarm),  # Top 5 for display
+        'true_alert_details': _phase_details(~is_false_alarm)
     }
     
     # ===========================================================================
@@ -2380,7 +5599,8 @@ def determine_market_regime(criticality: float, trend: str, volatility_percentil
 # CURRENT MARKET STATE (Real-time Query)
 # =============================================================================
 
-def get_current_market_state(df: pd.DataFrame, strategy_mode: str = "defensive") -> Dict[str, Any]:
+def get_current_market_state(df: pd.DataFrame, strategy_mode: str = "defensive",
+                             symbol: str = "", metrics: Optional[MetricsBundle] = None) -> Dict[str, Any]:
     """
     REFACTORED: Uses single source of truth compute_market_state().
     
@@ -2391,6 +5611,8 @@ def get_current_market_state(df: pd.DataFrame, strategy_mode: str = "defensive")
         strategy_mode: "defensive" or "aggressive" (exposure thresholds)
             - Defensive: Max safety (Red=20%, Yellow=50%, Bear=0%)
             - Aggressive: Max return (Red=50%, Yellow=100%, Bear=0%)
+        symbol: Asset symbol for the shared state cache (optional)
+        metrics: Shared MetricsBundle of df (optional)
     
     Returns:
         Dictionary with:
@@ -2429,13 +5651,18 @@ def get_current_market_state(df: pd.DataFrame, strategy_mode: str = "defensive")
         }
     
     try:
+        if metrics is None:
+            metrics = MetricsBundle(df, symbol)
+        
         # Use new single source of truth
-        state = compute_market_state(
+        state = cached_market_state(
             df=df,
             idx=len(df) - 1,  # Last row (current)
+            symbol=symbol,
             sma_window=200,
             vol_window=30,
-            hysteresis=0.02
+            hysteresis=0.02,
+            metrics=metrics
         )
         
         # === CALCULATE EXPOSURE BASED ON REGIME AND TREND ===
@@ -2482,7 +5709,7 @@ def get_current_market_state(df: pd.DataFrame, strategy_mode: str = "defensive")
         
         # Get current price and SMA
         current_price = float(df['close'].iloc[-1])
-        sma_200 = df['close'].rolling(window=200).mean().iloc[-1]
+        sma_200 = metrics.sma(200).iloc[-1]
         
         return {
             # Core outputs
@@ -2529,7 +5756,9 @@ def run_dca_simulation(symbol: str, initial_capital: float = 10000.0,
                        start_date: str = None, years_back: int = 10,
                        strategy_mode: str = "defensive",
                        trading_fee_pct: float = 0.005,
-                       interest_rate_annual: float = 0.03) -> Dict[str, Any]:
+                       interest_rate_annual: float = 0.03,
+                       curve_granularity: str = "monthly",
+                       curve_points: int = 500) -> Dict[str, Any]:
     """
     Run Lump Sum Investment Simulation with Dynamic Position Sizing.
     
@@ -2544,38 +5773,65 @@ def run_dca_simulation(symbol: str, initial_capital: float = 10000.0,
         strategy_mode: "defensive" (max safety) or "aggressive" (max return)
         trading_fee_pct: Fee per trade as decimal (default: 0.5%)
         interest_rate_annual: Annual cash interest rate (default: 3%)
+        curve_granularity: "daily", "weekly", "monthly" or "lttb" equity curve points
+        curve_points: Point budget per curve for curve_granularity="lttb"
         
     Returns:
         Dictionary with simulation results including:
         - summary: Key metrics (returns, drawdowns, fees, etc.)
-        - equity_curve: Monthly portfolio values
+        - equity_curve: Portfolio values at curve_granularity (default monthly)
         - daily_data: Full daily DataFrame
         - buyhold/soc_dynamic: Detailed stats for each strategy
     """
+    profile = strategy_profile(strategy_mode, trading_fee_pct=trading_fee_pct,
+                               interest_rate_annual=interest_rate_annual)
+    return run_dca_simulations(symbol, [profile], initial_capital, start_date, years_back,
+                               curve_granularity=curve_granularity, curve_points=curve_points)[0]
+
+
+def run_dca_simulations(symbol: str, profiles: List[Dict[str, Any]],
+                        initial_capital: float = 10000.0, start_date: str = None,
+                        years_back: int = 10,
+                        fetcher: Optional[DataFetcher] = None,
+                        curve_granularity: str = "monthly",
+                        curve_points: int = 500) -> List[Dict[str, Any]]:
+    """
+    Run several strategy profiles on one data load.
+    
+    Price history is loaded once through DataFetcher (cache first), the
+    simulator prepares its metrics once, and all profiles are evaluated in
+    one vectorized pass.
+    
+    Args:
+        symbol: Ticker symbol (e.g., 'AAPL', 'BTC-USD')
+        profiles: Strategy profiles as returned by strategy_profile()
+        initial_capital: Starting investment amount (default: 10000)
+        start_date: Optional simulation start date (YYYY-MM-DD)
+        years_back: Number of years of history (default: 10)
+        fetcher: DataFetcher to load the history with (default: a new one)
+        curve_granularity: "daily", "weekly", "monthly" or "lttb" equity curve points
+        curve_points: Point budget per curve for curve_granularity="lttb"
+    
+    Returns:
+        One result dictionary per profile, in order (see run_dca_simulation)
+    
+    Example:
+        >>> defensive, aggressive = run_dca_simulations(
+        ...     "SPY", [strategy_profile("defensive"), strategy_profile("aggressive")])
+    """
+    # Same data access layer as the deep dive: cached, Binance for USDT pairs,
+    # one extra year of history to warm up SMA 200 and volatility ranks
     try:
         lookback_days = years_back * 365 + 365
-        start = datetime.now() - timedelta(days=lookback_days)
+        start = (datetime.now() - timedelta(days=lookback_days)).date()
         
-        df = yf.download(symbol, start=start, progress=False, auto_adjust=True)
+        df = (fetcher or DataFetcher()).fetch_history(symbol, start=start)
         
         if df.empty:
-            return {"error": f"Could not fetch data for {symbol}"}
-        
-        if isinstance(df.columns, pd.MultiIndex):
-            try:
-                df.columns = df.columns.get_level_values(0)
-            except Exception:
-                pass
-        df.columns = [str(c).lower() for c in df.columns]
-        df.index = pd.to_datetime(df.index)
-        df.index.name = "timestamp"
-        
-        required = ["open", "high", "low", "close", "volume"]
-        available = [c for c in required if c in df.columns]
-        df = df[available]
+            return [{"error": f"Could not fetch data for {symbol}"} for _ in profiles]
         
     except Exception as e:
-        return {"error": f"Error fetching data: {str(e)}"}
+        return [{"error": f"Error fetching data: {str(e)}"} for _ in profiles]
     
     simulator = DynamicExposureSimulator(df, symbol, initial_capital)
-    return simulator.run_simulation(start_date, strategy_mode, trading_fee_pct, interest_rate_annual)
+    return simulator.run_simulations(profiles, start_date, curve_granularity, curve_points)
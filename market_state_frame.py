@@ -0,0 +1,311 @@
+"""
+Columnar Market State Storage
+
+Struct-of-arrays container for long MarketState histories.
+
+A MarketState carries a pd.Timestamp, two floats, three strings and a list of
+reason-code strings per bar - several hundred bytes each. MarketStateFrame keeps
+the same information in compact NumPy columns (24 bytes per bar):
+
+- date:                  datetime64[ns]
+- volatility, volatility_percentile: float32
+- criticality and the three components: int8 (-1 = component not available)
+- regime, trend_state:   uint8 codes (see REGIME_CODES / TREND_CODES)
+- reason_mask:           uint16 bitmask over REASON_CODES
+
+Slicing by position or date returns views (no copy), .at(i) rebuilds a
+MarketState for existing code, and frames round-trip through Arrow/Parquet.
+"""
+
+from dataclasses import dataclass, fields
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from logic import MarketState
+
+
+# =====================================================================
+# CODE TABLES
+# =====================================================================
+
+REGIME_CODES = ("GREEN", "YELLOW", "RED")
+TREND_CODES = ("UP", "DOWN", "NEUTRAL")
+
+# Bit order follows the order codes appear in MarketState.reason_codes
+# (volatility, trend, extension), so decoding preserves list order.
+REASON_CODES = (
+    "VOL_EXTREME", "VOL_HIGH", "VOL_LOW", "VOL_NORMAL",
+    "TREND_DOWN", "TREND_UP", "TREND_FLAT",
+    "EXTENSION_EXTREME", "EXTENSION_HIGH",
+)
+REASON_BITS = {code: 1 << bit for bit, code in enumerate(REASON_CODES)}
+
+MISSING_COMPONENT = -1
+
+
+def encode_reason_codes(reason_codes: List[str]) -> int:
+    """Encode a list of reason codes as a REASON_CODES bitmask."""
+    mask = 0
+    for code in reason_codes:
+        if code not in REASON_BITS:
+            raise ValueError(f"Unknown reason code: {code!r}")
+        mask |= REASON_BITS[code]
+    return mask
+
+
+def decode_reason_codes(mask: int) -> List[str]:
+    """Decode a REASON_CODES bitmask into a list of reason codes."""
+    return [code for code in REASON_CODES if mask & REASON_BITS[code]]
+
+
+def _encode_labels(values, codes: tuple, name: str) -> np.ndarray:
+    """Map label strings to their position in a code table (uint8)."""
+    encoded = pd.Categorical(values, categories=codes).codes
+    if (encoded < 0).any():
+        raise ValueError(f"Unknown {name} value(s): {sorted(set(np.asarray(values)[encoded < 0]))}")
+    return encoded.astype(np.uint8)
+
+
+def _encode_components(values) -> np.ndarray:
+    """Components as int8, MISSING_COMPONENT where None/NaN."""
+    series = pd.Series(values, dtype="float64")
+    return series.fillna(MISSING_COMPONENT).to_numpy().astype(np.int8)
+
+
+def _decode_components(values: np.ndarray):
+    """Components as int64, or nullable Int64 if any are missing."""
+    missing = values == MISSING_COMPONENT
+    if not missing.any():
+        return values.astype(np.int64)
+    return pd.array(np.where(missing, None, values.astype(np.int64)), dtype="Int64")
+
+
+# =====================================================================
+# MARKET STATE FRAME
+# =====================================================================
+
+@dataclass
+class MarketStateFrame:
+    """
+    Columnar history of MarketState observations for one asset.
+
+    All columns are NumPy arrays of equal length in chronological order.
+    Build one with from_states_df() (output of compute_market_states()) or
+    from_states() (list of MarketState).
+
+    Note: volatility and volatility_percentile are stored as float32, so
+    .at(i) returns these two fields rounded to float32 precision. Regime,
+    trend, criticality, components and reason codes are exact.
+    """
+    date: np.ndarray
+    volatility: np.ndarray
+    volatility_percentile: np.ndarray
+    criticality: np.ndarray
+    volatility_component: np.ndarray
+    trend_component: np.ndarray
+    extension_component: np.ndarray
+    regime: np.ndarray
+    trend_state: np.ndarray
+    reason_mask: np.ndarray
+
+    # -----------------------------------------------------------------
+    # Construction
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def from_states_df(cls, states: pd.DataFrame) -> "MarketStateFrame":
+        """
+        Build a frame from the DataFrame returned by compute_market_states().
+
+        Args:
+            states: DataFrame indexed by date with one column per MarketState field
+
+        Returns:
+            MarketStateFrame with the same rows
+        """
+        mask_by_codes = {}
+        reason_mask = np.empty(len(states), dtype=np.uint16)
+        for i, codes in enumerate(states['reason_codes']):
+            key = tuple(codes)
+            if key not in mask_by_codes:
+                mask_by_codes[key] = encode_reason_codes(codes)
+            reason_mask[i] = mask_by_codes[key]
+
+        return cls(
+            date=pd.DatetimeIndex(states.index).to_numpy(dtype="datetime64[ns]"),
+            volatility=states['volatility'].to_numpy(dtype=np.float32),
+            volatility_percentile=states['volatility_percentile'].to_numpy(dtype=np.float32),
+            criticality=states['criticality'].to_numpy().astype(np.int8),
+            volatility_component=_encode_components(states['volatility_component']),
+            trend_component=_encode_components(states['trend_component']),
+            extension_component=_encode_components(states['extension_component']),
+            regime=_encode_labels(states['regime'], REGIME_CODES, "regime"),
+            trend_state=_encode_labels(states['trend_state'], TREND_CODES, "trend_state"),
+            reason_mask=reason_mask,
+        )
+
+    @classmethod
+    def from_states(cls, states: List[MarketState]) -> "MarketStateFrame":
+        """
+        Build a frame from a chronological list of MarketState objects.
+
+        Args:
+            states: List of MarketState
+
+        Returns:
+            MarketStateFrame with one row per state
+        """
+        states_df = pd.DataFrame(
+            [{f.name: getattr(s, f.name) for f in fields(MarketState)} for s in states],
+            columns=[f.name for f in fields(MarketState)],
+        )
+        return cls.from_states_df(states_df.set_index('date'))
+
+    # -----------------------------------------------------------------
+    # Access
+    # -----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def __getitem__(self, key: Union[slice, np.ndarray]) -> "MarketStateFrame":
+        """
+        Row selection on every column.
+
+        A slice returns views of the underlying arrays (zero-copy); a boolean
+        mask or index array returns a copy (NumPy fancy indexing).
+        """
+        if isinstance(key, (int, np.integer)):
+            raise TypeError("Use .at(i) to get a single MarketState")
+        return MarketStateFrame(**{f.name: getattr(self, f.name)[key] for f in fields(self)})
+
+    def between(self, start=None, end=None) -> "MarketStateFrame":
+        """
+        Zero-copy slice of the rows with start <= date <= end.
+
+        Args:
+            start: First date to include (default: beginning)
+            end: Last date to include (default: end)
+        """
+        lo = 0 if start is None else np.searchsorted(self.date, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = len(self) if end is None else np.searchsorted(self.date, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return self[lo:hi]
+
+    def at(self, i: int) -> MarketState:
+        """
+        Rebuild the MarketState of row i (negative indices allowed).
+
+        Returns:
+            MarketState with the stored values (see class note on float32)
+        """
+        components = [
+            None if c == MISSING_COMPONENT else int(c)
+            for c in (self.volatility_component[i], self.trend_component[i], self.extension_component[i])
+        ]
+        return MarketState(
+            date=pd.Timestamp(self.date[i]),
+            volatility=float(self.volatility[i]),
+            volatility_percentile=float(self.volatility_percentile[i]),
+            trend_state=TREND_CODES[self.trend_state[i]],
+            criticality=int(self.criticality[i]),
+            regime=REGIME_CODES[self.regime[i]],
+            reason_codes=decode_reason_codes(int(self.reason_mask[i])),
+            volatility_component=components[0],
+            trend_component=components[1],
+            extension_component=components[2],
+        )
+
+    def to_list(self) -> List[MarketState]:
+        """All rows as MarketState objects."""
+        return [self.at(i) for i in range(len(self))]
+
+    def regime_labels(self) -> np.ndarray:
+        """Regime column decoded to strings."""
+        return np.asarray(REGIME_CODES)[self.regime]
+
+    def trend_labels(self) -> np.ndarray:
+        """Trend column decoded to strings."""
+        return np.asarray(TREND_CODES)[self.trend_state]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Decode into the DataFrame layout of compute_market_states().
+
+        Returns:
+            DataFrame indexed by date with one column per MarketState field
+        """
+        unique_masks, inverse = np.unique(self.reason_mask, return_inverse=True)
+        decoded = [decode_reason_codes(int(m)) for m in unique_masks]
+
+        return pd.DataFrame({
+            'volatility': self.volatility.astype(np.float64),
+            'volatility_percentile': self.volatility_percentile.astype(np.float64),
+            'trend_state': self.trend_labels(),
+            'criticality': self.criticality.astype(np.int64),
+            'regime': self.regime_labels(),
+            'reason_codes': [list(decoded[k]) for k in inverse],
+            'volatility_component': _decode_components(self.volatility_component),
+            'trend_component': _decode_components(self.trend_component),
+            'extension_component': _decode_components(self.extension_component),
+        }, index=pd.DatetimeIndex(self.date, name='date'))
+
+    @property
+    def nbytes(self) -> int:
+        """Total memory of all columns in bytes."""
+        return sum(getattr(self, f.name).nbytes for f in fields(self))
+
+    # -----------------------------------------------------------------
+    # Arrow / Parquet
+    # -----------------------------------------------------------------
+
+    def to_arrow(self) -> pa.Table:
+        """
+        Convert to an Arrow table (primitive columns are zero-copy).
+
+        The code tables are stored in the schema metadata so files stay
+        self-describing.
+        """
+        table = pa.table({f.name: getattr(self, f.name) for f in fields(self)})
+        return table.replace_schema_metadata({
+            b"regime_codes": ",".join(REGIME_CODES).encode(),
+            b"trend_codes": ",".join(TREND_CODES).encode(),
+            b"reason_codes": ",".join(REASON_CODES).encode(),
+        })
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "MarketStateFrame":
+        """
+        Build a frame from an Arrow table written by to_arrow().
+
+        Raises:
+            ValueError: If the table was written with different code tables
+        """
+        metadata = table.schema.metadata or {}
+        expected = {
+            b"regime_codes": REGIME_CODES,
+            b"trend_codes": TREND_CODES,
+            b"reason_codes": REASON_CODES,
+        }
+        for key, codes in expected.items():
+            if key in metadata and tuple(metadata[key].decode().split(",")) != codes:
+                raise ValueError(f"Incompatible {key.decode()} in table: {metadata[key].decode()}")
+
+        columns = {}
+        for f in fields(cls):
+            column = table.column(f.name).combine_chunks()
+            columns[f.name] = column.to_numpy(zero_copy_only=False)
+        columns['date'] = columns['date'].astype("datetime64[ns]")
+        return cls(**columns)
+
+    def to_parquet(self, path) -> None:
+        """Write the frame to a Parquet file."""
+        pq.write_table(self.to_arrow(), path)
+
+    @classmethod
+    def read_parquet(cls, path) -> "MarketStateFrame":
+        """Read a frame written by to_parquet()."""
+        return cls.from_arrow(pq.read_table(path))
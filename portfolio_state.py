@@ -17,9 +17,11 @@ Delivers exactly FOUR things:
 """
 
 from dataclasses import dataclass
-from typing import List, Literal, Optional
+from typing import Iterable, List, Literal, Optional, Tuple
+import numpy as np
 import pandas as pd
 from logic import MarketState
+from market_state_frame import MarketStateFrame
 
 
 # =====================================================================
@@ -383,13 +385,68 @@ def compute_portfolio_time_series(
     # Sort dates chronologically
     sorted_dates = sorted(asset_states_by_date.keys())
     
+    return _portfolio_time_series(
+        ((date, asset_states_by_date[date]) for date in sorted_dates),
+        weights
+    )
+
+
+def compute_portfolio_time_series_from_frames(
+    state_frames: dict[str, MarketStateFrame],
+    weights: dict[str, float]
+) -> List[PortfolioState]:
+    """
+    Compute portfolio states over time from columnar asset histories.
+    
+    Same result as compute_portfolio_time_series(), but reads the asset states
+    from MarketStateFrame columns and materializes MarketState objects for one
+    date at a time instead of holding a nested dict for the whole history.
+    
+    Only dates on which every weighted asset has a state are used.
+    
+    Args:
+        state_frames: Dict mapping symbol -> MarketStateFrame
+        weights: Dict mapping symbol -> weight (must sum to 1.0)
+    
+    Returns:
+        List of PortfolioState objects, one per common date, sorted chronologically
+    
+    Example:
+        >>> frames = {
+        ...     "SPY": MarketStateFrame.from_states_df(compute_market_states(spy_df)),
+        ...     "QQQ": MarketStateFrame.from_states_df(compute_market_states(qqq_df))
+        ... }
+        >>> pf_states = compute_portfolio_time_series_from_frames(frames, {"SPY": 0.6, "QQQ": 0.4})
+    """
+    symbols = list(weights.keys())
+    common_dates = state_frames[symbols[0]].date
+    for symbol in symbols[1:]:
+        common_dates = np.intersect1d(common_dates, state_frames[symbol].date)
+    
+    positions = {
+        symbol: np.searchsorted(state_frames[symbol].date, common_dates)
+        for symbol in symbols
+    }
+    
+    return _portfolio_time_series(
+        (
+            (pd.Timestamp(date), {symbol: state_frames[symbol].at(positions[symbol][i]) for symbol in symbols})
+            for i, date in enumerate(common_dates)
+        ),
+        weights
+    )
+
+
+def _portfolio_time_series(
+    dated_states: Iterable[Tuple[pd.Timestamp, dict[str, MarketState]]],
+    weights: dict[str, float]
+) -> List[PortfolioState]:
+    """Run compute_portfolio_state() over chronological (date, states) pairs with hysteresis."""
     portfolio_states = []
     previous_regime = None
     confirmation_count = 0
     
-    for date in sorted_dates:
-        asset_states = asset_states_by_date[date]
-        
+    for date, asset_states in dated_states:
         # Build portfolio input
         assets = [
             AssetInput(symbol, weights[symbol], asset_states[symbol])
@@ -413,4 +470,3 @@ def compute_portfolio_time_series(
         previous_regime = pf_state.portfolio_regime
     
     return portfolio_states
-
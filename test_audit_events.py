@@ -0,0 +1,153 @@
+"""
+Test for the crash-event detection stage of calculate_audit_metrics().
+
+Verifies that drawdown_troughs() finds the deepest bar of each drawdown
+episode, that select_crash_events() equals the greedy scan against all kept
+dates, that each reported crash is its own episode, that the false-alarm
+statistics equal the per-phase loop, and that the audit of a long intraday
+history stays fast.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from logic import (CRASH_EVENT_MIN_DRAWDOWN_PCT, DynamicExposureSimulator, calculate_audit_metrics,
+                   drawdown_troughs, select_crash_events)
+from testdata import load_cached
+
+
+def _reference_troughs(drawdown):
+    """Bar-by-bar scan: deepest bar of every run below zero."""
+    troughs, best = [], None
+    for position, value in enumerate(drawdown):
+        if value < 0:
+            if best is None or value < drawdown[best]:
+                best = position
+        elif best is not None:
+            troughs.append(best)
+            best = None
+    return troughs + ([best] if best is not None else [])
+
+
+def _reference_events(dates, drawdown, candidates, max_events=5, min_separation_days=30):
+    """Greedy scan: deepest first, skip anything within the gap of a kept date."""
+    kept = []
+    for position in sorted(candidates, key=lambda p: drawdown[p]):
+        if any(abs(dates[position] - dates[k]) < pd.Timedelta(days=min_separation_days) for k in kept):
+            continue
+        kept.append(position)
+        if len(kept) == max_events:
+            break
+    return kept
+
+
+def _reference_false_alarms(daily):
+    """Per-phase loop over defensive phases (exposure < 100%)."""
+    is_defensive = daily['exposure'] < 1.0
+    phase = (is_defensive != is_defensive.shift()).cumsum()
+    false_alarms, true_alerts = [], []
+    for phase_id in phase[is_defensive].unique():
+        close = daily['close'][(phase == phase_id) & is_defensive]
+        if len(close) < 2:
+            continue
+        phase_return = (close.iloc[-1] - close.iloc[0]) / close.iloc[0] * 100
+        drawdown = ((close - close.cummax()) / close.cummax() * 100).min()
+        info = {
+            'start_date': close.index[0].strftime('%Y-%m-%d'),
+            'end_date': close.index[-1].strftime('%Y-%m-%d'),
+            'duration': len(close),
+            'phase_return': round(phase_return, 1),
+            'max_drawdown': round(drawdown, 1),
+        }
+        (false_alarms if phase_return >= 0 or drawdown > -5 else true_alerts).append(info)
+    return false_alarms, true_alerts
+
+
+def test_troughs_and_selection():
+    """One trough per episode; the selection equals the greedy scan."""
+    print("=" * 70)
+    print("AUDIT EVENT DETECTION TEST")
+    print("=" * 70)
+
+    drawdown = np.array([0.0, -1.0, -3.0, -2.0, -2.0, -4.0, -4.0, -1.0, 0.0, -0.5])
+    assert list(drawdown_troughs(drawdown)) == [5, 9]
+    assert list(drawdown_troughs(np.zeros(5))) == []
+
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range("2000-01-03", periods=4000)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.015, len(dates))))
+    drawdown = (close / np.maximum.accumulate(close) - 1) * 100
+    troughs = drawdown_troughs(drawdown)
+    assert list(troughs) == _reference_troughs(drawdown)
+    for max_events, gap in [(5, 30), (12, 10), (3, 365)]:
+        got = select_crash_events(dates, drawdown, troughs, max_events, gap)
+        assert list(got) == _reference_events(dates, drawdown, troughs, max_events, gap), (max_events, gap)
+    assert drawdown[select_crash_events(dates, drawdown, troughs)[0]] == drawdown.min()
+    print(f"✓ {len(troughs)} troughs, selection equals the greedy scan")
+    return True
+
+
+def test_audit_report():
+    """False alarms equal the phase loop; every event is a separate crash episode."""
+    for symbol in ["BTC-USD", "SPY", "TSLA", "BTCUSDT"]:
+        daily = DynamicExposureSimulator(load_cached(symbol), symbol).run_simulation()['daily_data']
+        audit = calculate_audit_metrics(daily)
+        false_alarms, true_alerts = _reference_false_alarms(daily)
+
+        stats = audit['false_alarms']
+        assert stats['false_alarms'] == len(false_alarms) and stats['true_alerts'] == len(true_alerts)
+        assert stats['false_alarm_details'] == false_alarms[:5]
+        assert stats['true_alert_details'] == true_alerts[:5]
+        assert np.isclose(stats['insurance_cost_pct'],
+                          round(sum(f['phase_return'] for f in false_alarms if f['phase_return'] > 0), 1))
+
+        events = audit['big_short']['events']
+        dates = sorted(pd.to_datetime([e['date'] for e in events]))
+        assert 1 <= len(events) <= 5
+        assert all(e['drawdown'] <= CRASH_EVENT_MIN_DRAWDOWN_PCT for e in events)
+        # A full recovery to the peak lies between any two reported crashes
+        assert all((daily['buyhold_drawdown'][a:b] >= 0).any() for a, b in zip(dates, dates[1:]))
+        assert events[0]['drawdown'] == round(daily['buyhold_drawdown'].min(), 1)
+        print(f"✓ {symbol}: {stats['total_alerts']} alerts, worst crash {events[0]['date']}")
+    return True
+
+
+def test_long_intraday_history():
+    """An hourly history of 20 years is audited in well under a second."""
+    rng = np.random.default_rng(9)
+    index = pd.date_range("2005-01-01", periods=175_000, freq="h")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, len(index))))
+    equity = close / close[0] * 10000
+    daily = pd.DataFrame({
+        'close': close,
+        'sma_200': pd.Series(close).rolling(200, min_periods=1).mean().to_numpy(),
+        'criticality_score': rng.uniform(0, 100, len(index)),
+        'exposure': np.repeat(rng.choice([0.0, 0.5, 1.0], len(index) // 100 + 1), 100)[:len(index)],
+        'buyhold_equity': equity,
+        'soc_equity': equity,
+        'buyhold_drawdown': (equity / np.maximum.accumulate(equity) - 1) * 100,
+    }, index=index)
+
+    start = time.perf_counter()
+    audit = calculate_audit_metrics(daily)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert len(audit['big_short']['events']) == 5 and elapsed_ms < 2000, elapsed_ms
+    print(f"✓ {len(daily)} hourly bars audited in {elapsed_ms:.0f} ms")
+    return True
+
+
+def main():
+    """Run the audit event detection tests."""
+    results = [
+        test_troughs_and_selection(),
+        test_audit_report(),
+        test_long_intraday_history(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
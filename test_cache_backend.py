@@ -0,0 +1,127 @@
+"""
+Test for the pluggable cache backends of DataFetcher.
+
+Verifies that the Feather backend round-trips the cached CSVs exactly with
+typed columns and a datetime64 index, that its memory-mapped frames are
+zero-copy and read-only, that legacy CSV caches are migrated (lazily by
+DataFetcher and in one shot by migrate_csv_cache()), and that a read is
+sub-millisecond.
+
+Uses the cached CSVs in data/ (copied to a temporary cache directory) so the
+test runs without network access.
+"""
+
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from logic import (CsvCacheBackend, DataFetcher, DataProvider, FeatherCacheBackend,
+                   migrate_csv_cache)
+from testdata import cached_path, load_cached
+
+SYMBOLS = ["BTC-USD", "SPY", "TSLA", "ETHUSDT"]
+
+
+class _NoNetworkProvider(DataProvider):
+    """Fails every fetch, so only cached data can be returned."""
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        raise AssertionError(f"Provider called for {symbol}")
+
+    def fetch_info(self, symbol):
+        return {"name": symbol}
+
+
+def test_feather_round_trip():
+    """Feather files hold exactly the CSV values with typed columns."""
+    print("=" * 70)
+    print("CACHE BACKEND TEST")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for symbol in SYMBOLS:
+            df = load_cached(symbol)
+            path = Path(tmp) / f"{symbol}.feather"
+            FeatherCacheBackend().write(df, path)
+
+            loaded = FeatherCacheBackend().read(path)
+            assert loaded.equals(df) and loaded.index.name == df.index.name, symbol
+            assert isinstance(loaded.index, pd.DatetimeIndex)
+            assert not loaded['close'].to_numpy().flags.writeable
+
+            writable = FeatherCacheBackend(zero_copy=False).read(path)
+            writable.iloc[0, 0] = 0.0
+
+            FeatherCacheBackend(float_dtype=np.float32).write(df, path)
+            compact = FeatherCacheBackend().read(path)
+            assert compact['close'].dtype == np.float32
+            assert np.allclose(compact['close'], df['close'], rtol=1e-6)
+        assert not list(Path(tmp).glob("*.tmp"))
+    print(f"✓ {len(SYMBOLS)} symbols round-trip exactly, float32 option halves the columns")
+    return True
+
+
+def test_lazy_and_bulk_migration():
+    """DataFetcher converts a legacy CSV on first read; the bulk migration is idempotent."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for symbol in SYMBOLS:
+            shutil.copy(cached_path(symbol), tmp)
+
+        fetcher = DataFetcher()
+        fetcher.cache_dir = Path(tmp)
+        fetcher.yfinance = fetcher.binance = _NoNetworkProvider()
+        df = fetcher.fetch_data("SPY")
+        assert df.equals(load_cached("SPY"))
+        assert fetcher._get_cache_path("SPY").suffix == ".feather" and fetcher._get_cache_path("SPY").exists()
+
+        written = migrate_csv_cache(tmp, remove_csv=True)
+        assert sorted(p.name for p in written) == sorted(f"{s}_1d_cached.feather" for s in SYMBOLS if s != "SPY")
+        assert migrate_csv_cache(tmp) == []
+        assert sorted(p.suffix for p in Path(tmp).glob("*_cached.*")) == [".csv"] + [".feather"] * len(SYMBOLS)
+
+        csv_fetcher = DataFetcher(cache_backend=CsvCacheBackend())
+        csv_fetcher.cache_dir = Path(tmp)
+        csv_fetcher.yfinance = csv_fetcher.binance = _NoNetworkProvider()
+        assert csv_fetcher.fetch_data("SPY").equals(df)
+    print(f"✓ SPY migrated on read, {len(written)} CSVs migrated in one shot")
+    return True
+
+
+def test_read_speed():
+    """A Feather read is sub-millisecond and faster than parsing the CSV."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "BTC-USD.feather"
+        FeatherCacheBackend().write(load_cached("BTC-USD"), path)
+        csv_path = cached_path("BTC-USD")
+
+        timings = {}
+        for name, read in [("feather", lambda: FeatherCacheBackend().read(path)),
+                           ("csv", lambda: CsvCacheBackend().read(csv_path))]:
+            batches = []
+            for _ in range(5):
+                start = time.perf_counter()
+                for _ in range(20):
+                    read()
+                batches.append((time.perf_counter() - start) / 20 * 1000)
+            timings[name] = min(batches)
+
+    assert timings["feather"] < 1.0 and timings["feather"] < timings["csv"], timings
+    print(f"✓ Read BTC-USD in {timings['feather']:.2f} ms (CSV {timings['csv']:.2f} ms)")
+    return True
+
+
+def main():
+    """Run the cache backend tests."""
+    results = [
+        test_feather_round_trip(),
+        test_lazy_and_bulk_migration(),
+        test_read_speed(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,202 @@
+"""
+Test for the cache manifest maintained by DataFetcher.
+
+Verifies that every cache write records the fetch time, range, row count,
+provider and checksum of the file, that a history shorter than requested is
+marked incomplete (also after a top-up), that entries of files changed behind
+the manifest's back are not trusted, that freshness checks and staleness
+reports are served from the manifest without parsing the files, and that
+eviction removes expired files and their entries.
+
+Uses the cached CSVs in data/ (written to a temporary cache directory) and
+an in-memory provider, so the test runs without network access.
+"""
+
+import hashlib
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+from logic import (CACHE_MANIFEST_FILENAME, CACHE_SCHEMA_VERSION, CacheManifest, DataFetcher,
+                   DataProvider, FeatherCacheBackend, latest_session_date, migrate_csv_cache)
+from testdata import cached_path, load_cached
+
+
+class _FrameProvider(DataProvider):
+    """Serves fixed frames per symbol."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        return self.frames[symbol]
+
+    def fetch_info(self, symbol):
+        return {"name": symbol}
+
+
+class _TailProvider(_FrameProvider):
+    """Serves the requested lookback of fixed frames (at most what they hold)."""
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        df = self.frames[symbol]
+        return df[df.index >= df.index[-1] - pd.Timedelta(days=lookback_days)]
+
+
+class _CountingBackend(FeatherCacheBackend):
+    """Feather backend that counts file reads."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def read(self, path):
+        self.reads += 1
+        return super().read(path)
+
+
+def _fetcher(tmp: str, frames) -> DataFetcher:
+    """DataFetcher on a temporary cache directory without network access."""
+    fetcher = DataFetcher(cache_backend=_CountingBackend(), auto_refresh=False)
+    fetcher.cache_dir = Path(tmp)
+    fetcher.yfinance = fetcher.binance = _FrameProvider(frames)
+    return fetcher
+
+
+def test_fetch_records_entry():
+    """A fetch records range, rows, provider and checksum; foreign writes are not trusted."""
+    print("=" * 70)
+    print("CACHE MANIFEST TEST")
+    print("=" * 70)
+
+    spy = load_cached("SPY")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, {"SPY": spy})
+        fetcher.fetch_data("SPY")
+        path = fetcher._get_cache_path("SPY")
+
+        entry = fetcher.manifest.get(path)
+        assert entry["symbol"] == "SPY" and entry["provider"] == "_FrameProvider"
+        assert entry["rows"] == len(spy) and entry["complete"]
+        assert pd.Timestamp(entry["first_bar"]) == spy.index[0]
+        assert pd.Timestamp(entry["last_bar"]) == spy.index[-1]
+        assert entry["schema_version"] == CACHE_SCHEMA_VERSION
+        assert entry["content_hash"] == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert fetcher.manifest.verify(path)
+        assert CacheManifest(tmp).get(path) == entry   # Persisted
+
+        # Written behind the manifest's back: entry ignored until re-recorded
+        fetcher.cache_backend.write(spy.iloc[:-10], path)
+        assert fetcher.manifest.get(path) is None and not fetcher.manifest.verify(path)
+        assert len(fetcher.fetch_data("SPY")) == len(spy) - 10
+        assert fetcher.manifest.get(path)["rows"] == len(spy) - 10
+
+        # Unreadable manifest: starts empty and is rebuilt
+        (Path(tmp) / CACHE_MANIFEST_FILENAME).write_text("{not json")
+        assert CacheManifest(tmp).get(path) is None
+    print(f"✓ SPY recorded: {entry['rows']} rows {entry['first_bar'][:10]} .. {entry['last_bar'][:10]}")
+    return True
+
+
+def test_complete_flag():
+    """Complete only when the history reaches back to the requested start."""
+    spy, eth = load_cached("SPY"), load_cached("ETHUSDT")
+    listed = eth.iloc[-300:]   # Recent listing: much shorter than the lookback
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, {"SPY": spy, "ETHUSDT": listed})
+        fetcher.fetch_data("SPY")
+        fetcher.fetch_data("ETHUSDT")
+        spy_entry = fetcher.manifest.get(fetcher._get_cache_path("SPY"))
+        eth_entry = fetcher.manifest.get(fetcher._get_cache_path("ETHUSDT"))
+        assert spy_entry["complete"] is True and eth_entry["complete"] is False
+        assert pd.Timestamp(eth_entry["requested_start"]) < listed.index[0]
+
+        # A top-up keeps the requested start (and thus the flag)
+        fetcher.yfinance = fetcher.binance = _TailProvider({"ETHUSDT": listed})
+        fetcher._refresh("ETHUSDT", listed.iloc[:-5])
+        refreshed = fetcher.manifest.get(fetcher._get_cache_path("ETHUSDT"))
+        assert refreshed["requested_start"] == eth_entry["requested_start"] and refreshed["complete"] is False
+
+        # Recorded without a request (e.g. migrated): unknown
+        path = Path(tmp) / "OTHER.feather"
+        fetcher.cache_backend.write(spy, path)
+        assert fetcher.manifest.record(path, "OTHER", spy)["complete"] is None
+        report = fetcher.manifest.report().set_index("symbol")
+        assert report["complete"].to_dict() == {"ETHUSDT": False, "OTHER": None, "SPY": True}
+    print("✓ Full history complete, recent listing incomplete, unrequested unknown")
+    return True
+
+
+def test_freshness_without_parsing():
+    """is_stale() and report() answer from the manifest alone."""
+    fetched = datetime(2026, 1, 14, 12, tzinfo=timezone.utc)   # Mid-day: no session closes in the next hours
+    btc = load_cached("BTC-USD")
+    current = btc.copy()
+    current.index = current.index + (pd.Timestamp(latest_session_date("BTC-USD", fetched)) - btc.index[-1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, {})
+        fetcher._store("BTC-USD", current, fetcher.binance, fetched_at=fetched)
+        fetcher._store("SPY", load_cached("SPY"), fetcher.yfinance, fetched_at=fetched)
+        reads = fetcher.cache_backend.reads
+
+        now = fetched + timedelta(minutes=5)
+        assert not fetcher.is_stale("BTC-USD", now=now)
+        assert not fetcher.is_stale("SPY", now=now)   # Just fetched: retried later
+        later = fetched + timedelta(hours=2)
+        assert fetcher.is_stale("SPY", now=later) and not fetcher.is_stale("BTC-USD", now=later)
+        assert fetcher.is_stale("ETH-USD", now=later)   # Nothing cached
+
+        report = fetcher.manifest.report(now=later)
+        assert list(report["symbol"]) == ["BTC-USD", "SPY"]
+        assert list(report["is_stale"]) == [False, True]
+        assert list(report["asset_class"]) == ["crypto", "equity"]
+        assert (report["age_hours"] == 2).all()
+        assert fetcher.cache_backend.reads == reads
+    print("✓ Freshness and staleness report served without reading cache files")
+    return True
+
+
+def test_evict_and_migration():
+    """Eviction drops expired files and entries; migrated CSVs are recorded."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for symbol in ["SPY", "TSLA", "ETHUSDT"]:
+            shutil.copy(cached_path(symbol), tmp)
+        written = migrate_csv_cache(tmp)
+
+        manifest = CacheManifest(tmp)
+        report = manifest.report()
+        assert sorted(report["symbol"]) == ["ETHUSDT", "SPY", "TSLA"]
+        for path in written:
+            fetched_at = manifest.last_fetch_time(path)
+            csv_path = path.with_suffix(".csv")
+            assert abs(fetched_at.timestamp() - csv_path.stat().st_mtime) < 1e-3
+
+        fetcher = _fetcher(tmp, {"SPY": load_cached("SPY")})
+        fetcher.cache_backend.write(load_cached("SPY"), fetcher._get_cache_path("SPY"))
+        fetcher.manifest.record(fetcher._get_cache_path("SPY"), "SPY", load_cached("SPY"),
+                                fetched_at=datetime.now(timezone.utc) - timedelta(days=40))
+
+        evicted = CacheManifest(tmp).evict(max_age_days=30)
+        assert evicted == ["SPY"]
+        assert not fetcher._get_cache_path("SPY").exists()
+        assert sorted(CacheManifest(tmp).report()["symbol"]) == ["ETHUSDT", "TSLA"]
+    print(f"✓ {len(written)} migrated files recorded, 1 expired file evicted")
+    return True
+
+
+def main():
+    """Run the cache manifest tests."""
+    results = [
+        test_fetch_records_entry(),
+        test_complete_flag(),
+        test_freshness_without_parsing(),
+        test_evict_and_migration(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
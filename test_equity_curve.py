@@ -0,0 +1,126 @@
+"""
+Test for the simulation equity curve points.
+
+Verifies that the grouped month-end extraction equals the former
+per-month scan, that daily and weekly granularities return one point per
+day/week, and that the LTTB curve is chosen like the reference bucket loop
+and keeps the extremes of every plotted curve on dates shared by all
+profiles of a run.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import numpy as np
+import pandas as pd
+from logic import DynamicExposureSimulator, equity_curve_snapshots, lttb_indices, strategy_profile
+from testdata import load_cached
+
+
+def _reference_monthly(df):
+    """Month-by-month scan of the daily frame (last trading day of each month)."""
+    year_month = df.index.to_period('M')
+    snapshots = []
+    for period in year_month.unique():
+        last_day = df[year_month == period].iloc[-1]
+        snapshots.append({
+            'date': last_day.name,
+            'buyhold_value': last_day['buyhold_equity'],
+            'soc_value': last_day['soc_equity'],
+            'exposure': last_day['exposure'] * 100,
+            'criticality': last_day['criticality_score'],
+        })
+    return pd.DataFrame(snapshots)
+
+
+def _reference_lttb(values, max_points):
+    """Point-by-point LTTB over the same buckets."""
+    n = len(values)
+    bounds = [k * (n - 2) // (max_points - 2) + 1 for k in range(max_points - 1)] + [n]
+    selected, anchor = [0], 0
+    for bucket in range(max_points - 2):
+        following = range(bounds[bucket + 1], bounds[bucket + 2] if bucket + 2 < len(bounds) else n)
+        avg_x = sum(following) / len(following)
+        avg_y = sum(values[j] for j in following) / len(following)
+        best, best_area = None, -1.0
+        for j in range(bounds[bucket], bounds[bucket + 1]):
+            area = abs((anchor - avg_x) * (values[j] - values[anchor]) - (anchor - j) * (avg_y - values[anchor]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        anchor = best
+    return selected + [n - 1]
+
+
+def test_monthly_matches_scan():
+    """Default curve equals the month-by-month scan."""
+    print("=" * 70)
+    print("EQUITY CURVE TEST")
+    print("=" * 70)
+
+    for symbol in ["BTC-USD", "SPY"]:
+        result = DynamicExposureSimulator(load_cached(symbol), symbol).run_simulation()
+        daily = result['daily_data']
+        assert result['equity_curve'].equals(_reference_monthly(daily)), symbol
+        print(f"✓ {symbol}: {len(result['equity_curve'])} month-end points identical")
+    return True
+
+
+def test_daily_and_weekly():
+    """Daily keeps every row, weekly the last trading day of each week."""
+    daily = DynamicExposureSimulator(load_cached("SPY"), "SPY").run_simulation()['daily_data']
+
+    everything = equity_curve_snapshots(daily, "daily")
+    assert len(everything) == len(daily) and everything['date'].equals(pd.Series(daily.index, name='date'))
+
+    weekly = equity_curve_snapshots(daily, "weekly")
+    weeks = daily.index.to_period('W')
+    assert len(weekly) == weeks.nunique()
+    assert list(weekly['date']) == [daily.index[weeks == w][-1] for w in weeks.unique()]
+
+    try:
+        equity_curve_snapshots(daily, "hourly")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unknown granularity accepted")
+    print(f"✓ {len(everything)} daily and {len(weekly)} weekly points")
+    return True
+
+
+def test_lttb_bounded():
+    """LTTB matches the reference loop and keeps each curve's extremes on shared dates."""
+    rng = np.random.default_rng(5)
+    values = np.cumsum(rng.normal(0, 1, 3000))
+    for max_points in [3, 10, 257, 1000]:
+        assert list(lttb_indices(values, max_points)) == _reference_lttb(values, max_points), max_points
+    assert list(lttb_indices(values[:50], 100)) == list(range(50))
+
+    df = pd.concat([load_cached("BTC-USD")] * 4)
+    df.index = pd.date_range("1995-01-01", periods=len(df))
+    defensive, aggressive = DynamicExposureSimulator(df, "BTC-USD").run_simulations(
+        [strategy_profile("defensive"), strategy_profile("aggressive")], curve_granularity="lttb", curve_points=400)
+    curve, daily = defensive['equity_curve'], defensive['daily_data']
+    assert 400 <= len(curve) <= 3 * 400
+    assert curve['date'].iloc[0] == daily.index[0] and curve['date'].iloc[-1] == daily.index[-1]
+    assert curve['date'].is_monotonic_increasing and curve['date'].equals(aggressive['equity_curve']['date'])
+    # Every plotted curve keeps its own LTTB points (not only those of soc_equity)
+    for result in [defensive, aggressive]:
+        for column in ['buyhold_equity', 'soc_equity']:
+            equity = result['daily_data'][column]
+            assert set(equity.index[lttb_indices(equity.to_numpy(), 400)]) <= set(curve['date']), column
+    print(f"✓ {len(daily)} days reduced to {len(curve)} chart points shared by both profiles")
+    return True
+
+
+def main():
+    """Run the equity curve tests."""
+    results = [
+        test_monthly_matches_scan(),
+        test_daily_and_weekly(),
+        test_lttb_bounded(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
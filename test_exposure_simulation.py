@@ -0,0 +1,123 @@
+"""
+Test for the vectorized exposure simulation core.
+
+Verifies that simulate_exposure_equity() matches the day-by-day fee/return/
+interest loop to floating-point tolerance, that run_simulation() stays
+consistent with it, and that run_simulations() evaluates several strategy
+profiles in one pass with the same results as separate runs.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+import numpy as np
+from logic import DynamicExposureSimulator, simulate_exposure_equity, strategy_profile
+from testdata import load_cached
+
+
+def _reference_loop(returns, exposure, capital, fee_pct, daily_rate):
+    """Day-by-day simulation: trade fee, invested return, cash interest."""
+    equity, fees, interest, trades = [], 0.0, 0.0, 0
+    prev_exposure = 1.0
+    for daily_return, current_exposure in zip(returns, exposure):
+        daily_return = 0.0 if np.isnan(daily_return) else daily_return
+        change = abs(current_exposure - prev_exposure)
+        if change > 0.001:
+            fee = change * capital * fee_pct
+            capital -= fee
+            fees += fee
+            trades += 1
+        invested = capital * current_exposure * (1 + daily_return)
+        cash = capital * (1 - current_exposure)
+        interest += cash * daily_rate
+        capital = invested + cash * (1 + daily_rate)
+        equity.append(capital)
+        prev_exposure = current_exposure
+    return np.array(equity), fees, interest, trades
+
+
+def test_core_matches_loop():
+    """Equity, fees, interest and trade count equal the loop."""
+    print("=" * 70)
+    print("EXPOSURE SIMULATION TEST")
+    print("=" * 70)
+
+    rng = np.random.default_rng(7)
+    returns = rng.normal(0.0005, 0.02, 5000)
+    returns[0] = np.nan
+    exposure = rng.choice([0.0, 0.2, 0.5, 1.0], 5000, p=[0.1, 0.1, 0.1, 0.7])
+
+    for fee_pct, rate in [(0.005, 0.03 / 365), (0.0, 0.0), (0.02, 0.05 / 365)]:
+        got = simulate_exposure_equity(returns, exposure, 10000.0, fee_pct, rate)
+        expected = _reference_loop(returns, exposure, 10000.0, fee_pct, rate)
+        assert np.allclose(got[0], expected[0], rtol=1e-10)
+        assert np.isclose(got[1], expected[1], rtol=1e-10) and np.isclose(got[2], expected[2], rtol=1e-10)
+        assert got[3] == expected[3]
+
+    start = time.perf_counter()
+    simulate_exposure_equity(returns, exposure, 10000.0, 0.005, 0.03 / 365)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"✓ Matches loop for 3 fee/interest settings ({elapsed_ms:.2f} ms for 5000 days)")
+    return True
+
+
+def test_run_simulation_consistent():
+    """run_simulation() equity and friction totals equal the loop on its own exposure."""
+    sim = DynamicExposureSimulator(load_cached("BTC-USD"), "BTC-USD")
+    for mode in ["defensive", "aggressive"]:
+        result = sim.run_simulation(strategy_mode=mode)
+        daily = result['daily_data']
+        returns = sim.df.loc[daily.index, 'returns'].to_numpy()
+        equity, fees, interest, trades = _reference_loop(
+            returns, daily['exposure'].to_numpy(), sim.initial_capital, 0.005, 0.03 / 365)
+
+        assert np.allclose(daily['soc_equity'].to_numpy(), equity, rtol=1e-10)
+        assert np.isclose(result['soc_dynamic']['total_fees_paid'], fees, rtol=1e-10)
+        assert np.isclose(result['soc_dynamic']['total_interest_earned'], interest, rtol=1e-10)
+        assert result['soc_dynamic']['trade_count'] == trades
+        print(f"✓ {mode}: {trades} trades, final {result['soc_dynamic']['final_value']:,.0f}")
+    return True
+
+
+def test_multi_strategy_pass():
+    """run_simulations() equals one run_simulation() per profile."""
+    sim = DynamicExposureSimulator(load_cached("SPY"), "SPY")
+    profiles = [
+        strategy_profile("defensive"),
+        strategy_profile("aggressive", trading_fee_pct=0.001, interest_rate_annual=0.05),
+        strategy_profile("defensive", high_stress_exposure=0.0, name="Cash on Red"),
+    ]
+    results = sim.run_simulations(profiles, start_date="2021-01-01")
+
+    assert len(results) == 3
+    for result, (mode, fee, rate) in zip(results[:2], [("defensive", 0.005, 0.03), ("aggressive", 0.001, 0.05)]):
+        single = sim.run_simulation("2021-01-01", mode, fee, rate)
+        assert result['summary'] == single['summary']
+        assert result['daily_data'].equals(single['daily_data'])
+        assert result['equity_curve'].equals(single['equity_curve'])
+    assert results[2]['summary']['strategy_mode'] == "Cash on Red"
+    assert results[2]['summary']['high_stress_exposure'] == 0.0
+
+    try:
+        strategy_profile("defensive", high_stress=0.1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unknown profile key accepted")
+    print(f"✓ {len(profiles)} profiles in one pass equal separate runs")
+    return True
+
+
+def main():
+    """Run the exposure simulation tests."""
+    results = [
+        test_core_matches_loop(),
+        test_run_simulation_consistent(),
+        test_multi_strategy_pass(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
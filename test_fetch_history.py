@@ -0,0 +1,135 @@
+"""
+Test for DataFetcher.fetch_history() and the cached simulation data path.
+
+Verifies that date-range requests are served from the cache, that the
+provider is only asked again when the requested start is older than the
+cached history (and only once when the provider has no older bars), that
+USDT pairs are routed to Binance, and that
+run_dca_simulations() loads through the fetcher.
+
+Uses the cached CSVs in data/ (copied to a temporary cache directory) and a
+counting in-memory provider, so the test runs without network access.
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from logic import DataFetcher, DataProvider, run_dca_simulations, strategy_profile
+from testdata import load_cached
+
+
+class _FrameProvider(DataProvider):
+    """Serves the tail of a fixed frame and counts fetches."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.calls = []
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        self.calls.append((symbol, lookback_days))
+        return self.df[self.df.index >= self.df.index[-1] - pd.Timedelta(days=lookback_days)]
+
+    def fetch_info(self, symbol):
+        return {"name": symbol}
+
+
+def _fetcher(tmp: str, full: pd.DataFrame, cached_tail: int, symbol: str) -> DataFetcher:
+    """DataFetcher on a temporary cache holding the last `cached_tail` bars of `full`."""
+    fetcher = DataFetcher()
+    fetcher.cache_dir = Path(tmp)
+    fetcher.yfinance = _FrameProvider(full)
+    fetcher.binance = _FrameProvider(full)
+    fetcher.cache_backend.write(full.iloc[-cached_tail:], fetcher._get_cache_path(symbol))
+    return fetcher
+
+
+def test_slice_from_cache():
+    """Ranges inside the cached history never reach the provider."""
+    print("=" * 70)
+    print("FETCH HISTORY TEST")
+    print("=" * 70)
+
+    full = load_cached("SPY")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, full, len(full), "SPY")
+        window = fetcher.fetch_history("SPY", start="2022-01-01", end="2022-12-31")
+        # A start a few days before the first bar (weekend) is still served from cache
+        everything = fetcher.fetch_history("SPY", start=full.index[0] - pd.Timedelta(days=3))
+
+        assert fetcher.yfinance.calls == []
+        assert window.index[0].year == 2022 and window.index[-1].year == 2022
+        assert len(everything) == len(full)
+    print(f"✓ {len(window)} bars of 2022 served from cache")
+    return True
+
+
+def test_top_up_only_when_older():
+    """An older start tops up the cache once; the next request is cached."""
+    full = load_cached("BTC-USD")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, full, 500, "BTC-USD")
+        start = full.index[100]
+
+        first = fetcher.fetch_history("BTC-USD", start=start)
+        second = fetcher.fetch_history("BTC-USD", start=start)
+
+        assert len(fetcher.yfinance.calls) == 1
+        assert first.index[0] == start and first.equals(second)
+        assert len(fetcher.cache_backend.read(fetcher._get_cache_path("BTC-USD"))) >= len(full) - 100
+    print("✓ One top-up for a start 400 bars before the cache")
+    return True
+
+
+def test_no_older_bars_asked_once():
+    """A start before the listing is requested once, then served from cache."""
+    full = load_cached("ETHUSDT")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, full, len(full), "ETHUSDT")
+        for _ in range(3):
+            history = fetcher.fetch_history("ETHUSDT", start="2015-01-01")
+            assert history.index[0] == full.index[0] and len(history) == len(full)
+
+        assert len(fetcher.binance.calls) == 1
+        entry = fetcher.manifest.get(fetcher._get_cache_path("ETHUSDT"))
+        assert pd.Timestamp(entry["requested_start"]) == pd.Timestamp("2015-01-01") and not entry["complete"]
+
+        # An even older start is a new request
+        fetcher.fetch_history("ETHUSDT", start="2014-01-01")
+        assert len(fetcher.binance.calls) == 2
+    print(f"✓ One request for history before {full.index[0].date()}, then served from cache")
+    return True
+
+
+def test_binance_routing_and_simulation():
+    """USDT pairs use Binance; simulations load through the fetcher."""
+    full = load_cached("BTC-USD")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _fetcher(tmp, full, len(full), "BTCUSDT")
+
+        results = run_dca_simulations(
+            "BTCUSDT", [strategy_profile("defensive"), strategy_profile("aggressive")],
+            years_back=3, start_date=str(full.index[-700].date()), fetcher=fetcher
+        )
+        assert all('error' not in r for r in results), results
+        assert fetcher.yfinance.calls == [] and fetcher.binance.calls == []
+
+        fetcher.fetch_history("BTCUSDT", start=full.index[0] - pd.Timedelta(days=30))
+        assert len(fetcher.binance.calls) == 1 and fetcher.yfinance.calls == []
+    print("✓ BTCUSDT simulated from cache, top-up routed to Binance")
+    return True
+
+
+def main():
+    """Run the fetch history tests."""
+    results = [
+        test_slice_from_cache(),
+        test_top_up_only_when_older(),
+        test_no_older_bars_asked_once(),
+        test_binance_routing_and_simulation(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
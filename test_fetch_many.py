@@ -0,0 +1,145 @@
+"""
+Test for the concurrent multi-ticker fetch of DataFetcher.
+
+Verifies that fetch_many() returns one result per symbol in request order
+with per-symbol errors, that fresh cache hits resolve on the calling thread
+without a provider request, that requests to a provider never exceed its
+concurrency limit, and that a watchlist is fetched in a fraction of the
+sequential time.
+
+Uses the cached CSVs in data/ (served by a slow in-memory provider and a
+temporary cache directory) so the test runs without network access.
+"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+from logic import PROVIDER_DEFAULT_CONCURRENCY, DataFetcher, DataProvider, latest_session_date
+from testdata import load_cached
+
+SYMBOLS = ["SPY", "TSLA", "AAPL", "BTC-USD", "ETH-USD", "GLD", "NVDA", "MSFT"]
+
+
+def _current(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Shift a history so that it ends at the latest complete session."""
+    df = df.copy()
+    df.index = df.index + (pd.Timestamp(latest_session_date(symbol)) - df.index[-1])
+    return df
+
+
+class _SlowProvider(DataProvider):
+    """Serves up-to-date cached frames after a delay and tracks requests in flight."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    def _request(self, symbol):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.calls.append(symbol)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if symbol == "NOPE":
+            raise ConnectionError(f"unknown symbol {symbol}")
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        self._request(symbol)
+        return _current(load_cached(symbol), symbol)
+
+    def fetch_info(self, symbol):
+        self._request(symbol)
+        return {"name": f"{symbol} Inc."}
+
+
+def _fetcher(tmp: str, provider: DataProvider) -> DataFetcher:
+    """DataFetcher on a temporary cache directory without network access."""
+    fetcher = DataFetcher()
+    fetcher.cache_dir = Path(tmp)
+    fetcher.yfinance = fetcher.binance = provider
+    return fetcher
+
+
+def test_ordered_results_and_errors():
+    """Results follow the request order; a failing symbol does not stop the others."""
+    print("=" * 70)
+    print("CONCURRENT FETCH TEST")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = _SlowProvider()
+        fetcher = _fetcher(tmp, provider)
+        symbols = ["TSLA", "NOPE", "SPY", "TSLA"]
+        progress = []
+        results = fetcher.fetch_many(symbols, with_info=True,
+                                     on_result=lambda r, done, total: progress.append(
+                                         (done, total, threading.current_thread() is threading.main_thread())))
+
+        assert [r.symbol for r in results] == symbols
+        assert results[0] is results[3] and provider.calls.count("TSLA") == 2   # Data + info, once
+        assert isinstance(results[1].error, ConnectionError) and results[1].data.empty and not results[1].ok
+        assert results[2].ok and results[2].info == {"name": "SPY Inc."}
+        assert results[2].data.equals(_current(load_cached("SPY"), "SPY"))
+        assert progress == [(1, 3, True), (2, 3, True), (3, 3, True)]
+    print("✓ 4 requests, 3 unique symbols in order, 1 per-symbol error")
+    return True
+
+
+def test_cache_hits_skip_workers():
+    """Fresh caches resolve on the calling thread without provider requests."""
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = _SlowProvider()
+        fetcher = _fetcher(tmp, provider)
+        fetcher.fetch_many(SYMBOLS)
+        calls = len(provider.calls)
+
+        start = time.perf_counter()
+        results = fetcher.fetch_many(SYMBOLS)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert all(r.ok and r.cached for r in results) and len(provider.calls) == calls
+
+        # Info of providers without static metadata still needs a request
+        assert all(not r.cached for r in fetcher.fetch_many(SYMBOLS[:2], with_info=True))
+    print(f"✓ {len(SYMBOLS)} cache hits in {elapsed_ms:.1f} ms without provider requests")
+    return True
+
+
+def test_bounded_concurrency():
+    """Requests in flight stay within the provider limit; the pool beats a sequential loop."""
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = _SlowProvider(delay=0.1)
+        fetcher = _fetcher(tmp, provider)
+
+        start = time.perf_counter()
+        results = fetcher.fetch_many(SYMBOLS, max_workers=8)
+        elapsed = time.perf_counter() - start
+        sequential = len(SYMBOLS) * provider.delay
+
+        assert all(r.ok for r in results)
+        assert provider.max_in_flight == PROVIDER_DEFAULT_CONCURRENCY
+        assert elapsed < sequential * 0.75, (elapsed, sequential)
+    print(f"✓ {len(SYMBOLS)} symbols in {elapsed:.2f} s (sequential {sequential:.2f} s), "
+          f"at most {provider.max_in_flight} requests in flight")
+    return True
+
+
+def main():
+    """Run the concurrent fetch tests."""
+    results = [
+        test_ordered_results_and_errors(),
+        test_cache_hits_skip_workers(),
+        test_bounded_concurrency(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,140 @@
+"""
+Test for the vectorized historical signal primitives.
+
+Verifies that classify_signal_tiers() and forward_max_drawdown() reproduce the
+row-by-row classification and the per-bar 10-day drawdown loop exactly, that
+signal_phase_table() run-length encodes the signals correctly, and that
+get_historical_signal_analysis() still produces a full report.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import numpy as np
+import pandas as pd
+from logic import (SOCAnalyzer, SIGNAL_TIERS, classify_signal_tiers, forward_max_drawdown,
+                   signal_phase_table)
+from testdata import load_cached
+
+
+def _reference_signal(close, sma, vol, vol_low, vol_medium, vol_high, vol_extreme):
+    """Row-by-row 5-tier classification."""
+    if vol > vol_extreme:
+        return 'CRITICAL'
+    if close > sma:
+        if vol <= vol_medium:
+            return 'STABLE'
+        if vol <= vol_high:
+            return 'ACTIVE'
+        return 'HIGH_ENERGY'
+    if close < sma:
+        return 'CRITICAL' if vol > vol_high else 'DORMANT'
+    return 'ACTIVE' if vol > vol_medium else 'STABLE'
+
+
+def test_signal_tiers_match_rows():
+    """Vectorized tiers equal the row-by-row rules."""
+    print("=" * 70)
+    print("HISTORICAL SIGNAL TEST")
+    print("=" * 70)
+
+    for symbol in ["BTC-USD", "SPY", "TSLA"]:
+        analyzer = SOCAnalyzer(load_cached(symbol), symbol)
+        df = analyzer.metrics_df
+        calc = analyzer.calculator
+        thresholds = (calc.vol_low_threshold, calc.vol_medium_threshold,
+                      calc.vol_high_threshold, calc.vol_extreme_threshold)
+
+        close, sma, vol = df['close'].to_numpy(), df['sma_200'].to_numpy(), df['volatility'].to_numpy()
+        # Force a few bars exactly onto the SMA to exercise the neutral branch
+        sma = sma.copy()
+        sma[::97] = close[::97]
+
+        signals = classify_signal_tiers(close, sma, vol, *thresholds)
+        expected = [_reference_signal(c, s, v, *thresholds) for c, s, v in zip(close, sma, vol)]
+        assert list(signals) == expected, symbol
+        assert set(signals) <= set(SIGNAL_TIERS)
+        print(f"✓ {symbol}: {len(signals)} signals identical")
+    return True
+
+
+def test_forward_max_drawdown_matches_loop():
+    """Sliding-window minimum equals the per-bar slice minimum."""
+    close = load_cached("BTC-USD")['close'].to_numpy()
+
+    for horizon in [1, 10, 30]:
+        got = forward_max_drawdown(close, horizon)
+        expected = np.full(len(close), np.nan)
+        for i in range(len(close) - horizon):
+            window = close[i:i + horizon + 1]
+            expected[i] = (window.min() - window[0]) / window[0] * 100
+        assert np.array_equal(got, expected, equal_nan=True), horizon
+        assert np.isnan(got[-horizon:]).all() and (got[:-horizon] <= 0).all()
+
+    assert np.isnan(forward_max_drawdown(close[:5], 10)).all()
+    print("✓ Forward drawdown identical for horizons 1, 10, 30")
+    return True
+
+
+def test_phase_table_matches_runs():
+    """Phases cover every bar once and agree with the per-signal groupby."""
+    df = pd.DataFrame({
+        'signal': ['STABLE', 'STABLE', 'ACTIVE', 'STABLE', 'CRITICAL', 'CRITICAL', 'CRITICAL'],
+        'close': [10.0, 11.0, 12.0, 9.0, 8.0, 6.0, 7.0],
+        'return_30d': np.arange(7.0),
+    }, index=pd.date_range("2024-01-01", periods=7))
+
+    phases = signal_phase_table(df)
+    assert list(phases['signal']) == ['STABLE', 'ACTIVE', 'STABLE', 'CRITICAL']
+    assert list(phases['duration']) == [2, 1, 1, 3]
+    assert list(phases['price_end']) == [11.0, 12.0, 9.0, 7.0]
+    assert list(phases['return_30d']) == [0.0, 2.0, 3.0, 4.0]
+    assert list(phases.index) == list(df.index[[0, 2, 3, 4]])
+    assert phases['price_change_pct'].iloc[-1] == (7.0 - 8.0) / 8.0 * 100
+
+    analyzer = SOCAnalyzer(load_cached("BTC-USD"), "BTC-USD")
+    result = analyzer.get_historical_signal_analysis()
+    signal = analyzer.metrics_df['close'].to_frame()
+    calc = analyzer.calculator
+    signal['signal'] = classify_signal_tiers(
+        analyzer.metrics_df['close'], analyzer.metrics_df['sma_200'], analyzer.metrics_df['volatility'],
+        calc.vol_low_threshold, calc.vol_medium_threshold, calc.vol_high_threshold, calc.vol_extreme_threshold)
+    run_id = (signal['signal'] != signal['signal'].shift()).cumsum()
+    for signal_type, stats in result['signal_stats'].items():
+        runs = run_id[signal['signal'] == signal_type]
+        durations = runs.value_counts()
+        assert stats['total_days'] == len(runs) and stats['phase_count'] == len(durations), signal_type
+        if len(durations):
+            assert stats['max_duration'] == durations.max()
+            assert np.isclose(stats['avg_duration'], durations.mean())
+
+    streak = 1
+    while signal['signal'].iloc[-1 - streak] == signal['signal'].iloc[-1]:
+        streak += 1
+    assert result['current_streak_days'] == streak
+    print(f"✓ {len(phases)} toy phases, BTC-USD stats and streak ({streak} days) consistent")
+    return True
+
+
+def test_historical_analysis_report():
+    """The full analysis still returns stats for every tier."""
+    result = SOCAnalyzer(load_cached("SPY"), "SPY").get_historical_signal_analysis()
+    assert "error" not in result, result.get("error")
+    assert set(result['signal_stats']) == set(SIGNAL_TIERS)
+    assert sum(s['total_days'] for s in result['signal_stats'].values()) == result['total_trading_days']
+    print(f"✓ Report for {result['total_trading_days']} days, current {result['current_signal']}")
+    return True
+
+
+def main():
+    """Run the historical signal tests."""
+    results = [
+        test_signal_tiers_match_rows(),
+        test_forward_max_drawdown_matches_loop(),
+        test_phase_table_matches_runs(),
+        test_historical_analysis_report(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,98 @@
+"""
+Test for the multi-horizon return matrix.
+
+Verifies that HorizonReturns reproduces pct_change(k) (trailing) and
+pct_change(k).shift(-k) (forward) up to float32 precision, that the rolling
+peak drawdown (cached on MetricsBundle for the crash forensics) is exact, and
+that MetricsBundle caches one matrix per horizon set for the historical signal
+analysis.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import numpy as np
+from analytics_engine import MarketForensics
+from logic import HorizonReturns, MetricsBundle, RETURN_HORIZONS, SOCAnalyzer, drawdown_from_peak
+from testdata import load_cached
+
+
+def test_matrix_matches_pct_change():
+    """Trailing and forward columns equal the pandas shifts up to float32 rounding."""
+    print("=" * 70)
+    print("HORIZON RETURNS TEST")
+    print("=" * 70)
+
+    close = load_cached("BTC-USD")['close']
+    returns = HorizonReturns(close)
+
+    assert returns.matrix.shape == (len(close), len(RETURN_HORIZONS))
+    assert returns.matrix.dtype == np.float32
+    for horizon in RETURN_HORIZONS:
+        trailing = close.pct_change(horizon).to_numpy()
+        forward = close.pct_change(horizon).shift(-horizon).to_numpy()
+        assert np.allclose(returns.trailing(horizon), trailing, rtol=1e-5, atol=1e-6, equal_nan=True), horizon
+        assert np.allclose(returns.forward(horizon), forward, rtol=1e-5, atol=1e-6, equal_nan=True), horizon
+        assert np.array_equal(np.isnan(returns.forward(horizon)), np.isnan(forward)), horizon
+
+    frame = returns.to_frame(forward=True)
+    assert list(frame.columns) == [f"{h}d" for h in RETURN_HORIZONS] and frame.index.equals(close.index)
+    print(f"✓ {len(RETURN_HORIZONS)} horizons x {len(close)} bars match pct_change "
+          f"({returns.matrix.nbytes / 1024:.0f} KiB)")
+    return True
+
+
+def test_drawdown_and_validation():
+    """Rolling peak drawdown is exact and cached per bundle; unknown horizons are rejected."""
+    df = load_cached("SPY")
+    close = df['close']
+    returns = HorizonReturns(close, (30,))
+
+    peak = close.rolling(window=90, min_periods=1).max()
+    assert np.array_equal(drawdown_from_peak(close, 90), ((close - peak) / peak).to_numpy())
+    metrics = MetricsBundle(df)
+    assert np.array_equal(metrics.drawdown_from_peak(90), drawdown_from_peak(close, 90))
+    assert metrics.drawdown_from_peak(90) is metrics.drawdown_from_peak(90)
+
+    work = df.assign(Regime="GREEN")
+    assert MarketForensics.get_crash_metrics(work, metrics) == MarketForensics.get_crash_metrics(work)
+
+    for bad in [lambda: returns.trailing(5), lambda: HorizonReturns(close, (0, 5))]:
+        try:
+            bad()
+        except ValueError:
+            continue
+        raise AssertionError("Invalid horizon accepted")
+
+    assert np.isnan(HorizonReturns(close.iloc[:10], (30,)).forward(30)).all()
+    print("✓ 90-day drawdown exact, invalid horizons rejected")
+    return True
+
+
+def test_bundle_cache_and_long_horizons():
+    """The analyzer reads one cached matrix and reports 120d/180d/252d returns."""
+    df = load_cached("SPY")
+    metrics = MetricsBundle(df, "SPY")
+    assert metrics.horizon_returns() is metrics.horizon_returns(reversed(RETURN_HORIZONS))
+
+    result = SOCAnalyzer(df, "SPY", metrics=metrics).get_historical_signal_analysis()
+    assert "error" not in result, result.get("error")
+    assert list(metrics._horizon_returns) == [RETURN_HORIZONS]
+    stable = result['signal_stats']['STABLE']
+    for horizon in (120, 180, 252):
+        assert f'avg_return_{horizon}d' in stable
+    print(f"✓ One cached matrix; STABLE avg 252d return {stable['avg_return_252d']:+.1f}%")
+    return True
+
+
+def main():
+    """Run the horizon return tests."""
+    results = [
+        test_matrix_matches_pct_change(),
+        test_drawdown_and_validation(),
+        test_bundle_cache_and_long_horizons(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
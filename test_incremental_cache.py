@@ -0,0 +1,217 @@
+"""
+Test for the incremental cache refresh of DataFetcher.
+
+Verifies the per-asset-class session rules, that a stale cache requests
+only the bars since its last bar (plus the overlap), that revised closes in
+the overlap replace the cached values, that a split restating the older
+history reloads (or rescales) the cached bars instead of leaving a fake
+jump, that a partial bar fetched during its session is refetched after the
+close, that a fresh or just-retried cache is not refetched, and that a
+failing provider leaves the cache usable.
+
+Uses the cached CSVs in data/ (written to a temporary cache directory) and a
+counting in-memory provider, so the test runs without network access.
+"""
+
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+from logic import (CACHE_OVERLAP_DAYS, DataFetcher, DataProvider, asset_class, cache_is_stale,
+                   latest_session_date, reconcile_bars, restatement_ratio)
+from testdata import load_cached
+
+
+class _FrameProvider(DataProvider):
+    """Serves the tail of a fixed frame and counts fetches."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.calls = []
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        self.calls.append((symbol, lookback_days))
+        return self.df[self.df.index >= self.df.index[-1] - pd.Timedelta(days=lookback_days)]
+
+    def fetch_info(self, symbol):
+        return {"name": symbol}
+
+
+class _ShortReachProvider(_FrameProvider):
+    """Serves only the first (short) request, then fails."""
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        if self.calls:
+            self.calls.append((symbol, lookback_days))
+            raise ConnectionError("offline")
+        return super().fetch_data(symbol, interval, lookback_days)
+
+
+def _split(df: pd.DataFrame, position: int, factor: float) -> pd.DataFrame:
+    """Adjusted history of a factor:1 split effective at df.index[position]."""
+    adjusted = df.copy()
+    before = adjusted.index < adjusted.index[position]
+    adjusted.loc[before, ['open', 'high', 'low', 'close']] /= factor
+    adjusted.loc[before, 'volume'] *= factor
+    return adjusted
+
+
+class _OfflineProvider(DataProvider):
+    """Raises on every fetch."""
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        raise ConnectionError("offline")
+
+    def fetch_info(self, symbol):
+        return {"name": symbol}
+
+
+def _stale_fetcher(tmp: str, symbol: str, cached: pd.DataFrame, provider: DataProvider) -> DataFetcher:
+    """DataFetcher whose cache of `symbol` was written two days ago."""
+    fetcher = DataFetcher()
+    fetcher.cache_dir = Path(tmp)
+    fetcher.yfinance = fetcher.binance = provider
+    path = fetcher._get_cache_path(symbol)
+    fetcher.cache_backend.write(cached, path)
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(path, (two_days_ago, two_days_ago))
+    return fetcher
+
+
+def test_session_rules():
+    """Latest complete bar per asset class and market hours."""
+    print("=" * 70)
+    print("INCREMENTAL CACHE TEST")
+    print("=" * 70)
+
+    assert [asset_class(s) for s in ["BTCUSDT", "ETH-USD", "EURUSD=X", "GC=F", "SPY", "^GSPC", "BRK-B"]] == \
+        ["crypto", "crypto", "forex", "futures", "equity", "equity", "equity"]
+
+    monday_morning = datetime(2024, 6, 10, 9, 0)
+    monday_evening = datetime(2024, 6, 10, 22, 0)
+    assert latest_session_date("SPY", monday_morning) == date(2024, 6, 7)      # Friday
+    assert latest_session_date("SPY", monday_evening) == date(2024, 6, 10)
+    assert latest_session_date("BTC-USD", monday_morning) == date(2024, 6, 9)  # Sunday bar
+    assert latest_session_date("EURUSD=X", datetime(2024, 6, 9, 12, 0)) == date(2024, 6, 7)
+    print("✓ Session rules for crypto, forex, futures and equities")
+    return True
+
+
+def test_incremental_top_up():
+    """A stale cache fetches only the missing range; revisions in the overlap win."""
+    full = load_cached("SPY")
+    cached = full.iloc[:-20].copy()
+    revised = full.copy()
+    revised.iloc[-22, revised.columns.get_loc('close')] += 1.0   # Revised close in the overlap
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _stale_fetcher(tmp, "SPY", cached, _FrameProvider(revised))
+        df = fetcher.fetch_data("SPY")
+
+        assert len(fetcher.yfinance.calls) == 1
+        since_last = (datetime.now() - cached.index[-1].to_pydatetime()).days
+        assert fetcher.yfinance.calls[0][1] == since_last + CACHE_OVERLAP_DAYS
+        assert df.equals(revised)
+        assert fetcher.cache_backend.read(fetcher._get_cache_path("SPY")).equals(revised)
+
+        # Just retried: the next read is served from the cache
+        assert fetcher.fetch_data("SPY").equals(revised) and len(fetcher.yfinance.calls) == 1
+    print(f"✓ {len(revised) - len(cached)} new bars appended, 1 revised close reconciled")
+    return True
+
+
+def test_split_restatement():
+    """A 10:1 split after the cached range reloads the history; no fake jump remains."""
+    full = load_cached("TSLA")
+    cached = full.iloc[:-20].copy()
+    adjusted = _split(full, len(full) - 10, 10.0)
+    assert abs(restatement_ratio(cached, adjusted) - 0.1) < 1e-12
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _stale_fetcher(tmp, "TSLA", cached, _FrameProvider(adjusted))
+        df = fetcher.fetch_data("TSLA")
+        assert len(fetcher.yfinance.calls) == 2   # Top-up, then the full reload
+        assert df.equals(adjusted)
+        assert df['close'].pct_change().min() > -0.5
+
+        # Reload failing: the cached prices are brought to the new scale
+        offline = _stale_fetcher(tmp, "TSLA", cached, _ShortReachProvider(adjusted))
+        df = offline.fetch_data("TSLA")
+        assert len(offline.yfinance.calls) == 2
+        assert abs(df['close'].iloc[0] - cached['close'].iloc[0] / 10) < 1e-9
+        assert df['close'].pct_change().min() > -0.5
+        assert df.index.equals(full.index)
+
+    # Unadjusted provider data: nothing to restate
+    assert restatement_ratio(cached, full) == 1.0 and restatement_ratio(cached, full.iloc[:0]) == 1.0
+    print(f"✓ 10:1 split restated, worst daily change {df['close'].pct_change().min():+.1%}")
+    return True
+
+
+def test_partial_bar_after_close():
+    """A bar fetched mid-session is stale once the session has closed."""
+    def utc(*args):
+        return datetime(*args, tzinfo=timezone.utc)
+
+    monday = pd.Timestamp("2024-06-10")   # SPY closes 21:00 UTC
+    assert not cache_is_stale("SPY", monday, utc(2024, 6, 10, 15), now=utc(2024, 6, 10, 20))   # Still open
+    assert cache_is_stale("SPY", monday, utc(2024, 6, 10, 15), now=utc(2024, 6, 10, 22))       # Closed since
+    assert cache_is_stale("SPY", monday, utc(2024, 6, 10, 15), now=utc(2024, 6, 11, 9))
+    assert not cache_is_stale("SPY", monday, utc(2024, 6, 10, 21, 30), now=utc(2024, 6, 11, 9))
+    assert not cache_is_stale("SPY", monday, utc(2024, 6, 10, 20, 55), now=utc(2024, 6, 10, 21, 5))   # Retried
+
+    sunday = pd.Timestamp("2024-06-09")   # Binance's open daily candle
+    assert cache_is_stale("BTCUSDT", sunday, utc(2024, 6, 9, 18), now=utc(2024, 6, 10, 9))
+    assert not cache_is_stale("BTCUSDT", sunday, utc(2024, 6, 10, 0, 30), now=utc(2024, 6, 10, 9))
+
+    full = load_cached("SPY")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _stale_fetcher(tmp, "SPY", full, _FrameProvider(full))
+        last = full.index[-1]
+        mid_session = (last + timedelta(hours=15)).tz_localize("UTC").to_pydatetime()
+        fetcher.manifest.record(fetcher._get_cache_path("SPY"), "SPY", full, fetched_at=mid_session)
+        assert fetcher.is_stale("SPY", now=last + timedelta(hours=22))
+        assert not fetcher.is_stale("SPY", now=last + timedelta(hours=20))
+    print("✓ Partial bars refetched after the session close, final bars kept")
+    return True
+
+
+def test_fresh_and_offline():
+    """A complete cache is not refetched; a failing provider keeps the cache."""
+    full = load_cached("BTC-USD")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = _stale_fetcher(tmp, "BTC-USD", full, _FrameProvider(full))
+        current = full.copy()
+        current.index = current.index + (pd.Timestamp(latest_session_date("BTC-USD")) - full.index[-1])
+        assert fetcher.is_stale("BTC-USD", full)
+        os.utime(fetcher._get_cache_path("BTC-USD"))   # Fetched after the last session closed
+        assert not fetcher.is_stale("BTC-USD", current)
+        assert not fetcher.is_stale("BTC-USD", full, now=full.index[-1] + timedelta(hours=12))
+
+        offline = _stale_fetcher(tmp, "BTC-USD", full, _OfflineProvider())
+        assert offline.fetch_data("BTC-USD").equals(full)
+        assert not offline.is_stale("BTC-USD", full)   # Attempt recorded, retried later
+
+    assert reconcile_bars(full, full.iloc[:0]).equals(full)
+    assert reconcile_bars(full.iloc[:0], full).equals(full)
+    print("✓ Complete cache kept, offline refresh falls back to the cache")
+    return True
+
+
+def main():
+    """Run the incremental cache tests."""
+    results = [
+        test_session_rules(),
+        test_incremental_top_up(),
+        test_split_restatement(),
+        test_partial_bar_after_close(),
+        test_fresh_and_offline(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,95 @@
+"""
+Test for the process-wide MarketState cache.
+
+Verifies that cached_market_state() returns exactly compute_market_state(),
+counts hits and misses, never serves a stale state for changed data, and that
+MarketStateCache honours its size bound, TTL and per-symbol invalidation.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+from logic import (compute_market_state, cached_market_state, MarketStateCache,
+                   MARKET_STATE_CACHE)
+from testdata import load_cached
+
+
+def test_cached_state_matches_and_counts():
+    """Repeated calls hit the cache and return the uncached result."""
+    print("=" * 70)
+    print("MARKET STATE CACHE TEST")
+    print("=" * 70)
+
+    MARKET_STATE_CACHE.invalidate()
+    df = load_cached("SPY")
+    expected = compute_market_state(df, len(df) - 1)
+
+    before = MARKET_STATE_CACHE.stats()
+    first = cached_market_state(df, symbol="SPY")
+    second = cached_market_state(df, symbol="SPY")
+    after = MARKET_STATE_CACHE.stats()
+
+    assert first == expected and second == expected
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    # Returned states are copies - mutating one must not leak into the cache
+    second.reason_codes.append("MUTATED")
+    assert cached_market_state(df, symbol="SPY") == expected
+    print(f"✓ Cached state identical, stats: {MARKET_STATE_CACHE.stats()}")
+    return True
+
+
+def test_changed_data_misses():
+    """A different last bar, a revised close or other parameters miss the cache."""
+    MARKET_STATE_CACHE.invalidate()
+    df = load_cached("TSLA")
+    before = MARKET_STATE_CACHE.stats()
+    cached_market_state(df, symbol="TSLA")
+
+    revised = df.copy()
+    revised.iloc[-5, revised.columns.get_loc('close')] *= 1.01
+    assert cached_market_state(revised, symbol="TSLA") == compute_market_state(revised, len(revised) - 1)
+    assert cached_market_state(df.iloc[:-1], symbol="TSLA") == compute_market_state(df, len(df) - 2)
+    assert cached_market_state(df, symbol="TSLA", hysteresis=0.0) == \
+        compute_market_state(df, len(df) - 1, hysteresis=0.0)
+    after = MARKET_STATE_CACHE.stats()
+    assert after["hits"] == before["hits"] and after["misses"] - before["misses"] == 4
+    print("✓ Changed data and parameters are recomputed")
+    return True
+
+
+def test_invalidate_lru_and_ttl():
+    """Per-symbol invalidation, LRU eviction and TTL expiry."""
+    cache = MarketStateCache(max_size=2, ttl_seconds=60)
+    df = load_cached("SPY")
+    state = compute_market_state(df, len(df) - 1)
+
+    cache.put(("SPY", 1), state)
+    cache.put(("QQQ", 1), state)
+    cache.put(("SPY", 2), state)
+    assert cache.get(("SPY", 1)) is None          # Evicted (least recently used)
+    assert cache.get(("QQQ", 1)) is state
+
+    assert cache.invalidate("SPY") == 1
+    assert cache.get(("SPY", 2)) is None
+    assert cache.stats()["size"] == 1
+
+    expired = MarketStateCache(max_size=4, ttl_seconds=0)
+    expired.put(("SPY", 1), state)
+    assert expired.get(("SPY", 1)) is None
+    print("✓ Invalidation, LRU bound and TTL")
+    return True
+
+
+def main():
+    """Run the market state cache tests."""
+    results = [
+        test_cached_state_matches_and_counts(),
+        test_changed_data_misses(),
+        test_invalidate_lru_and_ttl(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,131 @@
+"""
+Test for the columnar MarketStateFrame.
+
+Verifies that MarketStateFrame stores the batch market states losslessly
+(except float32 rounding of the two float columns), slices without copying,
+round-trips through Parquet, and feeds the portfolio time series exactly like
+the nested-dict path.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from logic import compute_market_states, market_states_to_list
+from market_state_frame import MarketStateFrame
+from portfolio_state import compute_portfolio_time_series, compute_portfolio_time_series_from_frames
+from testdata import load_cached
+
+
+def _load_states(symbol: str) -> pd.DataFrame:
+    """Batch market states for a cached OHLCV CSV."""
+    return compute_market_states(load_cached(symbol))
+
+
+def _assert_same_states(frame: MarketStateFrame, states: list) -> None:
+    """Frame rows must equal the MarketStates up to float32 rounding."""
+    assert len(frame) == len(states)
+    for i, expected in enumerate(states):
+        got = frame.at(i)
+        assert got.date == expected.date
+        assert got.volatility == float(np.float32(expected.volatility))
+        assert got.volatility_percentile == float(np.float32(expected.volatility_percentile))
+        assert (got.trend_state, got.criticality, got.regime, got.reason_codes) == \
+            (expected.trend_state, expected.criticality, expected.regime, expected.reason_codes)
+        assert (got.volatility_component, got.trend_component, got.extension_component) == \
+            (expected.volatility_component, expected.trend_component, expected.extension_component)
+
+
+def test_frame_round_trip():
+    """from_states_df / from_states / to_frame / at(i) preserve every state."""
+    print("=" * 70)
+    print("MARKET STATE FRAME TEST")
+    print("=" * 70)
+
+    states_df = _load_states("BTC-USD")
+    states = market_states_to_list(states_df)
+    frame = MarketStateFrame.from_states_df(states_df)
+
+    _assert_same_states(frame, states)
+    _assert_same_states(MarketStateFrame.from_states(states), states)
+    _assert_same_states(MarketStateFrame.from_states_df(frame.to_frame()), states)
+
+    assert frame.nbytes == 24 * len(frame)   # As documented in the module docstring
+    object_bytes = sum(sys.getsizeof(s) + sys.getsizeof(s.reason_codes) for s in states)
+    print(f"✓ {len(frame)} states preserved | {frame.nbytes / len(frame):.0f} B/row columnar "
+          f"vs {object_bytes / len(frame):.0f}+ B/row as MarketState objects")
+    return True
+
+
+def test_slicing_is_zero_copy():
+    """Positional and date slices are views of the original columns."""
+    frame = MarketStateFrame.from_states_df(_load_states("SPY"))
+
+    window = frame[100:200]
+    assert len(window) == 100
+    assert np.shares_memory(window.criticality, frame.criticality)
+    assert window.at(0) == frame.at(100)
+
+    year = frame.between("2022-01-01", "2022-12-31")
+    assert np.shares_memory(year.date, frame.date)
+    assert pd.Timestamp(year.date[0]).year == 2022 and pd.Timestamp(year.date[-1]).year == 2022
+    print(f"✓ Slices share memory ({len(year)} rows in 2022)")
+    return True
+
+
+def test_parquet_round_trip():
+    """Parquet write/read returns identical columns."""
+    frame = MarketStateFrame.from_states_df(_load_states("TSLA"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tsla_states.parquet"
+        frame.to_parquet(path)
+        restored = MarketStateFrame.read_parquet(path)
+
+    for name in ["date", "volatility", "volatility_percentile", "criticality", "volatility_component",
+                 "trend_component", "extension_component", "regime", "trend_state", "reason_mask"]:
+        original, loaded = getattr(frame, name), getattr(restored, name)
+        assert original.dtype == loaded.dtype, f"{name}: {original.dtype} vs {loaded.dtype}"
+        assert np.array_equal(original, loaded), f"{name} differs after Parquet round-trip"
+    print("✓ Parquet round-trip identical")
+    return True
+
+
+def test_portfolio_time_series_from_frames():
+    """Columnar portfolio time series equals the nested-dict version."""
+    spy, qqq = _load_states("SPY"), _load_states("QQQ")
+    weights = {"SPY": 0.6, "QQQ": 0.4}
+
+    spy_states = dict(zip(spy.index, market_states_to_list(spy)))
+    qqq_states = dict(zip(qqq.index, market_states_to_list(qqq)))
+    by_date = {
+        date: {"SPY": spy_states[date], "QQQ": qqq_states[date]}
+        for date in set(spy_states) & set(qqq_states)
+    }
+    frames = {"SPY": MarketStateFrame.from_states_df(spy), "QQQ": MarketStateFrame.from_states_df(qqq)}
+
+    expected = compute_portfolio_time_series(by_date, weights)
+    got = compute_portfolio_time_series_from_frames(frames, weights)
+
+    assert got == expected, "Portfolio time series differs between frame and dict input"
+    print(f"✓ {len(got)} portfolio states identical")
+    return True
+
+
+def main():
+    """Run the MarketStateFrame tests."""
+    results = [
+        test_frame_round_trip(),
+        test_slicing_is_zero_copy(),
+        test_parquet_round_trip(),
+        test_portfolio_time_series_from_frames(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
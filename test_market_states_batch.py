@@ -0,0 +1,118 @@
+"""
+Test for the batch and streaming market state engines.
+
+Verifies that compute_market_states() (one-pass batch) and MarketStateStream
+(incremental per-bar) return EXACTLY the same MarketState as calling
+compute_market_state(df, idx) for every index, and that batch states do not
+change when later bars are appended (no look-ahead).
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+import pandas as pd
+from logic import compute_market_state, compute_market_states, market_states_to_list, MarketStateStream
+from testdata import load_cached
+
+SYMBOLS = ["SPY", "BTC-USD"]
+
+
+def _per_index_states(df: pd.DataFrame, **params) -> list:
+    """Reference: compute_market_state() for every index that has enough data."""
+    states = []
+    for idx in range(len(df)):
+        try:
+            states.append(compute_market_state(df, idx, **params))
+        except ValueError:
+            pass
+    return states
+
+
+def test_batch_matches_per_index():
+    """Batch states must be bit-identical to the per-index function."""
+    print("=" * 70)
+    print("BATCH MARKET STATE TEST")
+    print("=" * 70)
+
+    for symbol in SYMBOLS:
+        df = load_cached(symbol)
+        print(f"\n{symbol}: {len(df)} rows")
+
+        start = time.perf_counter()
+        batch = market_states_to_list(compute_market_states(df))
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        reference = _per_index_states(df)
+        loop_s = time.perf_counter() - start
+
+        print(f"  Batch: {batch_ms:.1f} ms | Per-index loop: {loop_s:.2f} s")
+
+        assert len(batch) == len(reference), f"{symbol}: {len(batch)} vs {len(reference)} states"
+        mismatches = [(a, b) for a, b in zip(reference, batch) if a != b]
+        assert not mismatches, f"{symbol}: first mismatch {mismatches[0]}"
+        print(f"  ✓ {len(batch)} states identical")
+
+    print("\n✅ TEST PASSED: Batch states identical to compute_market_state()")
+    return True
+
+
+def test_batch_custom_parameters():
+    """Non-default windows and hysteresis must also match exactly."""
+    df = load_cached("TSLA")
+    params = dict(sma_window=50, vol_window=10, percentile_lookback=100, hysteresis=0.0)
+
+    batch = market_states_to_list(compute_market_states(df, **params))
+    reference = _per_index_states(df, **params)
+
+    assert batch == reference, "Batch states differ for custom parameters"
+    print(f"✓ {len(batch)} states identical with {params}")
+    return True
+
+
+def test_batch_no_lookahead():
+    """Batch states of a truncated history equal those of the full history."""
+    for symbol in SYMBOLS:
+        df = load_cached(symbol)
+        cut = len(df) - 250
+        historical = compute_market_states(df.iloc[:cut])
+        full = compute_market_states(df)
+
+        assert historical.index[-1] == df.index[cut - 1]
+        assert historical.equals(full.loc[historical.index]), f"{symbol}: later bars changed earlier states"
+        print(f"✓ {symbol}: {len(historical)} states unchanged by {len(df) - cut} later bars")
+    return True
+
+
+def test_stream_matches_batch():
+    """Streaming states pushed bar by bar must equal the batch states."""
+    for symbol in SYMBOLS:
+        df = load_cached(symbol)
+        batch = market_states_to_list(compute_market_states(df))
+
+        stream = MarketStateStream()
+        start = time.perf_counter()
+        streamed = [stream.push(ts, close) for ts, close in zip(df.index, df['close'].tolist())]
+        per_bar_us = (time.perf_counter() - start) / len(df) * 1e6
+        streamed = [state for state in streamed if state is not None]
+
+        assert streamed == batch, f"{symbol}: streamed states differ from batch"
+        assert stream.last_state == batch[-1]
+        print(f"✓ {symbol}: {len(streamed)} streamed states identical ({per_bar_us:.1f} µs/bar)")
+    return True
+
+
+def main():
+    """Run the batch and streaming market state tests."""
+    results = [
+        test_batch_matches_per_index(),
+        test_batch_custom_parameters(),
+        test_batch_no_lookahead(),
+        test_stream_matches_batch(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
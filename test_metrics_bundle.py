@@ -0,0 +1,91 @@
+"""
+Test for the shared MetricsBundle.
+
+Verifies that every consumer returns the same result with a shared bundle as
+without one, and that the bundle rolls each window only once.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+from logic import (MetricsBundle, compute_market_state, compute_market_states, get_current_market_state,
+                   SOCAnalyzer, DynamicExposureSimulator, MARKET_STATE_CACHE)
+from testdata import load_cached
+
+
+def test_consumers_match_without_bundle():
+    """Results with a shared bundle equal the standalone computations."""
+    print("=" * 70)
+    print("METRICS BUNDLE TEST")
+    print("=" * 70)
+
+    df = load_cached("BTC-USD")
+    metrics = MetricsBundle(df, "BTC-USD")
+
+    for idx in [250, 800, len(df) - 1]:
+        assert compute_market_state(df, idx, metrics=metrics) == compute_market_state(df, idx)
+    assert compute_market_states(df, metrics=metrics).equals(compute_market_states(df))
+
+    MARKET_STATE_CACHE.invalidate()
+    shared = get_current_market_state(df, metrics=metrics)
+    MARKET_STATE_CACHE.invalidate()
+    assert shared == get_current_market_state(df)
+
+    analyzer = SOCAnalyzer(df, "BTC-USD", metrics=metrics)
+    assert analyzer.metrics_df.equals(SOCAnalyzer(df, "BTC-USD").metrics_df)
+
+    simulator = DynamicExposureSimulator(df, "BTC-USD", metrics=metrics)
+    assert simulator.df.equals(DynamicExposureSimulator(df, "BTC-USD").df)
+    print("✓ State, batch states, hero state, analyzer and simulator unchanged")
+    return True
+
+
+def test_each_window_rolled_once():
+    """All consumers of a deep-dive page share one SMA200 and one 30-day volatility."""
+    df = load_cached("SPY")
+    metrics = MetricsBundle(df, "SPY")
+    sma = metrics.sma(200)
+    volatility = metrics.volatility(30)
+
+    MARKET_STATE_CACHE.invalidate()
+    get_current_market_state(df, symbol="SPY", metrics=metrics)
+    SOCAnalyzer(df, "SPY", metrics=metrics).metrics_df
+    DynamicExposureSimulator(df, "SPY", metrics=metrics)
+
+    assert metrics.sma(200) is sma and metrics.volatility(30) is volatility
+    assert sorted(metrics._sma) == [200] and sorted(metrics._volatility) == [30]
+    print("✓ SMA200 and 30-day volatility computed once for all consumers")
+    return True
+
+
+def test_rejects_other_frame():
+    """A bundle built from a different frame is refused, an equal copy is not."""
+    df = load_cached("SPY")
+    other = load_cached("AAPL").reindex(df.index)   # Another symbol on the same calendar
+    restated = df.copy()
+    restated.loc[:df.index[len(df) // 2], 'close'] *= 0.5   # Split: earlier closes adjusted
+
+    metrics = MetricsBundle(df)
+    for frame in [df.iloc[:-10], other, restated]:
+        try:
+            metrics.check_frame(frame)
+        except ValueError:
+            continue
+        raise AssertionError("Mismatched MetricsBundle was accepted")
+
+    assert compute_market_state(df.copy(), len(df) - 1, metrics=metrics) == compute_market_state(df, len(df) - 1)
+    print("✓ Shorter, other-symbol and restated frames rejected, equal copy accepted")
+    return True
+
+
+def main():
+    """Run the metrics bundle tests."""
+    results = [
+        test_consumers_match_without_bundle(),
+        test_each_window_rolled_once(),
+        test_rejects_other_frame(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
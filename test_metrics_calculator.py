@@ -0,0 +1,85 @@
+"""
+Test for the lazy SOCMetricsCalculator.
+
+Verifies that metric columns are computed on first access only (with their
+dependencies), that the input frame is neither copied nor modified by
+default, and that calculate_all_metrics() still returns the full metric frame.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import numpy as np
+from logic import SOCMetricsCalculator, SOCAnalyzer, rolling_percentile_rank
+from testdata import load_cached
+
+
+def test_lazy_dependencies():
+    """Accessing one metric computes only it and its dependencies."""
+    print("=" * 70)
+    print("LAZY METRICS CALCULATOR TEST")
+    print("=" * 70)
+
+    df = load_cached("SPY")
+    calculator = SOCMetricsCalculator(df)
+    assert calculator.computed_metrics == []
+
+    calculator["volatility"]
+    assert sorted(calculator.computed_metrics) == ["returns", "volatility"]
+
+    # The scan path does not need zones, thresholds or abs_returns
+    analyzer = SOCAnalyzer(df, "SPY")
+    analyzer.get_market_phase()
+    assert "vol_zone" not in analyzer.calculator.computed_metrics
+    assert "abs_returns" not in analyzer.calculator.computed_metrics
+    print(f"✓ get_market_phase computed only {analyzer.calculator.computed_metrics}")
+    return True
+
+
+def test_no_copy_no_mutation():
+    """The input frame is shared, never modified, and copied only on request."""
+    df = load_cached("TSLA")
+    columns = list(df.columns)
+
+    calculator = SOCMetricsCalculator(df)
+    metrics_df = calculator.calculate_all_metrics()
+    assert calculator.df is df
+    assert list(df.columns) == columns
+    assert len(metrics_df) < len(df)
+
+    assert SOCMetricsCalculator(df, copy=True).df is not df
+    print("✓ Input frame shared and untouched")
+    return True
+
+
+def test_all_metrics_unchanged():
+    """calculate_all_metrics() matches the eager column-by-column computation."""
+    df = load_cached("BTC-USD")
+    metrics_df = SOCMetricsCalculator(df).calculate_all_metrics()
+
+    expected = df.copy()
+    expected["returns"] = expected["close"].pct_change()
+    expected["abs_returns"] = expected["returns"].abs()
+    expected["sma_200"] = expected["close"].rolling(window=200).mean()
+    expected["volatility"] = expected["returns"].rolling(window=30).std()
+    expected["vol_percentile"] = rolling_percentile_rank(expected["volatility"], 504, op="<", include_current=False)
+    expected = expected.dropna()
+
+    for column in ["returns", "abs_returns", "sma_200", "volatility", "vol_percentile"]:
+        assert np.array_equal(metrics_df[column].to_numpy(), expected[column].to_numpy()), column
+    assert set(metrics_df["vol_zone"]) <= {"low", "normal", "medium", "high", "extreme"}
+    print(f"✓ {len(metrics_df)} metric rows unchanged")
+    return True
+
+
+def main():
+    """Run the lazy metrics calculator tests."""
+    results = [
+        test_lazy_dependencies(),
+        test_no_copy_no_mutation(),
+        test_all_metrics_unchanged(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
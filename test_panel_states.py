@@ -0,0 +1,78 @@
+"""
+Test for the multi-asset panel engine.
+
+Verifies that compute_panel_states() returns EXACTLY the MarketState that
+compute_market_state(df, len(df) - 1) returns for every asset in the universe,
+and that panel_market_phases() matches SOCAnalyzer.get_market_phase().
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+from logic import (compute_market_state, compute_panel_states, market_states_to_list,
+                   panel_market_phases, SOCAnalyzer)
+from testdata import cached_symbols, load_cached
+
+
+def _load_universe() -> dict:
+    """Load every cached OHLCV CSV from data/, plus truncated edge cases."""
+    frames = {symbol: load_cached(symbol) for symbol in cached_symbols()}
+    frames["SPY_SHORT"] = frames["SPY"].iloc[:260]   # SMA valid, short percentile history
+    frames["SPY_TINY"] = frames["SPY"].iloc[:50]     # Not enough data for a state
+    return frames
+
+
+def _check_universe(frames: dict, **params) -> None:
+    """Compare the panel states against the per-asset reference."""
+    start = time.perf_counter()
+    panel = compute_panel_states(frames, **params)
+    panel_ms = (time.perf_counter() - start) * 1000
+    states = dict(zip(panel.index, market_states_to_list(panel.set_index('date'))))
+
+    for symbol, df in frames.items():
+        try:
+            reference = compute_market_state(df, len(df) - 1, **params)
+        except ValueError:
+            reference = None
+        assert states.get(symbol) == reference, f"{symbol}: {states.get(symbol)} vs {reference}"
+
+    print(f"✓ {len(frames)} assets identical ({panel_ms:.1f} ms panel) {params or ''}")
+
+
+def test_panel_matches_per_asset():
+    """Panel states must be bit-identical to the single-asset function."""
+    print("=" * 70)
+    print("PANEL MARKET STATE TEST")
+    print("=" * 70)
+
+    frames = _load_universe()
+    _check_universe(frames)
+    _check_universe(frames, sma_window=50, vol_window=10, percentile_lookback=100, hysteresis=0.0)
+    return True
+
+
+def test_panel_phases_match_analyzer():
+    """Legacy phase dictionaries must equal SOCAnalyzer.get_market_phase()."""
+    frames = _load_universe()
+    phases = panel_market_phases(compute_panel_states(frames, 200, 30, hysteresis=0.0))
+
+    for symbol in ["SPY", "BTC-USD", "TSLA"]:
+        expected = SOCAnalyzer(frames[symbol], symbol, {}, 200, 30, 0.0).get_market_phase()
+        assert phases[symbol] == expected, f"{symbol}: phase differs"
+    assert "SPY_TINY" not in phases
+    print("✓ Panel phases match SOCAnalyzer.get_market_phase()")
+    return True
+
+
+def main():
+    """Run the panel engine tests."""
+    results = [
+        test_panel_matches_per_asset(),
+        test_panel_phases_match_analyzer(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
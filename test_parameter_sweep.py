@@ -0,0 +1,82 @@
+"""
+Test for the parameter-sweep engine.
+
+Verifies that sweep_market_states() reproduces compute_market_states() for
+every parameter tuple of a grid, and that the regime summary is consistent
+with the tidy states.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+import numpy as np
+from logic import compute_market_states, parameter_grid, sweep_market_states
+from testdata import load_cached
+
+
+def test_sweep_matches_batch():
+    """Every combination must equal compute_market_states() with those parameters."""
+    print("=" * 70)
+    print("PARAMETER SWEEP TEST")
+    print("=" * 70)
+
+    df = load_cached("BTC-USD")
+    grid = parameter_grid([100, 200], [20, 30], [252, 504], [0.0, 0.02])
+    states, summary = sweep_market_states(df, grid)
+
+    assert len(summary) == len(grid)
+    for params, group in states.groupby(["sma_window", "vol_window", "percentile_lookback", "hysteresis"]):
+        reference = compute_market_states(df, *params)
+        assert np.array_equal(group['date'].to_numpy(), reference.index.to_numpy()), params
+        assert np.array_equal(group['criticality'].to_numpy(), reference['criticality'].to_numpy()), params
+        assert np.array_equal(group['regime'].astype(str).to_numpy(), reference['regime'].to_numpy()), params
+        assert np.array_equal(group['trend_state'].astype(str).to_numpy(), reference['trend_state'].to_numpy()), params
+
+    print(f"✓ {len(grid)} combinations identical to compute_market_states()")
+    return True
+
+
+def test_sweep_summary():
+    """Summary statistics agree with the tidy states."""
+    df = load_cached("SPY")
+    states, summary = sweep_market_states(df, [(200, 30, 504, 0.02), (50, 10, 126, 0.0)])
+
+    for row in summary.itertuples(index=False):
+        group = states[(states.sma_window == row.sma_window) & (states.vol_window == row.vol_window)]
+        regime = group['regime'].astype(str).to_numpy()
+        assert row.n_bars == len(group)
+        assert abs(row.pct_green + row.pct_yellow + row.pct_red - 100) < 1e-9
+        assert row.mean_criticality == group['criticality'].mean()
+        assert row.transitions == int((regime[1:] != regime[:-1]).sum())
+    print("✓ Summary statistics consistent")
+    return True
+
+
+def test_sweep_speed():
+    """A 200-combination sweep finishes in seconds."""
+    df = load_cached("BTC-USD")
+    grid = parameter_grid([50, 100, 150, 200, 250], [10, 20, 30, 60], [126, 252, 504, 756, 1008], [0.0, 0.02])
+
+    start = time.perf_counter()
+    states, summary = sweep_market_states(df, grid)
+    elapsed = time.perf_counter() - start
+
+    assert len(summary) == 200
+    assert elapsed < 30, f"Sweep took {elapsed:.1f}s"
+    print(f"✓ {len(grid)} combinations x {len(df)} bars in {elapsed:.2f}s ({len(states)} state rows)")
+    return True
+
+
+def main():
+    """Run the parameter sweep tests."""
+    results = [
+        test_sweep_matches_batch(),
+        test_sweep_summary(),
+        test_sweep_speed(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,159 @@
+"""
+Test for the multi-asset portfolio backtester.
+
+Verifies that simulate_portfolio_equity() matches a day-by-day loop over
+sleeves with periodic rebalancing, that a one-asset portfolio equals
+DynamicExposureSimulator.run_simulation(), that the attribution adds up to
+the portfolio P&L, and that 50 assets x 20 years run without per-day loops.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from logic import (DynamicExposureSimulator, PortfolioExposureSimulator, rebalance_schedule,
+                   simulate_portfolio_equity, strategy_profile)
+from testdata import load_cached
+
+
+def _reference_loop(returns, exposure, weights, rebalance, capital, fee_pct, daily_rate):
+    """Day-by-day sleeves: rebalance to weights, exposure trade fee, return, interest."""
+    sleeves = capital * weights
+    prev_exposure = np.ones(len(weights))
+    equity, fees = [], 0.0
+    for day in range(len(returns)):
+        if day > 0 and rebalance[day]:
+            total = sleeves.sum()
+            fee = fee_pct * np.sum(prev_exposure * np.abs(sleeves - weights * total))
+            fees += fee
+            sleeves = weights * (total - fee)
+        for i in range(len(weights)):
+            change = abs(exposure[day, i] - prev_exposure[i])
+            if change > 0.001:
+                fee = change * sleeves[i] * fee_pct
+                sleeves[i] -= fee
+                fees += fee
+            e = exposure[day, i]
+            sleeves[i] = sleeves[i] * e * (1 + returns[day, i]) + sleeves[i] * (1 - e) * (1 + daily_rate)
+        prev_exposure = exposure[day].copy()
+        equity.append(sleeves.sum())
+    return np.array(equity), fees
+
+
+def test_engine_matches_loop():
+    """Equity and fees equal the sleeve loop for every rebalancing schedule."""
+    print("=" * 70)
+    print("PORTFOLIO BACKTEST TEST")
+    print("=" * 70)
+
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range("2015-01-01", periods=800)
+    returns = rng.normal(0.0004, 0.02, (800, 4))
+    exposure = rng.choice([0.0, 0.2, 0.5, 1.0], (800, 4), p=[0.05, 0.05, 0.1, 0.8])
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+
+    for frequency in ["never", "weekly", "monthly", "quarterly", "daily"]:
+        schedule = rebalance_schedule(dates, frequency)
+        got = simulate_portfolio_equity(returns, exposure, weights, schedule, 10000.0, 0.005, 0.03 / 365)
+        equity, fees = _reference_loop(returns, exposure, weights, schedule, 10000.0, 0.005, 0.03 / 365)
+
+        assert np.allclose(got['equity'], equity, rtol=1e-10), frequency
+        assert np.isclose(got['fees'].sum() + got['rebalance_fees'].sum(), fees, rtol=1e-10), frequency
+        assert got['rebalance_count'] == schedule.sum()
+        pnl = got['contribution'].sum() + got['interest'].sum() - got['fees'].sum() - got['rebalance_fees'].sum()
+        assert np.isclose(pnl, got['equity'][-1] - 10000.0, rtol=1e-9), frequency
+    print("✓ 5 rebalancing schedules match the sleeve loop, P&L fully attributed")
+
+    try:
+        rebalance_schedule(dates, "hourly")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unknown rebalance frequency accepted")
+    return True
+
+
+def test_single_asset_equals_run_simulation():
+    """A one-asset portfolio without rebalancing is run_simulation()."""
+    df = load_cached("BTC-USD")
+    portfolio = PortfolioExposureSimulator({"BTC-USD": df}, {"BTC-USD": 1.0})
+    single = DynamicExposureSimulator(df, "BTC-USD")
+
+    for mode in ["defensive", "aggressive"]:
+        result = portfolio.run(strategy_profile(mode), rebalance="never", start_date="2020-01-01")
+        expected = single.run_simulation("2020-01-01", mode)
+        soc = expected['soc_dynamic']
+
+        assert np.allclose(result['daily_data']['equity'], expected['daily_data']['soc_equity'], rtol=1e-10)
+        assert np.allclose(result['daily_data']['buyhold_equity'], expected['daily_data']['buyhold_equity'],
+                           rtol=1e-10)
+        for key in ['total_return_pct', 'max_drawdown_pct', 'annualized_vol', 'total_fees_paid',
+                    'total_interest_earned']:
+            assert np.isclose(result['portfolio'][key], soc[key], rtol=1e-8), key
+        assert result['portfolio']['trade_count'] == soc['trade_count']
+    print(f"✓ BTC-USD portfolio equals run_simulation ({result['total_days']} days)")
+    return True
+
+
+def test_mixed_portfolio_rules():
+    """Crypto and stocks align on common days; both exposure rules attribute fully."""
+    data = {symbol: load_cached(symbol) for symbol in ["BTC-USD", "SPY", "TSLA"]}
+    weights = {"BTC-USD": 0.2, "SPY": 0.5, "TSLA": 0.3}
+    sim = PortfolioExposureSimulator(data, weights)
+    assert not (sim.dates.dayofweek >= 5).any()
+
+    for rule in ["asset", "portfolio"]:
+        result = sim.run(rebalance="monthly", exposure_rule=rule)
+        attribution = result['attribution']
+        pnl = (attribution['contribution'].sum() + attribution['interest'].sum() - attribution['fees'].sum()
+               - result['daily_data']['rebalance_fees'].sum())
+        assert np.isclose(pnl, result['portfolio']['final_value'] - sim.initial_capital, rtol=1e-9)
+        assert list(attribution.index) == list(weights)
+        if rule == "portfolio":
+            assert (result['exposure'].nunique(axis=1) == 1).all()
+        print(f"✓ {rule} rule: {result['portfolio']['total_return_pct']:+.1f}% vs "
+              f"{result['buyhold']['total_return_pct']:+.1f}% buy & hold")
+
+    for bad in [{"SPY": 0.5}, {"SPY": 1.2, "TSLA": -0.2}, {"SPY": 0.5, "GLD": 0.5}]:
+        try:
+            PortfolioExposureSimulator(data, bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"Invalid weights accepted: {bad}")
+    return True
+
+
+def test_fifty_assets_twenty_years():
+    """50 assets x 20 years simulate in well under a second."""
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2004-01-01", periods=20 * 252)
+    data = {
+        f"A{i:02d}": pd.DataFrame({'close': 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))},
+                                  index=dates)
+        for i in range(50)
+    }
+    sim = PortfolioExposureSimulator(data, {symbol: 1 / 50 for symbol in data})
+
+    start = time.perf_counter()
+    result = sim.run(rebalance="monthly")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert result['sleeves'].shape == (len(sim.dates), 50) and elapsed_ms < 1000, elapsed_ms
+    print(f"✓ 50 assets x {len(sim.dates)} days in {elapsed_ms:.1f} ms")
+    return True
+
+
+def main():
+    """Run the portfolio backtest tests."""
+    results = [
+        test_engine_matches_loop(),
+        test_single_asset_equals_run_simulation(),
+        test_mixed_portfolio_rules(),
+        test_fifty_assets_twenty_years(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,204 @@
+"""
+Test for the provider rate limiter and retry policy.
+
+Verifies that the token bucket passes a burst and then holds the sustained
+rate across threads, that call_with_retry() backs off on 429/5xx with
+jittered exponential delays (honouring Retry-After) and raises other
+errors at once, and that a Binance history whose pagination fails is never
+returned or cached in part.
+
+Uses the cached CSVs in data/ (served as Binance klines pages by a local
+stub of the HTTP request) so the test runs without network access.
+"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import requests
+from curl_cffi.requests import Response as CurlResponse
+from curl_cffi.requests import exceptions as curl_exceptions
+from logic import (PROVIDER_RATE_LIMITS, RETRY_MAX_DELAY, BinanceProvider, DataFetcher, DataProvider,
+                   TokenBucket, call_with_retry, is_retryable, provider_rate_limiter, retry_delay)
+from testdata import load_cached
+
+
+def _http_error(status: int, retry_after: str = None) -> requests.HTTPError:
+    """HTTPError carrying a response with the given status."""
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def _curl_http_error(status: int) -> curl_exceptions.HTTPError:
+    """curl_cffi HTTPError (as raised through yfinance) with the given status."""
+    response = CurlResponse()
+    response.status_code = status
+    return curl_exceptions.HTTPError(f"{status} error", response=response)
+
+
+class _FlakyProvider(DataProvider):
+    """Placeholder provider for call_with_retry()."""
+
+    def fetch_data(self, symbol, interval, lookback_days):
+        return pd.DataFrame()
+
+    def fetch_info(self, symbol):
+        return {"name": symbol}
+
+
+class _StubBinance(BinanceProvider):
+    """BinanceProvider whose HTTP requests serve klines of a cached frame."""
+
+    klines = []
+    failures = {}   # page number -> list of errors to raise before serving it
+
+    def __init__(self, df: pd.DataFrame, failures=None):
+        super().__init__()
+        ms = df.index.astype("int64") // 10**6
+        type(self).klines = [[int(t), o, h, l, c, v, int(t) + 86_399_999, 0, 0, 0, 0, 0]
+                             for t, o, h, l, c, v in zip(ms, df['open'], df['high'], df['low'],
+                                                         df['close'], df['volume'])]
+        type(self).failures = {page: list(errors) for page, errors in (failures or {}).items()}
+
+    @staticmethod
+    def _get_json(url, params):
+        cls = _StubBinance
+        start = params["startTime"]
+        page = sum(1 for k in cls.klines if k[0] < start) // 1000
+        if cls.failures.get(page):
+            raise cls.failures[page].pop(0)
+        return [k for k in cls.klines if k[0] >= start][:params["limit"]]
+
+
+# Fast buckets for the test providers (the real ones keep their limits)
+PROVIDER_RATE_LIMITS.update({"_FlakyProvider": (1000.0, 1000), "_StubBinance": (1000.0, 1000)})
+
+
+def test_token_bucket():
+    """A burst passes at once; afterwards all threads share the sustained rate."""
+    print("=" * 70)
+    print("RATE LIMIT TEST")
+    print("=" * 70)
+
+    bucket = TokenBucket(rate=100.0, capacity=10)
+    start = time.perf_counter()
+    for _ in range(10):
+        bucket.acquire()
+    burst = time.perf_counter() - start
+
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(10)]) for _ in range(4)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sustained = time.perf_counter() - start
+
+    assert burst < 0.05, burst
+    assert 0.35 < sustained < 0.8, sustained   # 40 requests at 100/s
+
+    bucket.pause(0.1)
+    start = time.perf_counter()
+    bucket.acquire()
+    assert time.perf_counter() - start >= 0.09
+
+    try:
+        TokenBucket(rate=0, capacity=5)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Zero rate accepted")
+    print(f"✓ Burst of 10 in {burst * 1000:.1f} ms, 40 requests from 4 threads in {sustained:.2f} s")
+    return True
+
+
+def test_retry_policy():
+    """429/5xx/timeouts are retried with backoff; other errors raise at once."""
+    provider = _FlakyProvider()
+    assert is_retryable(_http_error(429)) and is_retryable(_http_error(503))
+    assert is_retryable(requests.Timeout()) and not is_retryable(_http_error(404))
+    assert is_retryable(curl_exceptions.Timeout("timed out")) and is_retryable(curl_exceptions.ConnectionError("reset"))
+    assert is_retryable(_curl_http_error(503)) and not is_retryable(_curl_http_error(404))
+
+    for attempt in range(6):
+        delay = retry_delay(attempt, base_delay=2)
+        assert min(2 * 2 ** attempt, RETRY_MAX_DELAY) * 0.5 <= delay <= min(2 * 2 ** attempt, RETRY_MAX_DELAY)
+    assert retry_delay(0, _http_error(429, retry_after="7")) == 7.0
+    assert retry_delay(0, _http_error(429, retry_after="600")) == RETRY_MAX_DELAY
+
+    errors = [_http_error(503), requests.ConnectionError("reset")]
+    calls = []
+
+    def flaky():
+        calls.append(time.perf_counter())
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert call_with_retry(provider, flaky, base_delay=0.02) == "ok" and len(calls) == 3
+    assert calls[1] - calls[0] >= 0.01 and calls[2] - calls[1] >= 0.02
+
+    # Yahoo Finance goes through curl_cffi: its timeouts and dropped connections are retried too
+    errors[:] = [curl_exceptions.Timeout("timed out"), curl_exceptions.ConnectionError("reset")]
+    calls.clear()
+    assert call_with_retry(provider, flaky, base_delay=0.001) == "ok" and len(calls) == 3
+
+    # 429 pauses the shared bucket for Retry-After seconds
+    errors[:] = [_http_error(429, retry_after="0.1")]
+    calls.clear()
+    assert call_with_retry(provider, flaky) == "ok" and calls[1] - calls[0] >= 0.09
+
+    for error, expected_calls in [(_http_error(404), 1), (_http_error(500), 3)]:
+        calls.clear()
+        errors[:] = [error] * 5
+        try:
+            call_with_retry(provider, flaky, max_retries=2, base_delay=0.001)
+        except requests.HTTPError:
+            assert len(calls) == expected_calls
+        else:
+            raise AssertionError("Failure not raised")
+    assert provider_rate_limiter(provider) is provider_rate_limiter(_FlakyProvider())
+    print("✓ Backoff on 429/5xx (requests and curl_cffi), Retry-After honoured, 404 raised without retry")
+    return True
+
+
+def test_binance_never_partial():
+    """A failed page fails the whole history; a rate-limited one is retried."""
+    df = load_cached("ETHUSDT")
+    lookback_days = (pd.Timestamp.now() - df.index[0]).days + 1
+    assert len(df) > 1000   # At least two pages
+
+    full = _StubBinance(df, {1: [_http_error(429, retry_after="0.05")]}).fetch_data("ETHUSDT", "1d", lookback_days)
+    assert len(full) == len(df) and not _StubBinance.failures[1]   # Page retried after the 429
+    assert (full['close'].to_numpy() == df['close'].to_numpy()).all()
+
+    partial = _StubBinance(df, {1: [_http_error(400)]}).fetch_data("ETHUSDT", "1d", lookback_days)
+    assert partial.empty
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = DataFetcher()
+        fetcher.cache_dir = Path(tmp)
+        fetcher.binance = _StubBinance(df, {1: [_http_error(403)]})
+        assert fetcher.fetch_data("ETHUSDT").empty
+        assert not fetcher._get_cache_path("ETHUSDT").exists()
+    print(f"✓ {len(full)} klines after a retried 429, nothing returned or cached after a 400/403")
+    return True
+
+
+def main():
+    """Run the rate limit tests."""
+    results = [
+        test_token_bucket(),
+        test_retry_policy(),
+        test_binance_never_partial(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
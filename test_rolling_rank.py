@@ -0,0 +1,68 @@
+"""
+Test for the shared rolling percentile-rank kernel.
+
+Verifies that rolling_percentile_rank() reproduces the rolling(...).apply(lambda)
+percentile patterns it replaced, value for value.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import numpy as np
+import pandas as pd
+from logic import rolling_percentile_rank, percentile_rank
+from testdata import load_cached
+
+
+def _volatility(symbol: str) -> pd.Series:
+    """30-day rolling volatility from a cached OHLCV CSV."""
+    return load_cached(symbol)['close'].pct_change().rolling(window=30).std()
+
+
+def test_exclude_current_strict():
+    """'<' excluding current == (x[-1] > x[:-1]).mean() * 100 (SOCMetricsCalculator)."""
+    vol = _volatility("SPY")
+    expected = vol.rolling(window=504).apply(lambda x: (x.iloc[-1] > x[:-1]).mean() * 100, raw=False)
+    ranks = rolling_percentile_rank(vol, 504, op="<", include_current=False)
+
+    assert np.array_equal(ranks, expected.to_numpy(), equal_nan=True)
+    print("✓ '<' / exclude current matches rolling apply")
+    return True
+
+
+def test_include_current_min_periods():
+    """'>=' including current == (x[-1] <= x).sum() / len(x) * 100 (simulator, chart)."""
+    vol = _volatility("BTC-USD").dropna()
+    expected = vol.rolling(window=504, min_periods=30).apply(
+        lambda x: (x.iloc[-1] <= x).sum() / len(x) * 100, raw=False
+    )
+    ranks = rolling_percentile_rank(vol, 504, op=">=", include_current=True, min_periods=30)
+
+    assert np.array_equal(ranks, expected.to_numpy(), equal_nan=True)
+    print("✓ '>=' / include current / min_periods matches rolling apply")
+    return True
+
+
+def test_single_window_rank():
+    """percentile_rank() uses the same comparison semantics."""
+    reference = [1.0, 2.0, 2.0, 3.0, np.nan]
+    assert percentile_rank(reference, 2.0, op="<") == 25.0
+    assert percentile_rank(reference, 2.0, op="<=") == 75.0
+    assert percentile_rank(reference, 2.0, op=">") == 25.0
+    assert percentile_rank(reference, 2.0, op=">=") == 75.0
+    assert np.isnan(percentile_rank([], 1.0))
+    print("✓ percentile_rank() modes")
+    return True
+
+
+def main():
+    """Run the rolling rank kernel tests."""
+    results = [
+        test_exclude_current_strict(),
+        test_include_current_min_periods(),
+        test_single_window_rank(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
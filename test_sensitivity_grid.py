@@ -0,0 +1,84 @@
+"""
+Test for the exposure simulator sensitivity grid.
+
+Verifies that run_sensitivity() reproduces run_simulations() for every grid
+point, that the process-pool path returns the same cube, and that 1,000 grid
+points over 10 years of daily data finish in about a second.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from logic import DynamicExposureSimulator, SENSITIVITY_PARAMETERS, sensitivity_grid
+from testdata import load_cached
+
+METRICS = ['final_value', 'total_return_pct', 'max_drawdown_pct', 'annualized_vol', 'sharpe_ratio',
+           'avg_exposure_pct', 'total_fees_paid', 'total_interest_earned', 'trade_count']
+
+
+def test_grid_matches_simulations():
+    """Every grid point equals the soc_dynamic block of run_simulations()."""
+    print("=" * 70)
+    print("SENSITIVITY GRID TEST")
+    print("=" * 70)
+
+    sim = DynamicExposureSimulator(load_cached("TSLA"), "TSLA")
+    grid = sensitivity_grid("aggressive", high_stress_threshold=[70, 90], medium_stress_exposure=[0.3, 1.0],
+                            trading_fee_pct=[0.0, 0.01], interest_rate_annual=[0.0, 0.05])
+    cube = sim.run_sensitivity(grid, start_date="2021-06-01", chunk_size=5)
+
+    assert list(cube.columns) == list(SENSITIVITY_PARAMETERS) + METRICS and len(cube) == 16
+    for row, result in zip(cube.itertuples(index=False), sim.run_simulations(grid, start_date="2021-06-01")):
+        for metric in METRICS:
+            assert np.isclose(getattr(row, metric), result['soc_dynamic'][metric], rtol=1e-9), metric
+
+    heatmap = cube.pivot_table(index='high_stress_threshold', columns='trading_fee_pct', values='sharpe_ratio')
+    assert heatmap.shape == (2, 2)
+    print(f"✓ {len(cube)} grid points equal run_simulations()")
+    return True
+
+
+def test_grid_validation():
+    """Unknown parameters are rejected."""
+    try:
+        sensitivity_grid(sma_window=[100, 200])
+    except ValueError:
+        print("✓ Unknown grid parameter rejected")
+        return True
+    raise AssertionError("Unknown sensitivity parameter accepted")
+
+
+def test_thousand_points_speed():
+    """1,000 grid points x 10 years in about a second; process pool gives the same cube."""
+    df = pd.concat([load_cached("BTC-USD")] * 2)
+    df.index = pd.bdate_range("2010-01-04", periods=len(df))
+    sim = DynamicExposureSimulator(df.iloc[-3100:], "BTC-USD")
+    grid = sensitivity_grid(high_stress_threshold=range(60, 100, 4), medium_stress_threshold=[40, 50, 60, 70, 80],
+                            high_stress_exposure=[0.0, 0.2, 0.5, 0.8], trading_fee_pct=[0.001, 0.005, 0.01, 0.02, 0.05])
+
+    start = time.perf_counter()
+    cube = sim.run_sensitivity(grid)
+    elapsed = time.perf_counter() - start
+
+    assert len(cube) == 1000 and len(sim.df) >= 2520
+    assert elapsed < 5, f"Grid took {elapsed:.2f}s"
+    assert sim.run_sensitivity(grid[:300], workers=2, chunk_size=100).equals(cube.iloc[:300])
+    print(f"✓ {len(cube)} grid points x {len(sim.df)} days in {elapsed:.2f}s")
+    return True
+
+
+def main():
+    """Run the sensitivity grid tests."""
+    results = [
+        test_grid_matches_simulations(),
+        test_grid_validation(),
+        test_thousand_points_speed(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
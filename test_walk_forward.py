@@ -0,0 +1,96 @@
+"""
+Test for the walk-forward (rolling-origin) backtest.
+
+Verifies that DynamicExposureSimulator.walk_forward() reproduces
+run_simulation() for individual start dates, both held to the end and for a
+fixed holding horizon, and that thousands of start dates run instantly.
+
+Uses the cached CSVs in data/ so the test runs without network access.
+"""
+
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+from logic import DynamicExposureSimulator, strategy_profile
+from testdata import load_cached
+
+
+def _assert_row_matches(row: pd.Series, result: dict) -> None:
+    """One walk-forward row must equal a run_simulation() result."""
+    soc, buyhold = result['soc_dynamic'], result['buyhold']
+    assert row['days'] == result['total_days']
+    assert row['end_date'] == result['end_date']
+    expected = [soc['total_return_pct'], soc['max_drawdown_pct'], soc['annualized_vol'], soc['sharpe_ratio'],
+                buyhold['total_return_pct'], buyhold['max_drawdown_pct']]
+    got = [row['total_return_pct'], row['max_drawdown_pct'], row['annualized_vol'], row['sharpe_ratio'],
+           row['buyhold_return_pct'], row['buyhold_max_drawdown_pct']]
+    assert np.allclose(got, expected, rtol=1e-9, atol=1e-9), (got, expected)
+
+
+def test_matches_run_simulation():
+    """Every sampled start date equals run_simulation(start_date=...)."""
+    print("=" * 70)
+    print("WALK-FORWARD BACKTEST TEST")
+    print("=" * 70)
+
+    sim = DynamicExposureSimulator(load_cached("BTC-USD"), "BTC-USD")
+    for mode in ["defensive", "aggressive"]:
+        profile = strategy_profile(mode, trading_fee_pct=0.01, interest_rate_annual=0.04)
+        outcomes = sim.walk_forward(profile)
+        assert len(outcomes) == len(sim.df) - 29
+        for pos in [0, 1, 250, len(outcomes) // 2, len(outcomes) - 1]:
+            start = outcomes.index[pos]
+            _assert_row_matches(outcomes.iloc[pos], sim.run_simulation(str(start.date()), mode, 0.01, 0.04))
+    print(f"✓ {len(outcomes)} start dates, sampled rows equal run_simulation()")
+    return True
+
+
+def test_fixed_horizon():
+    """With a horizon, each row equals a simulation on data ending after `horizon` days."""
+    sim = DynamicExposureSimulator(load_cached("SPY"), "SPY")
+    outcomes = sim.walk_forward(horizon=126)
+    assert len(outcomes) == len(sim.df) - 125 and (outcomes['days'] == 126).all()
+
+    for pos in [0, 200, len(outcomes) - 1]:
+        truncated = copy.copy(sim)
+        truncated.df = sim.df.iloc[:pos + 126]
+        _assert_row_matches(outcomes.iloc[pos], truncated.run_simulation(str(outcomes.index[pos].date())))
+
+    try:
+        sim.walk_forward(horizon=10)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Horizon below min_days accepted")
+    print(f"✓ 126-day horizon for {len(outcomes)} starts")
+    return True
+
+
+def test_scales_to_many_starts():
+    """5,000+ start dates in milliseconds."""
+    df = pd.concat([load_cached("BTC-USD")] * 3)
+    df.index = pd.bdate_range("2000-01-03", periods=len(df))
+    sim = DynamicExposureSimulator(df, "BTC-USD")
+
+    start = time.perf_counter()
+    outcomes = sim.walk_forward()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert len(outcomes) > 5000 and elapsed_ms < 500, elapsed_ms
+    print(f"✓ {len(outcomes)} start dates in {elapsed_ms:.1f} ms")
+    return True
+
+
+def main():
+    """Run the walk-forward backtest tests."""
+    results = [
+        test_matches_run_simulation(),
+        test_fixed_horizon(),
+        test_scales_to_many_starts(),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
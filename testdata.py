@@ -0,0 +1,30 @@
+"""
+Cached market data for the test scripts.
+
+The OHLCV histories in data/ let the tests run without network access;
+every test loads them through load_cached() instead of parsing the CSVs
+itself.
+"""
+
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).parent / "data"
+CACHED_SUFFIX = "_1d_cached.csv"
+
+
+def cached_path(symbol: str) -> Path:
+    """Path of the cached OHLCV CSV of a symbol."""
+    return DATA_DIR / f"{symbol}{CACHED_SUFFIX}"
+
+
+def cached_symbols() -> List[str]:
+    """Symbols with a cached OHLCV CSV in data/, sorted."""
+    return sorted(path.name[:-len(CACHED_SUFFIX)] for path in DATA_DIR.glob(f"*{CACHED_SUFFIX}"))
+
+
+def load_cached(symbol: str) -> pd.DataFrame:
+    """Load a cached OHLCV CSV from data/."""
+    return pd.read_csv(cached_path(symbol), index_col=0, parse_dates=True)
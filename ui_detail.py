@@ -434,6 +434,8 @@ def render_detail_panel(result: Dict[str, Any], get_signal_color_func, get_signa
                                 '10d': f"{data.get('start_return_10d', 0):+.1f}%",
                                 '30d': f"{data.get('avg_return_30d', 0):+.1f}%",
                                 '90d': f"{data.get('avg_return_90d', 0):+.1f}%",
+                                '180d': f"{data.get('avg_return_180d', 0):+.1f}%",
+                                '252d': f"{data.get('avg_return_252d', 0):+.1f}%",
                                 'Max DD (10d)': f"{data.get('worst_max_dd_10d', 0):.1f}%"
                             })
                     
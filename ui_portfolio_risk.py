@@ -10,7 +10,7 @@ The portfolio is the product. Assets are supporting evidence.
 import streamlit as st
 import pandas as pd
 from typing import List, Dict, Optional
-from logic import compute_market_state, MarketState
+from logic import cached_market_state, MarketState
 from portfolio_state import AssetInput, PortfolioInput, compute_portfolio_state, PortfolioState
 
 
@@ -441,8 +441,9 @@ def compute_portfolio_state_from_user_input(user_portfolio: List[Dict[str, float
     """
     from logic import DataFetcher
     
-    # Fetch data and compute states for each asset
+    # Fetch data for all assets concurrently, then compute states for each asset
     fetcher = DataFetcher(cache_enabled=True)
+    fetched = {result.symbol: result for result in fetcher.fetch_many([asset['symbol'] for asset in user_portfolio])}
     asset_inputs = []
     corrected_symbols = []  # Track which symbols were auto-corrected
     
@@ -452,8 +453,10 @@ def compute_portfolio_state_from_user_input(user_portfolio: List[Dict[str, float
         original_symbol = symbol  # Keep track of original input
         
         try:
-            # First, try to fetch with the original symbol
-            df = fetcher.fetch_data(symbol)
+            # First, try the original symbol
+            if fetched[symbol].error is not None:
+                raise fetched[symbol].error
+            df = fetched[symbol].data
             
             # If no data, try auto-correction
             if df is None or df.empty:
@@ -478,7 +481,7 @@ def compute_portfolio_state_from_user_input(user_portfolio: List[Dict[str, float
                 continue
             
             # Compute market state (using existing validated logic - NO CHANGES)
-            market_state = compute_market_state(df, len(df) - 1)
+            market_state = cached_market_state(df, len(df) - 1, symbol=symbol)
             
             # Create AssetInput
             asset_input = AssetInput(
@@ -18,7 +18,7 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
-from logic import run_dca_simulation, calculate_audit_metrics
+from logic import run_dca_simulations, strategy_profile, calculate_audit_metrics
 
 
 def render_dca_simulation(tickers: List[str]) -> None:
@@ -109,26 +109,20 @@ def render_dca_simulation(tickers: List[str]) -> None:
         
         # === RUN BOTH SIMULATIONS ===
         with st.spinner(f"⚙️ Reconstructing {years_back}-year tectonic timeline for {sim_ticker}... Simulating phase transitions..."):
-            # Run Defensive simulation
-            results_def = run_dca_simulation(
-                sim_ticker, 
-                initial_capital=initial_capital, 
-                start_date=start_date, 
+            # One data load, both strategies in one pass
+            results_def, results_agg = run_dca_simulations(
+                sim_ticker,
+                [
+                    strategy_profile("defensive", trading_fee_pct=trading_fee_pct / 100,
+                                     interest_rate_annual=interest_rate_annual / 100),
+                    strategy_profile("aggressive", trading_fee_pct=trading_fee_pct / 100,
+                                     interest_rate_annual=interest_rate_annual / 100),
+                ],
+                initial_capital=initial_capital,
+                start_date=start_date,
                 years_back=years_back,
-                strategy_mode="defensive",
-                trading_fee_pct=trading_fee_pct / 100,
-                interest_rate_annual=interest_rate_annual / 100
-            )
-            
-            # Run Aggressive simulation
-            results_agg = run_dca_simulation(
-                sim_ticker, 
-                initial_capital=initial_capital, 
-                start_date=start_date, 
-                years_back=years_back,
-                strategy_mode="aggressive",
-                trading_fee_pct=trading_fee_pct / 100,
-                interest_rate_annual=interest_rate_annual / 100
+                curve_granularity="lttb",   # Peaks/troughs of every curve, shared dates
+                curve_points=400
             )
         
         # Check for errors
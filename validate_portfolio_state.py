@@ -18,13 +18,14 @@ import numpy as np
 from typing import List, Dict
 from datetime import datetime
 
-from logic import compute_market_state, MarketState
+from logic import compute_market_states, market_states_to_list, MarketState
+from market_state_frame import MarketStateFrame
 from portfolio_state import (
     AssetInput,
     PortfolioInput,
     PortfolioState,
     compute_portfolio_state,
-    compute_portfolio_time_series
+    compute_portfolio_time_series_from_frames
 )
 
 
@@ -62,13 +63,17 @@ def download_asset_data(symbol: str, start: str = "2020-01-01", end: str = "2024
 
 def compute_asset_states(df: pd.DataFrame) -> Dict[pd.Timestamp, MarketState]:
     """Compute MarketState for every point in time (point-in-time)."""
-    states = {}
+    # Batch computation (identical to compute_market_state per index)
+    states_df = compute_market_states(df)
     # Start from index 200 to ensure we have enough data for SMA200
-    for idx in range(200, len(df)):
-        date = df.index[idx]
-        state = compute_market_state(df, idx)
-        states[date] = state
-    return states
+    states_df = states_df[states_df.index >= df.index[200]]
+    return dict(zip(states_df.index, market_states_to_list(states_df)))
+
+
+def compute_asset_state_frame(df: pd.DataFrame) -> MarketStateFrame:
+    """Compute the columnar MarketState history (same rows as compute_asset_states)."""
+    states_df = compute_market_states(df)
+    return MarketStateFrame.from_states_df(states_df[states_df.index >= df.index[200]])
 
 
 # =====================================================================
@@ -313,27 +318,21 @@ def test_stress_clustering():
     spy_df = download_asset_data("SPY", start="2020-01-01", end="2023-12-31")
     qqq_df = download_asset_data("QQQ", start="2020-01-01", end="2023-12-31")
     
-    # Compute asset states
+    # Compute asset states (columnar, one frame per asset)
     print("🔧 Computing asset states...")
-    spy_states = compute_asset_states(spy_df)
-    qqq_states = compute_asset_states(qqq_df)
+    state_frames = {
+        "SPY": compute_asset_state_frame(spy_df),
+        "QQQ": compute_asset_state_frame(qqq_df)
+    }
     
     # Find common dates
-    common_dates = set(spy_states.keys()) & set(qqq_states.keys())
-    
-    # Build asset states by date (for time series function)
-    asset_states_by_date = {}
-    for date in common_dates:
-        asset_states_by_date[date] = {
-            "SPY": spy_states[date],
-            "QQQ": qqq_states[date]
-        }
+    common_dates = np.intersect1d(state_frames["SPY"].date, state_frames["QQQ"].date)
     
     # Compute portfolio time series with hysteresis
     weights = {"SPY": 0.6, "QQQ": 0.4}
     
     print(f"🔧 Computing portfolio time series ({len(common_dates)} days)...")
-    portfolio_states = compute_portfolio_time_series(asset_states_by_date, weights)
+    portfolio_states = compute_portfolio_time_series_from_frames(state_frames, weights)
     
     # Analyze results
     green_days = sum(1 for s in portfolio_states if s.portfolio_regime == "GREEN")
@@ -426,27 +425,21 @@ def test_no_invalid_transitions():
     spy_df = download_asset_data("SPY", start="2020-01-01", end="2023-12-31")
     qqq_df = download_asset_data("QQQ", start="2020-01-01", end="2023-12-31")
     
-    # Compute asset states
+    # Compute asset states (columnar, one frame per asset)
     print("🔧 Computing asset states...")
-    spy_states = compute_asset_states(spy_df)
-    qqq_states = compute_asset_states(qqq_df)
+    state_frames = {
+        "SPY": compute_asset_state_frame(spy_df),
+        "QQQ": compute_asset_state_frame(qqq_df)
+    }
     
     # Find common dates
-    common_dates = set(spy_states.keys()) & set(qqq_states.keys())
-    
-    # Build asset states by date
-    asset_states_by_date = {}
-    for date in common_dates:
-        asset_states_by_date[date] = {
-            "SPY": spy_states[date],
-            "QQQ": qqq_states[date]
-        }
+    common_dates = np.intersect1d(state_frames["SPY"].date, state_frames["QQQ"].date)
     
     # Compute portfolio time series with hysteresis
     weights = {"SPY": 0.6, "QQQ": 0.4}
     
     print(f"🔧 Computing portfolio time series with hysteresis...")
-    portfolio_states = compute_portfolio_time_series(asset_states_by_date, weights)
+    portfolio_states = compute_portfolio_time_series_from_frames(state_frames, weights)
     
     print(f"\n📊 Analyzing {len(portfolio_states)} portfolio states...")
     
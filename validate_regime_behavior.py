@@ -14,7 +14,7 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Any
-from logic import compute_market_state, MarketState
+from logic import compute_market_states, MarketState
 
 # Configuration
 ASSETS = {
@@ -61,29 +61,13 @@ def compute_all_states(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
     """Compute MarketState for every valid bar."""
     print(f"  Computing market states...")
     
-    states = []
     start_idx = 200  # Minimum for SMA200
     
-    for idx in range(start_idx, len(df)):
-        try:
-            state = compute_market_state(df, idx)
-            states.append({
-                'date': state.date,
-                'criticality': state.criticality,
-                'regime': state.regime,
-                'trend_state': state.trend_state,
-                'volatility': state.volatility,
-                'volatility_percentile': state.volatility_percentile,
-                'volatility_component': state.volatility_component,
-                'trend_component': state.trend_component,
-                'extension_component': state.extension_component,
-                'price': df['close'].iloc[idx]
-            })
-        except Exception as e:
-            print(f"    ⚠️ Warning at index {idx}: {e}")
-    
-    states_df = pd.DataFrame(states)
-    states_df.set_index('date', inplace=True)
+    # Batch computation: identical to compute_market_state(df, idx) per bar
+    states_df = compute_market_states(df)
+    states_df = states_df[states_df.index >= df.index[start_idx]]
+    states_df = states_df.drop(columns=['reason_codes'])
+    states_df['price'] = df['close'].reindex(states_df.index)
     
     print(f"    ✓ {len(states_df)} states computed")
     return states_df